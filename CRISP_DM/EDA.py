@@ -1,22 +1,214 @@
-import networkx as nx
-from matplotlib import pyplot as plt
-from py2neo import Graph
+import math
+import os
+
+from pages.AsyncConnection import AsyncConnectionManager
+from pages.Cache import QueryCache
+from pages.Connection import ConnectionManager
+from pages.Generation import current_generations
+from pages.Projection import ProjectionManager
+from pages.Queries import BOOKKEEPING_LABELS, QUERIES, data_nodes, escape, quote, register
+
+# Labels of the mode partitions, whose label-specific statements are planned at warm-up
+MODE_LABELS = [{"label": "DartStation"}, {"label": "LuasStation"}, {"label": "BusRoute"}]
+# Unique key of each mode label (see pages/Schema.py)
+MODE_KEYS = {"DartStation": "name", "LuasStation": "Station_ID", "BusRoute": "Route Number"}
+
+# Bookkeeping nodes have no relationships, so only statements over every node need to leave them out
+DATA_NODES = data_nodes("n")
+
+# Both counts come from the count store, so leaving the bookkeeping nodes out costs no scan
+BOOKKEEPING_COUNT = "".join(f" - COUNT {{ MATCH (n:{quote(label)}) }}" for label in BOOKKEEPING_LABELS)
+register("eda.count_nodes", f"RETURN COUNT {{ MATCH (n) }}{BOOKKEEPING_COUNT} AS count", {})
+register("eda.count_relationships", "MATCH ()-[r]->() RETURN COUNT(r) AS count", {})
+register("eda.labels", f"""
+        CALL db.labels() YIELD label
+        WHERE NOT label IN {BOOKKEEPING_LABELS!r}
+        RETURN label
+        """, {})
+register("eda.relationship_types", "CALL db.relationshipTypes()", {})
+register("eda.most_connected", """
+        MATCH (n)-[r]->()
+        RETURN n, COUNT(r) AS connections
+        ORDER BY connections DESC
+        LIMIT $limit
+        """, {"limit": 10})
+register("eda.most_connected.all", """
+        MATCH (n)-[r]->()
+        RETURN n, COUNT(r) AS connections
+        ORDER BY connections DESC
+        """, {})
+register("eda.degree_distribution", f"""
+        MATCH (n)
+        WHERE {DATA_NODES}
+        RETURN labels(n) AS labels, COUNT {{ (n)--() }} AS degree
+        ORDER BY degree DESC
+        LIMIT $limit
+        """, {"limit": 20})
+register("eda.degree_distribution.all", f"""
+        MATCH (n)
+        WHERE {DATA_NODES}
+        RETURN labels(n) AS labels, COUNT {{ (n)--() }} AS degree
+        ORDER BY degree DESC
+        """, {})
+# Nodes per log-binned degree, per label and relationship type, in one pass over the graph. Each degree
+# is a COUNT {} of one relationship type, read from the node's degree counts without expanding its
+# relationships. Bin 0 holds degree 0 and bin k the degrees in [base^(k-1), base^k); the epsilon keeps
+# exact powers of the base in their own bin despite floating point logs. A null rel_type is the total over
+# all types; a type only counts the nodes that have it. `{degrees}` lists one map per relationship type,
+# whose name is taken from $rel_types so no name is ever inlined as a string literal.
+DEGREE_HISTOGRAM_QUERY = """
+        MATCH (n)
+        WHERE {data_nodes}
+        WITH labels(n) AS labels, [{degrees}] AS degrees
+        UNWIND CASE labels WHEN [] THEN [null] ELSE labels END AS label
+        UNWIND [d IN degrees WHERE d.rel_type IS NULL OR d.degree > 0] AS d
+        WITH label, d.rel_type AS rel_type,
+             CASE d.degree WHEN 0 THEN 0 ELSE toInteger(floor(log(d.degree) / log($base) + 1e-9)) + 1 END AS bin
+        RETURN label, rel_type, bin, count(*) AS nodes
+        ORDER BY label, rel_type, bin
+        """
+_degree_histogram_queries = {}
+register("eda.sample", """
+        MATCH (n)-[r]-(m)
+        RETURN n, r, m
+        LIMIT $limit
+        """, {"limit": 10})
+register("eda.sample.label", """
+        MATCH (n:{label})-[r]-(m)
+        RETURN n, r, m
+        LIMIT $limit
+        """, {"limit": 10}, variants=MODE_LABELS)
+register("eda.node_degrees", f"""
+        MATCH (n)
+        WHERE {DATA_NODES}
+        RETURN elementId(n) AS id, labels(n) AS labels, COUNT {{ (n)--() }} AS degree
+        """, {})
+register("eda.node_degrees.label", """
+        MATCH (n:{label})
+        RETURN elementId(n) AS id, labels(n) AS labels, COUNT { (n)--() } AS degree
+        """, {}, variants=MODE_LABELS)
+# Keyset pages over a mode's unique key: the range predicate and ORDER BY are served by the key's
+# uniqueness constraint, so every page costs the same. Keys are never blank, so "" starts the walk.
+register("eda.node_degrees.keyset", """
+        MATCH (n:{label})
+        WHERE n.{key} > $after
+        WITH n ORDER BY n.{key} LIMIT $page_size
+        RETURN n.{key} AS key, elementId(n) AS id, labels(n) AS labels, COUNT { (n)--() } AS degree
+        """, {"after": "", "page_size": 1000},
+         variants=[dict(label, key=MODE_KEYS[label["label"]]) for label in MODE_LABELS])
+
+
+def degree_bins(base, size):
+    """Labels of the first `size` log bins: "0", then the integer degrees each bin covers"""
+    bins = ["0"]
+    for k in range(1, size):
+        low = math.ceil(base ** (k - 1))
+        high = math.ceil(base ** k) - 1
+        bins.append(str(low) if high == low else f"{low}-{high}" if high > low else "-")
+    return bins
+
+
+def degree_histogram_query(rel_types):
+    """
+    DEGREE_HISTOGRAM_QUERY for the given relationship types, and the $rel_types parameter to run it with.
+    The text is built once per set of types, so repeat calls hand the server the identical string.
+    """
+    key = tuple(sorted(rel_types))
+    text = _degree_histogram_queries.get(key)
+    if text is None:
+        degrees = [
+            f"{{rel_type: $rel_types[{i}], degree: COUNT {{ (n)-[:{escape(rel_type)}]-() }}}}"
+            for i, rel_type in enumerate(key)
+        ]
+        degrees.append("{rel_type: null, degree: COUNT { (n)--() }}")
+        text = DEGREE_HISTOGRAM_QUERY.format(data_nodes=DATA_NODES, degrees=", ".join(degrees))
+        _degree_histogram_queries[key] = text
+    return text, list(key)
+
+
+def degree_histogram(rows, base):
+    """Nest the rows of a degree_histogram_query statement by label and relationship type"""
+    size = max((row["bin"] for row in rows), default=0) + 1
+    histograms = {}
+    for row in rows:
+        label = row["label"] or "No Label"
+        counts = histograms.setdefault(label, {}).setdefault(row["rel_type"] or "*", [0] * size)
+        counts[row["bin"]] = row["nodes"]
+    return {"base": base, "bins": degree_bins(base, size), "histograms": histograms}
+
+
+def _figure(figsize):
+    """A figure that is not attached to pyplot or any GUI backend, for saving to files"""
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize)
+    return figure, figure.add_subplot()
 
 
 class Neo4jEDA:
-    def __init__(self, uri, username, password):
+    def __init__(self, uri, username, password, cache=None, **config):
         """
         Initialize the connection to the Neo4j database.
+        `cache` is a dict of QueryCache options (max_entries, ttl, path) that enables result caching;
+        pass {} for the defaults.
+        """
+        self.connection = ConnectionManager.get(uri, username, password, **config)
+        self.driver = self.connection.driver
+        self.projections = ProjectionManager(self.connection)
+        self.cache = None if cache is None else QueryCache(self.connection, **cache)
+
+    def close(self):
+        """
+        Release the shared Neo4j connection.
         """
-        self.driver = None
-        self.graph = Graph(uri, auth=(username, password))
+        if self.connection:
+            self.connection.release()
+            self.connection = None
+
+    def _cached(self, query, parameters, compute):
+        if self.cache is None:
+            return compute()
+        return self.cache.query(query, parameters, compute)
+
+    def _data(self, query, parameters=None):
+        """
+        Run a query and return its records as a list of dictionaries, through the cache if enabled.
+        """
+        return self._cached(
+            query, parameters, lambda: [record.data() for record in self.connection.run(query, parameters)]
+        )
+
+    def _stream(self, query, parameters=None, fetch_size=1000):
+        """
+        Run a query and yield its records as dictionaries, one fetch of `fetch_size` at a time.
+        """
+        for record in self.connection.stream(query, parameters, fetch_size=fetch_size):
+            yield record.data()
+
+    def _rows(self, query, parameters=None, stream=False, fetch_size=1000):
+        """
+        Records as a list, or as a lazy generator when `stream` is set.
+        """
+        if stream:
+            return self._stream(query, parameters, fetch_size)
+        return self._data(query, parameters)
+
+    def _evaluate(self, query, parameters=None):
+        """
+        Run a query and return the first value of the first record.
+        """
+        def compute():
+            records = self.connection.run(query, parameters)
+            return records[0][0] if records else None
+
+        return self._cached(query, parameters, compute)
 
     def test_connection(self):
         """
         Test the connection to the Neo4j instance.
         """
         try:
-            return self.graph.run("RETURN 'Connection Successful' AS message").data()
+            return [record.data() for record in self.connection.run("RETURN 'Connection Successful' AS message")]
         except Exception as e:
             return {"error": str(e)}
 
@@ -24,8 +216,8 @@ class Neo4jEDA:
         """
         Count the total number of nodes and relationships in the graph.
         """
-        nodes = self.graph.evaluate("MATCH (n) RETURN COUNT(n) AS count")
-        relationships = self.graph.evaluate("MATCH ()-[r]->() RETURN COUNT(r) AS count")
+        nodes = self._evaluate(QUERIES["eda.count_nodes"])
+        relationships = self._evaluate(QUERIES["eda.count_relationships"])
         print("\nCount Nodes and Relationships:")
         return {"nodes": nodes, "relationships": relationships}
 
@@ -33,136 +225,312 @@ class Neo4jEDA:
         """
         Get all distinct node labels in the graph.
         """
-        labels = self.graph.run("CALL db.labels()").data()
+        labels = self._data(QUERIES["eda.labels"])
         return [label['label'] for label in labels]
 
     def get_relationship_types(self):
         """
         Get all distinct relationship types in the graph.
         """
-        rel_types = self.graph.run("CALL db.relationshipTypes()").data()
+        rel_types = self._data(QUERIES["eda.relationship_types"])
         return [rel_type['relationshipType'] for rel_type in rel_types]
 
-    def most_connected_nodes(self, limit=10):
+    def most_connected_nodes(self, limit=10, stream=False, fetch_size=1000):
         """
         Get the top `limit` most connected nodes in the graph.
+        With `stream` set the rows are yielded lazily instead of returned as a list;
+        `limit=None` then walks every node without holding the result in memory.
         """
-        query = f"""
-        MATCH (n)-[r]->()
-        RETURN n, COUNT(r) AS connections
-        ORDER BY connections DESC
-        LIMIT {limit}
-        """
-        results = self.graph.run(query).data()
-        return results
+        if limit is None:
+            return self._rows(QUERIES["eda.most_connected.all"], stream=stream, fetch_size=fetch_size)
+        return self._rows(QUERIES["eda.most_connected"], {"limit": limit}, stream=stream, fetch_size=fetch_size)
 
-    def degree_distribution(self, limit=20):
+    def degree_distribution(self, limit=20, stream=False, fetch_size=1000):
         """
         Get the degree distribution of nodes, limited to top `limit` nodes.
+        With `stream` set the rows are yielded lazily instead of returned as a list.
         """
-        query = f"""
-        MATCH (n)
-        RETURN labels(n) AS labels, COUNT {{ (n)--() }} AS degree
-        ORDER BY degree DESC
-        LIMIT {limit}
+        if limit is None:
+            return self._rows(QUERIES["eda.degree_distribution.all"], stream=stream, fetch_size=fetch_size)
+        return self._rows(
+            QUERIES["eda.degree_distribution"], {"limit": limit}, stream=stream, fetch_size=fetch_size
+        )
+
+    def degree_histogram(self, base=2):
+        """
+        Log-binned degree histogram of the whole graph, aggregated on the server in a single pass over
+        the nodes from their per-type degree counts.
+        Returns {"base", "bins": bin labels, "histograms": {label: {rel_type: node counts per bin}}},
+        where rel_type "*" is the total degree. Per-type counts only include nodes with that type.
         """
-        results = self.graph.run(query).data()
-        return results
+        if base <= 1:
+            raise ValueError("base must be greater than 1")
+        query, rel_types = degree_histogram_query(self.get_relationship_types())
+        return degree_histogram(self._data(query, {"base": float(base), "rel_types": rel_types}), base)
 
-    def sample_subgraph(self, label=None, limit=10):
+    def sample_subgraph(self, label=None, limit=10, stream=False, fetch_size=1000):
         """
         Fetch a sample subgraph. Optionally filter by a node label.
+        With `stream` set the rows are yielded lazily instead of returned as a list.
+        Raises ValueError for a label that is not a plain identifier.
         """
-        if label:
-            query = f"""
-            MATCH (n:{label})-[r]-(m)
-            RETURN n, r, m
-            LIMIT {limit}
-            """
+        query = QUERIES.format("eda.sample.label", label=label) if label else QUERIES["eda.sample"]
+        return self._rows(query, {"limit": limit}, stream=stream, fetch_size=fetch_size)
+
+    def iter_node_degrees(self, label=None, page_size=1000):
+        """
+        Yield every node's id, labels and degree without holding more than `page_size` records.
+        Mode labels are walked in keyset pages over their unique key (each record then also has `key`);
+        anything else is streamed from a single query, `page_size` records per fetch.
+        """
+        if label in MODE_KEYS:
+            query = QUERIES.format("eda.node_degrees.keyset", label=label, key=MODE_KEYS[label])
+            records = self.connection.paginate(query, key="key", page_size=page_size, after="")
         else:
-            query = f"""
-            MATCH (n)-[r]-(m)
-            RETURN n, r, m
-            LIMIT {limit}
-            """
-        results = self.graph.run(query).data()
-        return results
+            query = QUERIES.format("eda.node_degrees.label", label=label) if label else QUERIES["eda.node_degrees"]
+            records = self.connection.stream(query, fetch_size=page_size)
+        for record in records:
+            yield record.data()
 
     def delete_existing_graph(self, graph_name):
-        with self.driver.session() as session:
-            try:
-                # Check if the graph exists
-                exists = session.run(
-                    "CALL gds.graph.exists($graph_name) YIELD exists RETURN exists",
-                    graph_name=graph_name
-                ).single()
-                if exists and exists["exists"]:
-                    # If the graph exists, drop it
-                    session.run("CALL gds.graph.drop($graph_name)", graph_name=graph_name)
-                    print(f"Graph '{graph_name}' deleted successfully.")
-                else:
-                    print(f"Graph '{graph_name}' does not exist.")
-            except Exception as e:
-                print(f"An error occurred: {e}")
+        """
+        Drop a GDS projection if it exists.
+        """
+        try:
+            if not self.projections.drop(graph_name):
+                print(f"Graph '{graph_name}' does not exist.")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+    def cache_stats(self):
+        """
+        Hit and miss statistics of the result cache, or None when caching is off.
+        """
+        return None if self.cache is None else self.cache.stats()
+
+    def projection_memory(self):
+        """
+        Node and relationship counts and memory use of the projections in the GDS catalog.
+        """
+        return self.projections.memory()
+
+    def shortest_paths(self, pairs, graph_name="luasGraph", label="LuasStation", key="name", weight="travel_time"):
+        """
+        Shortest paths for many (source, target) station pairs in a single query.
+        """
+        pairs = [tuple(pair) for pair in pairs]
+        return self._cached(
+            "shortest_paths",
+            {"graph": graph_name, "pairs": pairs, "label": label, "key": key, "weight": weight},
+            lambda: self.projections.shortest_paths(graph_name, pairs, label, key=key, weight=weight),
+        )
+
+    def single_source_paths(self, source, graph_name="luasGraph", label="LuasStation", key="name",
+                            weight="travel_time"):
+        """
+        Shortest paths from one station to every reachable station.
+        """
+        return self._cached(
+            "single_source_paths",
+            {"graph": graph_name, "source": source, "label": label, "key": key, "weight": weight},
+            lambda: self.projections.single_source_paths(graph_name, source, label, key=key, weight=weight),
+        )
+
+    def snapshot(self, path, refresh=False):
+        """
+        Load the CSR snapshot saved at `path`, exporting it first when it is missing, `refresh`
+        is set, or a loader has written to the graph since it was taken.
+        Analytics on the returned GraphSnapshot run locally without further queries.
+        """
+        # NumPy/SciPy are only loaded when a snapshot is used
+        from CRISP_DM.Snapshot import META_FILE, GraphSnapshot
+
+        if not refresh and os.path.exists(os.path.join(path, META_FILE)):
+            snapshot = GraphSnapshot.load(path)
+            if snapshot.generations == current_generations(self.connection):
+                return snapshot
+        snapshot = GraphSnapshot.from_connection(self.connection)
+        snapshot.save(path)
+        print(f"Snapshot saved to {path}: {snapshot.node_count} nodes, {snapshot.relationship_count} relationships")
+        return GraphSnapshot.load(path)
+
+    def journey_planner(self, path, landmarks=8):
+        """
+        Multi-modal JourneyPlanner over the snapshot at `path`, with ALT landmarks precomputed.
+        """
+        from CRISP_DM.Journey import JourneyPlanner
+
+        return JourneyPlanner.from_snapshot(self.snapshot(path)).prepare(landmarks)
+
     # Visualization Functions
-    def visualize_node_degree_distribution(self, degree_data):
+    def visualize_node_degree_distribution(self, degree_data, path="degree_distribution.png"):
         """
-        Visualize the degree distribution of nodes as a bar chart.
+        Draw the top-N degree rows as a horizontal bar chart and save it to `path` (PNG, SVG, ...
+        by extension). Rendering is headless, so it works without a display.
         """
+        import numpy as np
+
         labels = [" / ".join(d['labels']) if d['labels'] else "No Label" for d in degree_data]
-        degrees = [d['degree'] for d in degree_data]
+        degrees = np.fromiter((d['degree'] for d in degree_data), dtype=float, count=len(degree_data))
 
-        plt.figure(figsize=(10, 6))
-        plt.barh(labels, degrees, color='skyblue')
-        plt.xlabel('Degree (Number of Connections)')
-        plt.ylabel('Node Labels')
-        plt.title('Node Degree Distribution')
-        plt.gca().invert_yaxis()
-        plt.show()
+        figure, axes = _figure(figsize=(10, max(4, 0.25 * len(labels))))
+        axes.barh(np.arange(len(labels)), degrees, color='skyblue')
+        axes.set_yticks(np.arange(len(labels)), labels)
+        axes.set_xlabel('Degree (Number of Connections)')
+        axes.set_ylabel('Node Labels')
+        axes.set_title('Node Degree Distribution')
+        axes.invert_yaxis()
+        figure.savefig(path, bbox_inches="tight")
+        print(f"Degree distribution saved to {path}")
+        return path
 
-    def apply_graph_algorithms(self):
+    def plot_degree_histogram(self, histogram, path="degree_histogram.png", rel_types=False):
+        """
+        Plot a degree_histogram() result, one step line per label (and per relationship type with
+        `rel_types`) on a log count axis, and save it to `path`. Each series is drawn from its bin
+        counts in one call, so the cost depends on the number of bins, not of nodes.
+        """
+        import numpy as np
+
+        bins = histogram["bins"]
+        edges = np.arange(len(bins) + 1)
+        figure, axes = _figure(figsize=(10, 6))
+        for label, by_type in sorted(histogram["histograms"].items()):
+            for rel_type, counts in sorted(by_type.items()):
+                if rel_type != "*" and not rel_types:
+                    continue
+                name = label if rel_type == "*" else f"{label} {rel_type}"
+                axes.stairs(np.asarray(counts, dtype=float), edges, label=name)
+        axes.set_yscale("symlog", linthresh=1)
+        axes.set_xticks(edges[:-1] + 0.5, bins, rotation=45, ha="right")
+        axes.set_xlabel('Degree')
+        axes.set_ylabel('Nodes')
+        axes.set_title(f"Degree Histogram (log base {histogram['base']} bins)")
+        axes.legend(fontsize="small")
+        figure.savefig(path, bbox_inches="tight")
+        print(f"Degree histogram saved to {path}")
+        return path
+
+    def apply_graph_algorithms(self, pairs=(("Tallaght", "Heuston"),)):
         """
         Apply graph algorithms including graph projection and shortest path analysis.
+        The projection is reused across runs and only rebuilt after an import changed LUAS data.
         """
         print("\nProjecting the graph for analysis:")
         try:
-            graph_projection_query = """
-            CALL gds.graph.project(
-                'luasGraph',
-                'Station',
-                {
-                    CONNECTED_TO: {
-                        type: 'CONNECTED_TO',
-                        properties: 'travel_time'
-                    }
-                }
-            );
-            """
-            self.graph.run(graph_projection_query)
-            print("Graph projected successfully.")
+            self.projections.ensure("luasGraph")
+            print("Graph projection ready.")
         except Exception as e:
             print(f"Error during graph projection: {e}")
+            return
 
-        print("\nFinding shortest path between two stations:")
+        print("\nFinding shortest paths between stations:")
         try:
-            shortest_path_query = """
-            MATCH (start:Station {name: $startStation}), (end:Station {name: $endStation})
-            CALL gds.shortestPath.dijkstra.stream('luasGraph', {
-                sourceNode: id(start),
-                targetNode: id(end)
-            })
-            YIELD totalCost, nodeIds
-            RETURN totalCost, [nodeId IN nodeIds | gds.util.asNode(nodeId).name] AS path;
-            """
-            shortest_path_params = {
-                "startStation": "Tallaght",  # Replace with actual station name
-                "endStation": "Heuston"  # Replace with actual station name
-            }
-            shortest_path_result = self.graph.run(shortest_path_query, shortest_path_params).data()
+            shortest_path_result = self.shortest_paths(list(pairs))
             print("Shortest Path Results:", shortest_path_result)
         except Exception as e:
             print(f"Error during shortest path calculation: {e}")
 
+
+class AsyncNeo4jEDA:
+    def __init__(self, uri, username, password, **config):
+        """
+        Asyncio counterpart of the Neo4jEDA query methods, for callers inside an event loop.
+        `config` goes to AsyncConnectionManager.get, e.g. max_concurrency to cap queries in flight.
+        Results are not cached; Neo4jEDA stays the synchronous API with caching and plotting.
+        """
+        self.connection = AsyncConnectionManager.get(uri, username, password, **config)
+
+    async def close(self):
+        """
+        Release the shared async connection.
+        """
+        if self.connection:
+            await self.connection.release()
+            self.connection = None
+
+    async def _data(self, query, parameters=None):
+        return [record.data() for record in await self.connection.run(query, parameters)]
+
+    async def _evaluate(self, query, parameters=None):
+        records = await self.connection.run(query, parameters)
+        return records[0][0] if records else None
+
+    async def test_connection(self):
+        """
+        Test the connection to the Neo4j instance.
+        """
+        try:
+            return await self._data("RETURN 'Connection Successful' AS message")
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def count_nodes_and_relationships(self):
+        """
+        Count nodes and relationships, both queries in flight at once.
+        """
+        nodes, relationships = await self.connection.gather(
+            self._evaluate(QUERIES["eda.count_nodes"]),
+            self._evaluate(QUERIES["eda.count_relationships"]),
+        )
+        return {"nodes": nodes, "relationships": relationships}
+
+    async def get_node_labels(self):
+        return [label["label"] for label in await self._data(QUERIES["eda.labels"])]
+
+    async def get_relationship_types(self):
+        return [rel_type["relationshipType"] for rel_type in await self._data(QUERIES["eda.relationship_types"])]
+
+    async def most_connected_nodes(self, limit=10):
+        if limit is None:
+            return await self._data(QUERIES["eda.most_connected.all"])
+        return await self._data(QUERIES["eda.most_connected"], {"limit": limit})
+
+    async def degree_distribution(self, limit=20):
+        if limit is None:
+            return await self._data(QUERIES["eda.degree_distribution.all"])
+        return await self._data(QUERIES["eda.degree_distribution"], {"limit": limit})
+
+    async def degree_histogram(self, base=2):
+        """
+        See Neo4jEDA.degree_histogram.
+        """
+        if base <= 1:
+            raise ValueError("base must be greater than 1")
+        query, rel_types = degree_histogram_query(await self.get_relationship_types())
+        return degree_histogram(await self._data(query, {"base": float(base), "rel_types": rel_types}), base)
+
+    async def sample_subgraph(self, label=None, limit=10):
+        query = QUERIES.format("eda.sample.label", label=label) if label else QUERIES["eda.sample"]
+        return await self._data(query, {"limit": limit})
+
+    async def iter_node_degrees(self, label=None, page_size=1000):
+        """
+        See Neo4jEDA.iter_node_degrees.
+        """
+        if label in MODE_KEYS:
+            query = QUERIES.format("eda.node_degrees.keyset", label=label, key=MODE_KEYS[label])
+            records = self.connection.paginate(query, key="key", page_size=page_size, after="")
+        else:
+            query = QUERIES.format("eda.node_degrees.label", label=label) if label else QUERIES["eda.node_degrees"]
+            records = self.connection.stream(query, fetch_size=page_size)
+        async for record in records:
+            yield record.data()
+
+    async def overview(self, limit=20, base=2):
+        """
+        Counts, labels, relationship types, top degrees and the degree histogram, fetched concurrently.
+        """
+        counts, labels, rel_types, degrees, histogram = await self.connection.gather(
+            self.count_nodes_and_relationships(),
+            self.get_node_labels(),
+            self.get_relationship_types(),
+            self.degree_distribution(limit),
+            self.degree_histogram(base),
+        )
+        return {"counts": counts, "labels": labels, "relationship_types": rel_types,
+                "degree_distribution": degrees, "degree_histogram": histogram}
+
 # Example Usage
 if __name__ == "__main__":
     eda = Neo4jEDA("bolt://localhost:7687", "neo4j", "9820065151")
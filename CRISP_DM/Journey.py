@@ -0,0 +1,244 @@
+import heapq
+import math
+from collections import defaultdict
+
+from pages.Geo import haversine_km
+from pages.Luas import DEFAULT_TRAVEL_TIME
+
+# Cost model, in minutes
+TRANSFER_PENALTY = 5.0
+DART_RIDE_MINUTES = 15.0
+BUS_WAIT_MINUTES = 10.0
+BUS_RIDE_MINUTES = 30.0
+# Upper bound on travel speed, so the straight-line heuristic never overestimates
+MAX_SPEED_KMH = 100.0
+
+MODES = {"LuasStation": "LUAS", "DartStation": "DART", "BusRoute": "BUS"}
+OBJECTIVES = ("fastest", "fewest_transfers")
+
+
+def _number(value, default):
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value == "":
+        return default
+    return float(value)
+
+
+def _key(name):
+    return (name or "").strip().lower()
+
+
+class JourneyPlanner:
+    def __init__(self, nodes, edges):
+        """
+        Multi-modal journey graph. `nodes` are dicts with mode, name, line, latitude and longitude;
+        `edges` are (source, target, minutes, transfers) tuples between node positions.
+        """
+        self.nodes = nodes
+        self.forward = [[] for _ in nodes]
+        self.backward = [[] for _ in nodes]
+        for source, target, minutes, transfers in edges:
+            self.forward[source].append((target, minutes, transfers))
+            self.backward[target].append((source, minutes, transfers))
+        self.by_name = defaultdict(list)
+        for i, node in enumerate(nodes):
+            self.by_name[_key(node["name"])].append(i)
+        self.landmarks = []
+        self._from_landmark = []
+        self._to_landmark = []
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        Build the journey graph from a GraphSnapshot (see CRISP_DM/Snapshot.py).
+        LUAS edges keep their travel_time; a DART hop costs DART_RIDE_MINUTES; boarding a bus route
+        costs half its headway plus its duration. Modes are joined where names match: LUAS and DART
+        stations of the same name, and stations named as a bus route's From or To.
+        """
+        properties = snapshot.properties
+
+        def column(name, i):
+            values = properties.get(name)
+            if values is None:
+                return None
+            value = values[i].item() if hasattr(values[i], "item") else values[i]
+            return None if value == "" or (isinstance(value, float) and math.isnan(value)) else value
+
+        nodes, position = [], {}
+        for i in range(snapshot.node_count):
+            mode = MODES.get(snapshot.label_names[snapshot.labels[i]])
+            if mode is None:
+                continue
+            node = {
+                "mode": mode,
+                "name": column("Route Number", i) if mode == "BUS" else column("name", i),
+                "line": column("Line", i),
+                "latitude": column("Latitude", i),
+                "longitude": column("Longitude", i),
+            }
+            if mode == "BUS":
+                node["from"] = column("From", i)
+                node["to"] = column("To", i)
+                node["boarding"] = (_number(column("Frequency", i), BUS_WAIT_MINUTES * 2) / 2
+                                    + _number(column("Duration", i), BUS_RIDE_MINUTES))
+            position[i] = len(nodes)
+            nodes.append(node)
+
+        edges = []
+        for source in range(snapshot.node_count):
+            if source not in position:
+                continue
+            a = position[source]
+            for slot in range(snapshot.indptr[source], snapshot.indptr[source + 1]):
+                target = int(snapshot.indices[slot])
+                if target not in position:
+                    continue
+                b = position[target]
+                rel_type = snapshot.rel_type_names[snapshot.rel_types[slot]]
+                edges.append(cls._edge(nodes, a, b, rel_type, snapshot.weights[slot]))
+        edges.extend(cls._transfer_edges(nodes))
+        return cls(nodes, edges)
+
+    @staticmethod
+    def _edge(nodes, a, b, rel_type, weight):
+        mode = nodes[a]["mode"]
+        if mode == "LUAS":
+            return a, b, _number(weight, DEFAULT_TRAVEL_TIME), 1 if rel_type == "INTERCHANGE" else 0
+        if mode == "DART":
+            return a, b, DART_RIDE_MINUTES, 0
+        return a, b, TRANSFER_PENALTY + nodes[b]["boarding"], 1
+
+    @staticmethod
+    def _transfer_edges(nodes):
+        stations = defaultdict(list)
+        for i, node in enumerate(nodes):
+            if node["mode"] != "BUS":
+                stations[_key(node["name"])].append(i)
+        edges = []
+        for members in stations.values():
+            for a in members:
+                for b in members:
+                    if a != b and nodes[a]["mode"] != nodes[b]["mode"]:
+                        edges.append((a, b, TRANSFER_PENALTY, 1))
+        for i, node in enumerate(nodes):
+            if node["mode"] != "BUS":
+                continue
+            for end in {_key(node["from"]), _key(node["to"])}:
+                for station in stations.get(end, []):
+                    edges.append((station, i, TRANSFER_PENALTY + node["boarding"], 1))
+                    edges.append((i, station, 0.0, 0))
+        return edges
+
+    def _dijkstra(self, source, adjacency):
+        distances = [math.inf] * len(self.nodes)
+        distances[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > distances[node]:
+                continue
+            for neighbour, minutes, _ in adjacency[node]:
+                candidate = distance + minutes
+                if candidate < distances[neighbour]:
+                    distances[neighbour] = candidate
+                    heapq.heappush(heap, (candidate, neighbour))
+        return distances
+
+    def prepare(self, landmarks=8):
+        """
+        Precompute ALT landmark distances. Landmarks are picked by farthest-point selection so
+        they sit on the edges of the network, where their lower bounds are tightest.
+        """
+        self.landmarks, self._from_landmark, self._to_landmark = [], [], []
+        if not self.nodes:
+            return self
+        nearest = [math.inf] * len(self.nodes)
+        candidate = max(range(len(self.nodes)), key=lambda i: len(self.forward[i]))
+        for _ in range(min(landmarks, len(self.nodes))):
+            self.landmarks.append(candidate)
+            from_landmark = self._dijkstra(candidate, self.forward)
+            self._from_landmark.append(from_landmark)
+            self._to_landmark.append(self._dijkstra(candidate, self.backward))
+            nearest = [min(a, b) for a, b in zip(nearest, from_landmark)]
+            reachable = [i for i, distance in enumerate(nearest) if distance < math.inf]
+            remaining = [i for i in reachable if i not in self.landmarks]
+            if not remaining:
+                break
+            candidate = max(remaining, key=lambda i: nearest[i])
+        return self
+
+    def _lower_bound(self, node, target):
+        """
+        Admissible estimate of the minutes from `node` to `target`: the larger of the
+        straight-line bound and the ALT triangle-inequality bound.
+        """
+        bound = 0.0
+        a, b = self.nodes[node], self.nodes[target]
+        if None not in (a["latitude"], a["longitude"], b["latitude"], b["longitude"]):
+            bound = haversine_km(a["latitude"], a["longitude"], b["latitude"], b["longitude"]) / MAX_SPEED_KMH * 60
+        for from_landmark, to_landmark in zip(self._from_landmark, self._to_landmark):
+            forward = from_landmark[target] - from_landmark[node]
+            backward = to_landmark[node] - to_landmark[target]
+            for estimate in (forward, backward):
+                if estimate > bound and estimate < math.inf:
+                    bound = estimate
+        return bound
+
+    def resolve(self, name, mode=None):
+        """Node positions for a station name or bus route number, optionally for one mode"""
+        return [i for i in self.by_name.get(_key(name), []) if mode is None or self.nodes[i]["mode"] == mode]
+
+    def route(self, source, target, objective="fastest", source_mode=None, target_mode=None):
+        """
+        Plan a journey between two stations (or bus route numbers) by name.
+        "fastest" minimises minutes; "fewest_transfers" minimises transfers, then minutes.
+        Returns {"minutes", "transfers", "legs"} or None when no journey exists.
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown journey objective: {objective!r}")
+        sources = self.resolve(source, source_mode)
+        targets = set(self.resolve(target, target_mode))
+        if not sources:
+            raise ValueError(f"Unknown origin: {source!r}")
+        if not targets:
+            raise ValueError(f"Unknown destination: {target!r}")
+
+        def estimate(node):
+            return min(self._lower_bound(node, goal) for goal in targets)
+
+        def cost(transfers, minutes):
+            return (transfers, minutes) if objective == "fewest_transfers" else (0, minutes)
+
+        best = {}
+        previous = {}
+        heap = []
+        for node in sources:
+            best[node] = (0, 0.0)
+            heapq.heappush(heap, (cost(0, estimate(node)), 0, 0.0, node))
+        while heap:
+            _, transfers, minutes, node = heapq.heappop(heap)
+            if cost(transfers, minutes) > cost(*best[node]):
+                continue
+            if node in targets:
+                return self._journey(node, previous, transfers, minutes)
+            for neighbour, edge_minutes, edge_transfers in self.forward[node]:
+                candidate = (transfers + edge_transfers, minutes + edge_minutes)
+                if neighbour not in best or cost(*candidate) < cost(*best[neighbour]):
+                    best[neighbour] = candidate
+                    previous[neighbour] = node
+                    ranked = cost(candidate[0], candidate[1] + estimate(neighbour))
+                    heapq.heappush(heap, (ranked, candidate[0], candidate[1], neighbour))
+        return None
+
+    def _journey(self, node, previous, transfers, minutes):
+        path = [node]
+        while path[-1] in previous:
+            path.append(previous[path[-1]])
+        path.reverse()
+        legs = []
+        for i in path:
+            stop = self.nodes[i]
+            if legs and legs[-1]["mode"] == stop["mode"] and legs[-1]["line"] == stop["line"]:
+                legs[-1]["stops"].append(stop["name"])
+            else:
+                legs.append({"mode": stop["mode"], "line": stop["line"], "stops": [stop["name"]]})
+        return {"minutes": round(minutes, 1), "transfers": transfers, "legs": legs}
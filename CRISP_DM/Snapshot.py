@@ -0,0 +1,291 @@
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from pages.Generation import current_generations
+from pages.Queries import data_nodes, register
+
+# Most specific label first: a node is filed under the first of these it carries
+LABEL_PRIORITY = ["DartStation", "LuasStation", "BusRoute", "Station", "Route", "Category", "Country"]
+
+# Node properties copied into columns, when present
+DEFAULT_PROPERTIES = [
+    "name", "Station_ID", "Line", "Zone", "Daily_Footfall", "Latitude", "Longitude",
+    "Route Number", "From", "To", "Frequency", "Duration",
+]
+
+# Bookkeeping nodes (see pages/Queries.py) are not part of the transit graph
+NODES_QUERY = """
+        MATCH (n)
+        WHERE {data_nodes}
+        RETURN elementId(n) AS id, labels(n) AS labels, n {{{properties}}} AS properties
+        """
+
+RELATIONSHIPS_QUERY = register("snapshot.relationships", """
+        MATCH (a)-[r]->(b)
+        RETURN elementId(a) AS source, elementId(b) AS target, type(r) AS type, r.travel_time AS weight
+        """, {})
+
+META_FILE = "meta.json"
+
+
+def primary_label(labels):
+    for label in LABEL_PRIORITY:
+        if label in labels:
+            return label
+    return labels[0] if labels else ""
+
+
+def _column(values):
+    """
+    Typed column for one property: float64 (NaN for missing) when every value is numeric,
+    otherwise a fixed-width unicode array ("" for missing).
+    """
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, (int, float, bool)) for value in present):
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+    return np.array(["" if value is None else str(value) for value in values], dtype=np.str_)
+
+
+class GraphSnapshot:
+    def __init__(self, ids, labels, label_names, indptr, indices, rel_types, rel_type_names, weights,
+                 properties=None, generations=None):
+        """
+        Directed graph in CSR form. Row i of (indptr, indices) lists the targets of node i;
+        `rel_types` and `weights` are aligned with `indices`. `labels` holds an index into
+        `label_names` per node and `properties` maps a property name to a column per node.
+        """
+        self.ids = ids
+        self.labels = labels
+        self.label_names = list(label_names)
+        self.indptr = indptr
+        self.indices = indices
+        self.rel_types = rel_types
+        self.rel_type_names = list(rel_type_names)
+        self.weights = weights
+        self.properties = properties or {}
+        self.generations = generations or {}
+        self._index = None
+
+    @property
+    def node_count(self):
+        return len(self.ids)
+
+    @property
+    def relationship_count(self):
+        return len(self.indices)
+
+    @classmethod
+    def from_connection(cls, connection, properties=None, fetch_size=10000):
+        """
+        Pull every node and relationship in two streamed queries and build the CSR arrays.
+        """
+        properties = properties or DEFAULT_PROPERTIES
+        projection = ", ".join(f".`{name}`" for name in properties)
+
+        ids, label_codes = [], []
+        label_names, label_lookup = [], {}
+        columns = {name: [] for name in properties}
+        nodes_query = NODES_QUERY.format(properties=projection, data_nodes=data_nodes("n"))
+        for record in connection.stream(nodes_query, fetch_size=fetch_size):
+            ids.append(record["id"])
+            label = primary_label(record["labels"])
+            if label not in label_lookup:
+                label_lookup[label] = len(label_names)
+                label_names.append(label)
+            label_codes.append(label_lookup[label])
+            values = record["properties"]
+            for name in properties:
+                columns[name].append(values.get(name))
+        position = {node_id: i for i, node_id in enumerate(ids)}
+
+        sources, targets, type_codes, weights = [], [], [], []
+        type_names, type_lookup = [], {}
+        for record in connection.stream(RELATIONSHIPS_QUERY, fetch_size=fetch_size):
+            if record["source"] not in position or record["target"] not in position:
+                continue  # endpoint created after the node pass
+            rel_type = record["type"]
+            if rel_type not in type_lookup:
+                type_lookup[rel_type] = len(type_names)
+                type_names.append(rel_type)
+            sources.append(position[record["source"]])
+            targets.append(position[record["target"]])
+            type_codes.append(type_lookup[rel_type])
+            weights.append(np.nan if record["weight"] is None else record["weight"])
+
+        sources = np.asarray(sources, dtype=np.int64)
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(ids)), out=indptr[1:])
+        return cls(
+            ids=np.array(ids, dtype=np.str_),
+            labels=np.asarray(label_codes, dtype=np.int32),
+            label_names=label_names,
+            indptr=indptr,
+            indices=np.asarray(targets, dtype=np.int64)[order],
+            rel_types=np.asarray(type_codes, dtype=np.int32)[order],
+            rel_type_names=type_names,
+            weights=np.asarray(weights, dtype=np.float64)[order],
+            properties={name: _column(values) for name, values in columns.items() if any(v is not None for v in values)},
+            generations=current_generations(connection),
+        )
+
+    def save(self, path):
+        """
+        Write one .npy file per array plus meta.json into directory `path`.
+        """
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "ids": self.ids,
+            "labels": self.labels,
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "rel_types": self.rel_types,
+            "weights": self.weights,
+        }
+        for i, column in enumerate(self.properties.values()):
+            arrays[f"property_{i}"] = column
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+        meta = {
+            "label_names": self.label_names,
+            "rel_type_names": self.rel_type_names,
+            "properties": list(self.properties),
+            "generations": self.generations,
+        }
+        with open(os.path.join(path, META_FILE), mode="w", encoding="utf-8") as file:
+            json.dump(meta, file, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Open a saved snapshot. With `mmap` the arrays are memory-mapped rather than read into memory.
+        """
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as file:
+            meta = json.load(file)
+        mode = "r" if mmap else None
+
+        def array(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+
+        return cls(
+            ids=array("ids"),
+            labels=array("labels"),
+            label_names=meta["label_names"],
+            indptr=array("indptr"),
+            indices=array("indices"),
+            rel_types=array("rel_types"),
+            rel_type_names=meta["rel_type_names"],
+            weights=array("weights"),
+            properties={name: array(f"property_{i}") for i, name in enumerate(meta["properties"])},
+            generations=meta.get("generations"),
+        )
+
+    def node(self, node_id):
+        """Position of an element id in the snapshot arrays"""
+        if self._index is None:
+            self._index = {node_id: i for i, node_id in enumerate(self.ids.tolist())}
+        return self._index[node_id]
+
+    def adjacency(self, rel_types=None):
+        """
+        Sparse adjacency matrix, optionally restricted to some relationship types.
+        """
+        data = np.ones(len(self.indices), dtype=np.float64)
+        if rel_types is not None:
+            codes = [self.rel_type_names.index(name) for name in rel_types if name in self.rel_type_names]
+            data = np.isin(self.rel_types, codes).astype(np.float64)
+        matrix = sparse.csr_matrix((data, self.indices, self.indptr), shape=(self.node_count, self.node_count))
+        matrix.eliminate_zeros()
+        return matrix
+
+    def degrees(self):
+        """
+        Out-, in- and total degree per node.
+        """
+        out_degree = np.diff(self.indptr)
+        in_degree = np.bincount(self.indices, minlength=self.node_count)
+        return out_degree, in_degree, out_degree + in_degree
+
+    def degree_statistics(self):
+        """
+        Per-label node count and mean, median, p95 and max total degree.
+        """
+        _, _, total = self.degrees()
+        statistics = {}
+        for code, label in enumerate(self.label_names):
+            values = total[self.labels == code]
+            if not len(values):
+                continue
+            statistics[label] = {
+                "nodes": int(len(values)),
+                "mean": float(values.mean()),
+                "median": float(np.median(values)),
+                "p95": float(np.percentile(values, 95)),
+                "max": int(values.max()),
+            }
+        return statistics
+
+    def most_connected(self, limit=10, by="out"):
+        """
+        The `limit` nodes with the highest degree ("out", "in" or "total"), highest first.
+        """
+        out_degree, in_degree, total = self.degrees()
+        values = {"out": out_degree, "in": in_degree, "total": total}[by]
+        limit = min(limit, self.node_count)
+        top = np.argpartition(-values, limit - 1)[:limit] if limit else np.array([], dtype=np.int64)
+        top = top[np.argsort(-values[top], kind="stable")]
+        names = self.properties.get("name")
+        return [
+            {
+                "id": str(self.ids[i]),
+                "label": self.label_names[self.labels[i]],
+                "name": None if names is None else str(names[i]),
+                "degree": int(values[i]),
+            }
+            for i in top
+        ]
+
+    def pagerank(self, damping=0.85, tolerance=1e-9, max_iterations=100, rel_types=None):
+        """
+        PageRank by power iteration over the sparse adjacency. Dangling nodes spread their
+        rank uniformly.
+        """
+        n = self.node_count
+        if n == 0:
+            return np.zeros(0)
+        matrix = self.adjacency(rel_types)
+        out_degree = np.asarray(matrix.sum(axis=1)).ravel()
+        dangling = out_degree == 0
+        inverse = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+        transition = sparse.diags(inverse) @ matrix
+        transition_t = transition.T.tocsr()
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iterations):
+            previous = rank
+            rank = damping * (transition_t @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+            if np.abs(rank - previous).sum() < tolerance:
+                break
+        return rank
+
+    def components(self, rel_types=None):
+        """
+        Weakly connected components: (component count, component index per node).
+        """
+        return connected_components(self.adjacency(rel_types), directed=True, connection="weak")
+
+    def betweenness(self, samples=None, seed=42, rel_types=None):
+        """
+        Betweenness centrality per node. `samples` limits the number of source nodes (Brandes
+        sampling) to bound the cost on large graphs.
+        """
+        import networkx as nx
+
+        graph = nx.from_scipy_sparse_array(self.adjacency(rel_types), create_using=nx.DiGraph)
+        k = None if samples is None or samples >= self.node_count else samples
+        scores = nx.betweenness_centrality(graph, k=k, seed=seed, weight=None)
+        return np.array([scores[i] for i in range(self.node_count)])
@@ -0,0 +1,269 @@
+"""
+Command line entry point for the Dublin transit graph.
+
+    python Cli.py ingest [--dataset dart luas bus] [--incremental] [--processes 4 [--writers 2]]
+    python Cli.py link [--dataset dart luas bus] [--partition-size 1000 [--workers 4]]
+    python Cli.py eda [--snapshot DIR] [--plot [FILE.png|FILE.svg]] [--paths]
+    python Cli.py route ORIGIN DESTINATION [--objective fewest_transfers] [--offline]
+    python Cli.py bench [--rows 1000 10000] [--backend neo4j] ...
+
+Connection details and data paths come from the environment (NEO4J_URI, NEO4J_USER,
+NEO4J_PASSWORD, TRANSIT_DATA_DIR, ...) or an INI file; see pages/Config.py.
+Each subcommand imports only the modules it needs, so ingesting never loads the
+plotting or analytics stack.
+"""
+import argparse
+import sys
+import time
+
+_STARTED = time.perf_counter()
+
+# Milliseconds from interpreter start-up of this module to a subcommand being ready to run
+COLD_START_BUDGET_MS = 500
+
+DATASETS = ("dart", "luas", "bus")
+
+
+def _connection_args(config):
+    return config["uri"], config["user"], config["password"]
+
+
+def _require_password(config):
+    if config["password"] is None:
+        sys.exit("No Neo4j password configured: set NEO4J_PASSWORD or [neo4j] password in the config file.")
+
+
+def ingest(args, config):
+    from pages.Bus import BusExecution
+    from pages.Connection import ConnectionManager
+    from pages.Dart import DartExecution
+    from pages.Luas import LuasExecution
+    from pages.Master import MasterNode
+    from pages.Pipeline import Pipeline
+    from pages.Queries import warm_plans
+
+    _ready(args)
+    _require_password(config)
+    connection = _connection_args(config)
+    options = {"incremental": args.incremental, "batch_size": config["batch_size"],
+               "processes": args.processes, "writers": args.writers}
+    master = MasterNode(*connection, pool_size=config["pool_size"])
+    pipeline = Pipeline(max_workers=len(args.dataset))
+    pipeline.add_stage("schema", master.create_constraints_and_indexes)
+    pipeline.add_stage("master", master.create_master_parent_child_node, depends_on=["schema"])
+    pipeline.add_stage("warm_plans", lambda: warm_plans(master.connection), depends_on=["schema"])
+    loaders = {}
+    if "dart" in args.dataset:
+        loaders["dart"] = DartExecution(*connection)
+        dart_hook = {"on_commit": loaders["dart"].link_stations} if args.incremental else {}
+        pipeline.add_stage("dart_import",
+                           lambda: loaders["dart"].import_station_data(config["dart_csv"], **options, **dart_hook),
+                           depends_on=["master", "warm_plans"])
+    if "luas" in args.dataset:
+        loaders["luas"] = LuasExecution(*connection)
+        pipeline.add_stage("luas_import", lambda: loaders["luas"].import_luas_data(config["luas_csv"], **options),
+                           depends_on=["master", "warm_plans"])
+        if args.incremental:
+            # LUAS links whole lines, so the lines the import touched are relinked once it has finished
+            pipeline.add_stage("luas_link",
+                               lambda: loaders["luas"].create_luas_station_relationships(
+                                   node_ids=loaders["luas"].last_written_ids, lines=loaders["luas"].removed_lines),
+                               depends_on=["luas_import"])
+            pipeline.add_stage("luas_interchange",
+                               lambda: loaders["luas"].create_interchange_relationships(
+                                   node_ids=loaders["luas"].last_written_ids, lines=loaders["luas"].removed_lines),
+                               depends_on=["luas_link"])
+    if "bus" in args.dataset:
+        loaders["bus"] = BusExecution(*connection)
+        bus_hook = {"on_commit": loaders["bus"].link_routes} if args.incremental else {}
+        pipeline.add_stage("bus_import",
+                           lambda: loaders["bus"].import_bus_data(config["bus_csv"], **options, **bus_hook),
+                           depends_on=["master", "warm_plans"])
+    try:
+        pipeline.run()
+        pipeline.summary()
+    finally:
+        ConnectionManager.close_all()
+
+
+def link(args, config):
+    from pages.Bus import BusExecution
+    from pages.Connection import ConnectionManager
+    from pages.Dart import DartExecution
+    from pages.Luas import LuasExecution
+    from pages.Partition import Partitioning
+    from pages.Pipeline import Pipeline
+
+    _ready(args)
+    _require_password(config)
+    connection = _connection_args(config)
+    options = {}
+    if args.partition_size:
+        options["partitioning"] = Partitioning(args.partition_size, checkpoint_path=args.checkpoint,
+                                               max_workers=args.workers, resume=not args.restart)
+    pipeline = Pipeline(max_workers=len(args.dataset))
+    if "dart" in args.dataset:
+        dart = DartExecution(*connection, pool_size=config["pool_size"])
+        pipeline.add_stage("dart_link", lambda: dart.create_station_relationships(**options))
+    if "luas" in args.dataset:
+        luas = LuasExecution(*connection, pool_size=config["pool_size"])
+        pipeline.add_stage("luas_link", lambda: luas.create_luas_station_relationships(**options))
+        pipeline.add_stage("luas_interchange", lambda: luas.create_interchange_relationships(**options),
+                           depends_on=["luas_link"])
+    if "bus" in args.dataset:
+        bus = BusExecution(*connection, pool_size=config["pool_size"])
+        pipeline.add_stage("bus_landmarks", lambda: bus.create_route_relationships(**options))
+        pipeline.add_stage("bus_connections", lambda: bus.create_route_connections(**options))
+    try:
+        pipeline.run()
+        pipeline.summary()
+    finally:
+        ConnectionManager.close_all()
+
+
+def eda(args, config):
+    from CRISP_DM.EDA import Neo4jEDA
+    from pages.Connection import ConnectionManager
+
+    _ready(args)
+    _require_password(config)
+    ieda = Neo4jEDA(*_connection_args(config), cache={} if args.cache else None, pool_size=config["pool_size"])
+    try:
+        print(ieda.count_nodes_and_relationships())
+        print("\nNode Labels:", ieda.get_node_labels())
+        print("\nRelationship Types:", ieda.get_relationship_types())
+        degree_data = ieda.degree_distribution(limit=args.limit)
+        print("\nDegree Distribution:", degree_data)
+        histogram = ieda.degree_histogram(base=args.base)
+        print("\nDegree Histogram bins:", histogram["bins"])
+        for label, by_type in sorted(histogram["histograms"].items()):
+            print(f"  {label}: {by_type['*']}")
+        if args.snapshot:
+            snapshot = ieda.snapshot(args.snapshot)
+            print("\nSnapshot degree statistics:", snapshot.degree_statistics())
+        if args.plot:
+            ieda.plot_degree_histogram(histogram, path=args.plot, rel_types=args.rel_types)
+        if args.paths:
+            ieda.apply_graph_algorithms()
+    finally:
+        ConnectionManager.close_all()
+
+
+def route(args, config):
+    from CRISP_DM.Journey import JourneyPlanner
+
+    if args.offline:
+        from CRISP_DM.Snapshot import GraphSnapshot
+
+        _ready(args)
+        snapshot = GraphSnapshot.load(args.snapshot)
+        planner = JourneyPlanner.from_snapshot(snapshot).prepare(args.landmarks)
+    else:
+        from CRISP_DM.EDA import Neo4jEDA
+        from pages.Connection import ConnectionManager
+
+        _ready(args)
+        _require_password(config)
+        try:
+            planner = Neo4jEDA(*_connection_args(config)).journey_planner(args.snapshot, args.landmarks)
+        finally:
+            ConnectionManager.close_all()
+
+    start = time.perf_counter()
+    journey = planner.route(args.origin, args.destination, objective=args.objective)
+    elapsed = (time.perf_counter() - start) * 1000
+    if journey is None:
+        print(f"No journey from {args.origin} to {args.destination}.")
+        return
+    print(f"{journey['minutes']} min, {journey['transfers']} transfers ({elapsed:.2f} ms to plan)")
+    for leg in journey["legs"]:
+        line = f" {leg['line']}" if leg["line"] else ""
+        print(f"  {leg['mode']}{line}: {' -> '.join(str(stop) for stop in leg['stops'])}")
+
+
+def bench(args, config):
+    from benchmark.Benchmark import main as benchmark_main
+
+    _ready(args)
+    benchmark_main(args.options)
+
+
+def _ready(args):
+    """
+    Called once a subcommand has imported what it needs: report cold-start time against the budget.
+    """
+    elapsed = (time.perf_counter() - _STARTED) * 1000
+    if args.timings:
+        print(f"Cold start: {elapsed:.0f} ms (budget {args.budget_ms} ms)")
+    if args.enforce_budget and elapsed > args.budget_ms:
+        sys.exit(f"Cold start of {elapsed:.0f} ms exceeded the {args.budget_ms} ms budget")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="Cli.py", description="Dublin transit graph tools")
+    parser.add_argument("--config", help="INI file with [neo4j] and [data] settings")
+    parser.add_argument("--uri", help="overrides NEO4J_URI")
+    parser.add_argument("--user", help="overrides NEO4J_USER")
+    parser.add_argument("--timings", action="store_true", help="print cold-start time")
+    parser.add_argument("--budget-ms", type=int, default=COLD_START_BUDGET_MS)
+    parser.add_argument("--enforce-budget", action="store_true", help="fail when cold start exceeds the budget")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("ingest", help="import the CSV datasets")
+    command.add_argument("--dataset", nargs="+", choices=DATASETS, default=list(DATASETS))
+    command.add_argument("--incremental", action="store_true",
+                         help="only write added or changed rows, linking DART and BUS rows as they commit "
+                              "and relinking the LUAS lines they touch")
+    command.add_argument("--processes", type=int, default=0, help="worker processes parsing each CSV (0: parse inline)")
+    command.add_argument("--writers", type=int, default=2, help="writer threads per dataset with --processes")
+    command.set_defaults(handler=ingest)
+
+    command = commands.add_parser("link", help="build the relationships between imported nodes")
+    command.add_argument("--dataset", nargs="+", choices=DATASETS, default=list(DATASETS))
+    command.add_argument("--partition-size", type=int, help="source nodes per checkpointed transaction")
+    command.add_argument("--checkpoint", help="JSON checkpoint file (default: checkpoints in the graph)")
+    command.add_argument("--workers", type=int, default=1, help="partitions built in parallel")
+    command.add_argument("--restart", action="store_true", help="ignore checkpoints of an interrupted build")
+    command.set_defaults(handler=link)
+
+    command = commands.add_parser("eda", help="print graph statistics")
+    command.add_argument("--limit", type=int, default=20)
+    command.add_argument("--snapshot", help="directory of the CSR snapshot to use for local analytics")
+    command.add_argument("--base", type=float, default=2, help="log base of the degree histogram bins")
+    command.add_argument("--plot", nargs="?", const="degree_histogram.png",
+                         help="save the degree histogram to a PNG or SVG file")
+    command.add_argument("--rel-types", action="store_true", help="plot one series per relationship type too")
+    command.add_argument("--paths", action="store_true", help="run the GDS shortest-path analysis")
+    command.add_argument("--cache", action="store_true", help="cache query results in memory")
+    command.set_defaults(handler=eda)
+
+    command = commands.add_parser("route", help="plan a journey across DART, LUAS and BUS")
+    command.add_argument("origin")
+    command.add_argument("destination")
+    command.add_argument("--objective", choices=["fastest", "fewest_transfers"], default="fastest")
+    command.add_argument("--snapshot", default="snapshot", help="snapshot directory")
+    command.add_argument("--offline", action="store_true", help="use the saved snapshot without connecting")
+    command.add_argument("--landmarks", type=int, default=8)
+    command.set_defaults(handler=route)
+
+    # Everything after "bench" is handed to benchmark/Benchmark.py's own parser
+    command = commands.add_parser("bench", help="run the benchmark suite", add_help=False)
+    command.set_defaults(handler=bench)
+    return parser
+
+
+def main(argv=None):
+    from pages.Config import load_config
+
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.options = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    config = load_config(args.config, overrides={"uri": args.uri, "user": args.user})
+    args.handler(args, config)
+
+
+if __name__ == "__main__":
+    main()
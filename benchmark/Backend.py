@@ -0,0 +1,177 @@
+import re
+import threading
+from collections import Counter
+
+from pages.Connection import ConnectionManager
+from pages.Export import BUS_PROPERTIES, DART_PROPERTIES, LUAS_PROPERTIES
+from pages.Luas import LUAS_TOPOLOGY_QUERY
+
+# Mode label -> (key parameter, parameter -> property map) of its import query
+MODE_KEYS = {
+    "DartStation": ("StationName", DART_PROPERTIES),
+    "LuasStation": ("Station_ID", LUAS_PROPERTIES),
+    "BusRoute": ("Route_Number", BUS_PROPERTIES),
+}
+MODE_LABEL = r"(DartStation|LuasStation|BusRoute)"
+
+IMPORT = re.compile(r"MERGE \(\w+:" + MODE_LABEL + r" \{")
+HASHES = re.compile(r"MATCH \(\w+:" + MODE_LABEL + r"\)\s+RETURN \w+\.(?:`[^`]+`|\w+) AS key, \w+\.row_hash AS row_hash")
+TOKEN_VALUES = re.compile(r"MATCH \(n:`(\w+)`\)\s+WHERE n\.`([^`]+)` IS NOT NULL\s+RETURN elementId\(n\) AS id")
+CREATE_RELATIONSHIP = re.compile(r"CREATE \(a\)-\[r:`?(\w+)`?\]->\(b\)")
+
+
+class Record(dict):
+    """Dict with the parts of the driver's Record interface the pages/* classes use"""
+
+    def data(self):
+        return dict(self)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self.values())[key]
+        return super().__getitem__(key)
+
+
+class Summary:
+    result_available_after = 0
+    result_consumed_after = 0
+    profile = None
+
+
+class Result:
+    def __init__(self, records):
+        self._records = records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def consume(self):
+        return Summary()
+
+
+class Store:
+    def __init__(self):
+        """Nodes written by the import queries, keyed by mode label and key, plus relationship counts"""
+        self.nodes = {label: {} for label in MODE_KEYS}
+        self.relationships = Counter()
+        self.generations = Counter()
+        self.queries = 0
+        self.lock = threading.Lock()
+
+    def run(self, query, parameters):
+        with self.lock:
+            self.queries += 1
+            return Result(self._dispatch(query.removeprefix("PROFILE "), parameters))
+
+    def _dispatch(self, query, parameters):
+        rows = parameters.get("rows")
+        match = IMPORT.search(query)
+        if rows is not None and match:
+            label = match.group(1)
+            key, properties = MODE_KEYS[label]
+            stored = self.nodes[label]
+            for row in rows:
+                stored[row[key]] = {name: row[param] for param, name in properties.items()}
+            return [Record(id=f"{label}:{row[key]}") for row in rows]
+        match = CREATE_RELATIONSHIP.search(query)
+        if rows is not None and match:
+            self.relationships[match.group(1)] += len(rows)
+            return []
+        match = HASHES.search(query)
+        if match:
+            return [Record(key=key, row_hash=node["row_hash"]) for key, node in self.nodes[match.group(1)].items()]
+        match = TOKEN_VALUES.search(query)
+        if match:
+            label, property_name = match.groups()
+            return [
+                Record(id=f"{label}:{key}", value=node.get(property_name))
+                for key, node in self.nodes.get(label, {}).items()
+                if node.get(property_name) is not None
+            ]
+        if query.strip() == LUAS_TOPOLOGY_QUERY.strip():
+            return [
+                Record(id=f"LuasStation:{key}", name=node["name"], line=node["Line"], station_id=key,
+                       type=node["Type"], interchange=node["Interchange"],
+                       latitude=node["Latitude"], longitude=node["Longitude"])
+                for key, node in self.nodes["LuasStation"].items()
+            ]
+        if "MERGE (g:GraphGeneration" in query:
+            self.generations[parameters["scope"]] += 1
+            return [Record(generation=self.generations[parameters["scope"]])]
+        if "MATCH (g:GraphGeneration)" in query:
+            return [Record(scope=scope, generation=generation) for scope, generation in self.generations.items()]
+        if "RETURN COUNT { MATCH (n) }" in query:
+            return [Record(count=sum(len(nodes) for nodes in self.nodes.values()))]
+        if "RETURN COUNT(r)" in query:
+            return [Record(count=sum(self.relationships.values()))]
+        if query.strip().startswith("CALL db.labels()"):
+            return [Record(label=label) for label, nodes in self.nodes.items() if nodes]
+        if query.strip() == "CALL db.relationshipTypes()":
+            return [Record(relationshipType=rel_type) for rel_type, count in self.relationships.items() if count]
+        return []
+
+
+class Transaction:
+    def __init__(self, store):
+        self.store = store
+
+    def run(self, query, parameters=None, **kwargs):
+        return self.store.run(query, dict(parameters or {}, **kwargs))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class Session:
+    def __init__(self, store):
+        self.store = store
+
+    def run(self, query, parameters=None, **kwargs):
+        return self.store.run(query, dict(parameters or {}, **kwargs))
+
+    def begin_transaction(self):
+        return Transaction(self.store)
+
+    def execute_read(self, work, *args, **kwargs):
+        return work(Transaction(self.store), *args, **kwargs)
+
+    execute_write = execute_read
+
+    def close(self):
+        pass
+
+
+class Driver:
+    def __init__(self, store):
+        self.store = store
+
+    def session(self, **config):
+        return Session(self.store)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class InMemoryBackend(ConnectionManager):
+    """
+    In-process stand-in for a Neo4j server. Import queries keep their rows in memory and the
+    queries the client-side builders read back are answered from them; anything else returns no
+    rows. Benchmarks against it measure the Python side of each stage: parsing, typing, hashing,
+    batching and relationship pairing.
+    """
+
+    def __init__(self, uri="memory://benchmark", user="benchmark", pool_size=8):
+        self.store = Store()
+        super().__init__(uri, user, None, pool_size=pool_size)
+
+    def _create_driver(self, password, acquisition_timeout, max_retry_time):
+        return Driver(self.store)
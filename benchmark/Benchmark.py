@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmark.Backend import InMemoryBackend
+from benchmark.Synthetic import generate
+from pages.Bus import BusExecution
+from pages.Connection import ConnectionManager
+from pages.Dart import DartExecution
+from pages.Luas import LuasExecution
+from pages.Master import MasterNode
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Local run history that each run is compared against; ignored by git
+RESULTS_PATH = os.path.join(PROJECT_ROOT, "benchmark", "results.jsonl")
+
+
+def measure(func, trace_memory=True):
+    """
+    Run `func` and return (result, seconds, peak MB allocated by Python during the call).
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkRunner:
+    def __init__(self, rows, backend="memory", uri=None, user=None, password=None, workdir=None, seed=0,
+                 trace_memory=True, query_repeats=5):
+        """
+        Time import, relationship building and EDA queries on synthetic data of `rows` rows per dataset.
+        `backend` is "memory" (in-process stand-in, see benchmark/Backend.py) or "neo4j" (a real server
+        at `uri`).
+        """
+        self.rows = rows
+        self.backend = backend
+        self.workdir = workdir or tempfile.mkdtemp(prefix="transit-bench-")
+        self.seed = seed
+        self.trace_memory = trace_memory
+        self.query_repeats = query_repeats
+        if backend == "memory":
+            self.uri, self.user, self.password = "memory://benchmark", "benchmark", None
+            ConnectionManager.register(self.uri, self.user, InMemoryBackend(self.uri, self.user))
+        elif backend == "neo4j":
+            self.uri, self.user, self.password = uri, user, password
+        else:
+            raise ValueError(f"Unknown benchmark backend: {backend!r}")
+        self.results = []
+
+    def _record(self, name, seconds, peak_mb=None, rows=None, **extra):
+        entry = {"benchmark": name, "seconds": round(seconds, 4)}
+        if rows is not None:
+            entry["rows"] = rows
+            entry["rows_per_sec"] = round(rows / seconds, 1) if seconds > 0 else None
+        if peak_mb is not None:
+            entry["peak_mb"] = round(peak_mb, 2)
+        entry.update(extra)
+        self.results.append(entry)
+        return entry
+
+    def _stage(self, name, func, rows=None):
+        """
+        Time one stage. `rows` may be a function, called once the stage is done, for stages that only
+        write some of their input.
+        """
+        _, seconds, peak = measure(func, self.trace_memory)
+        return self._record(name, seconds, peak, rows() if callable(rows) else rows)
+
+    def run(self):
+        """
+        Generate the data, run every stage once and return the result entries.
+        """
+        paths, seconds, _ = measure(lambda: generate(self.workdir, self.rows, seed=self.seed), trace_memory=False)
+        dart_csv, luas_csv, bus_csv = paths
+        self._record("generate", seconds, rows=self.rows * 3)
+
+        master = MasterNode(self.uri, self.user, self.password)
+        dart = DartExecution(self.uri, self.user, self.password)
+        luas = LuasExecution(self.uri, self.user, self.password)
+        bus = BusExecution(self.uri, self.user, self.password)
+        try:
+            self._stage("schema", master.create_constraints_and_indexes)
+            self._stage("master", master.create_master_parent_child_node)
+
+            self._stage("dart_import", lambda: dart.import_station_data(dart_csv), rows=self.rows)
+            self._stage("luas_import", lambda: luas.import_luas_data(luas_csv), rows=self.rows)
+            self._stage("bus_import", lambda: bus.import_bus_data(bus_csv), rows=self.rows)
+            self._stage("bus_import_parallel", lambda: bus.import_bus_data(bus_csv, processes=2), rows=self.rows)
+            # An incremental import writes only changed rows, so its throughput is over those
+            self._stage("dart_incremental", lambda: dart.import_station_data(dart_csv, incremental=True),
+                        rows=lambda: len(dart.last_written_ids))
+            self._stage("bus_incremental", lambda: bus.import_bus_data(bus_csv, incremental=True),
+                        rows=lambda: len(bus.last_written_ids))
+
+            self._stage("dart_link", dart.create_station_relationships)
+            self._stage("luas_link", luas.create_luas_station_relationships)
+            self._stage("luas_interchange", luas.create_interchange_relationships)
+            self._stage("bus_landmarks", bus.create_route_relationships)
+            self._stage("bus_connections", bus.create_route_connections)
+
+            self._query_latencies()
+        finally:
+            for loader in (master, dart, luas, bus):
+                loader.close()
+        return self.results
+
+    def _query_latencies(self):
+        """
+        Median and max latency of the EDA queries over `query_repeats` runs. The in-memory backend
+        answers the counts and labels from its store but keeps no adjacency, so the degree queries are
+        only timed against Neo4j.
+        """
+        from CRISP_DM.EDA import Neo4jEDA
+
+        eda = Neo4jEDA(self.uri, self.user, self.password)
+        queries = {
+            "eda_counts": eda.count_nodes_and_relationships,
+            "eda_labels": eda.get_node_labels,
+        }
+        if self.backend == "neo4j":
+            queries.update({
+                "eda_most_connected": lambda: eda.most_connected_nodes(limit=10),
+                "eda_degree_distribution": lambda: eda.degree_distribution(limit=20),
+                "eda_degree_histogram": eda.degree_histogram,
+            })
+        try:
+            for name, query in queries.items():
+                timings = []
+                for _ in range(self.query_repeats):
+                    _, seconds, _ = measure(query, trace_memory=False)
+                    timings.append(seconds)
+                self._record(name, statistics.median(timings), max_ms=round(max(timings) * 1000, 3))
+        finally:
+            eda.close()
+
+    def save(self, path=RESULTS_PATH):
+        """
+        Append this run to `path` (JSON lines) with the commit, backend and scale it was taken at.
+        """
+        run = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": current_commit(),
+            "backend": self.backend,
+            "rows": self.rows,
+            "results": self.results,
+        }
+        with open(path, mode="a", encoding="utf-8") as file:
+            file.write(json.dumps(run) + "\n")
+        return run
+
+
+def previous_run(path, backend, rows, commit=None):
+    """The latest recorded run at the same backend and scale, skipping runs of `commit`"""
+    if not os.path.exists(path):
+        return None
+    latest = None
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            run = json.loads(line)
+            if run["backend"] == backend and run["rows"] == rows and (commit is None or run["commit"] != commit):
+                latest = run
+    return latest
+
+
+def report(results, baseline=None, threshold=0.2):
+    """
+    Print the results next to the baseline run, flagging stages more than `threshold` slower.
+    """
+    before = {entry["benchmark"]: entry for entry in (baseline or {}).get("results", [])}
+    if baseline:
+        print(f"Compared with {baseline['commit']} ({baseline['timestamp']})")
+    print(f"{'Benchmark':<26}{'Seconds':>10}{'Rows/sec':>13}{'Peak MB':>10}{'Change':>9}")
+    for entry in results:
+        change = ""
+        previous = before.get(entry["benchmark"])
+        if previous and previous["seconds"] > 0:
+            delta = entry["seconds"] / previous["seconds"] - 1
+            change = f"{delta:+.0%}" + (" !" if delta > threshold else "")
+        rate = entry.get("rows_per_sec")
+        peak = entry.get("peak_mb")
+        print(
+            f"{entry['benchmark']:<26}{entry['seconds']:>10.4f}{'' if rate is None else f'{rate:,.0f}':>13}"
+            f"{'' if peak is None else f'{peak:.1f}':>10}{change:>9}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DART, LUAS and BUS loaders and EDA queries")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000], help="rows per dataset, one run per value")
+    parser.add_argument("--backend", choices=["memory", "neo4j"], default="memory")
+    parser.add_argument("--uri", default=os.environ.get("NEO4J_URI", "bolt://localhost:7687"))
+    parser.add_argument("--user", default=os.environ.get("NEO4J_USER", "neo4j"))
+    parser.add_argument("--password", default=os.environ.get("NEO4J_PASSWORD"))
+    parser.add_argument("--workdir", help="where the synthetic CSVs are written")
+    parser.add_argument("--results", default=RESULTS_PATH, help="JSON lines file the runs are appended to")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc, which slows Python-heavy stages")
+    args = parser.parse_args(argv)
+
+    for rows in args.rows:
+        print(f"\n=== {rows} rows per dataset, {args.backend} backend ===")
+        runner = BenchmarkRunner(rows, backend=args.backend, uri=args.uri, user=args.user, password=args.password,
+                                 workdir=args.workdir, trace_memory=not args.no_memory)
+        results = runner.run()
+        baseline = previous_run(args.results, args.backend, rows, commit=current_commit())
+        runner.save(args.results)
+        report(results, baseline)
+    ConnectionManager.close_all()
+
+
+if __name__ == "__main__":
+    main()
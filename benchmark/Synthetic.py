@@ -0,0 +1,113 @@
+import csv
+import os
+import random
+
+from pages.Bus import BUS_COLUMNS
+from pages.Dart import DART_COLUMNS
+from pages.Luas import LUAS_COLUMNS
+
+# Rough Dublin bounding box
+LATITUDE = (53.25, 53.42)
+LONGITUDE = (-6.42, -6.10)
+AREAS = ["City Centre", "Tallaght", "Sandyford", "Howth", "Bray", "Blanchardstown", "Swords", "Lucan",
+         "Dun Laoghaire", "Clontarf", "Rathmines", "Phibsborough", "Ballymun", "Finglas", "Dundrum"]
+
+
+def _vocabulary(prefix, rows, group_size):
+    """Token names sized so each token is shared by about `group_size` rows"""
+    return [f"{prefix} {i}" for i in range(max(2, rows // group_size))]
+
+
+def _flag(rng):
+    return rng.choice(["Yes", "No"])
+
+
+def _write(path, columns, rows):
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=list(columns.values()))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    return path
+
+
+def dart_rows(rows, rng, group_size=10, invalid_rate=0.0):
+    routes = _vocabulary("Route", rows, group_size)
+    for i in range(rows):
+        yield {
+            "StationName": f"Station {i}",
+            "Operational": "maybe" if rng.random() < invalid_rate else _flag(rng),
+            "Location": rng.choice(AREAS),
+            "Station Address": f"{rng.randint(1, 200)} Station Road, {rng.choice(AREAS)}",
+            "Eircode": f"D{rng.randint(1, 24):02d} X{rng.randint(100, 999)}",
+            "ATM": _flag(rng),
+            "Weekend Working": _flag(rng),
+            "Wi-Fi & Internet Access": _flag(rng),
+            "Refreshments": _flag(rng),
+            "Phone Charging": _flag(rng),
+            "Ticket Vending Machine": _flag(rng),
+            "Smart Card Enabled": _flag(rng),
+            "Routes Serviced": ", ".join(rng.sample(routes, k=min(len(routes), rng.randint(1, 3)))),
+        }
+
+
+def luas_rows(rows, rng, stops_per_line=30, invalid_rate=0.0):
+    lines = ["Red", "Green"] + [f"Line {i}" for i in range(3, max(2, rows // stops_per_line) + 1)]
+    for i in range(rows):
+        line = lines[i % len(lines)]
+        stop = i // len(lines)
+        yield {
+            "Station Name": f"{line} Stop {stop}",
+            "Station_ID": f"LU{i}",
+            "Line": line,
+            "Location": rng.choice(AREAS),
+            "Key Features/Attractions": rng.choice(AREAS),
+            "Type (Terminus/Regular)": "Terminus" if stop == 0 else "Regular",
+            "Interchange": "Yes" if rng.random() < 0.05 else "No",
+            "Zone": f"Zone {rng.randint(1, 5)}",
+            "Daily Footfall": f"{rng.randint(500, 40000):,}",
+            "Facilities": "Ticket Machine, Shelter",
+            "Accessibility": "Wheelchair Accessible",
+            "Latitude": "north" if rng.random() < invalid_rate else f"{rng.uniform(*LATITUDE):.6f}",
+            "Longitude": f"{rng.uniform(*LONGITUDE):.6f}",
+            "Parking Availability": _flag(rng),
+            "Nearby Landmarks": rng.choice(AREAS),
+            "First Tram Time": f"{rng.randint(5, 6)}:{rng.choice(['00', '15', '30', '45'])} AM",
+            "Last Tram Time": f"{rng.randint(0, 1):02d}:{rng.choice(['00', '30'])}",
+        }
+
+
+def bus_rows(rows, rng, group_size=10, invalid_rate=0.0):
+    landmarks = _vocabulary("Landmark", rows, group_size)
+    places = _vocabulary("Terminus", rows, group_size)
+    for i in range(rows):
+        yield {
+            "Route Number": f"{i}{rng.choice('ABCDENX')}",
+            "From": rng.choice(places),
+            "To": rng.choice(places),
+            "Route Type": rng.choice(["Radial", "Orbital", "Express", "Nitelink"]),
+            "Frequency": "often" if rng.random() < invalid_rate else f"Every {rng.randint(5, 30)} mins",
+            "Duration": f"{rng.randint(0, 1)} hr {rng.randint(5, 55)} mins",
+            "Key Landmarks": ", ".join(rng.sample(landmarks, k=min(len(landmarks), rng.randint(1, 3)))),
+            "Peak Hours": "07:00-09:30, 16:30-19:00",
+            "Operator": rng.choice(["Dublin Bus", "Go-Ahead Ireland"]),
+            "Primary Areas Served": ", ".join(rng.sample(AREAS, k=2)),
+        }
+
+
+def generate(directory, rows, seed=0, invalid_rate=0.001):
+    """
+    Write DART, LUAS and BUS CSVs of `rows` rows each, with the real datasets' headers.
+    Rows are streamed to disk, so 10M-row files need no more memory than 1k-row ones.
+    Returns the three paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    return (
+        _write(os.path.join(directory, f"DART_{rows}.csv"), DART_COLUMNS,
+               dart_rows(rows, rng, invalid_rate=invalid_rate)),
+        _write(os.path.join(directory, f"LUAS_{rows}.csv"), LUAS_COLUMNS,
+               luas_rows(rows, rng, invalid_rate=invalid_rate)),
+        _write(os.path.join(directory, f"BUS_{rows}.csv"), BUS_COLUMNS,
+               bus_rows(rows, rng, invalid_rate=invalid_rate)),
+    )
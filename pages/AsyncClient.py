@@ -0,0 +1,170 @@
+import asyncio
+import inspect
+import time
+
+from pages.AsyncConnection import AsyncConnectionManager
+from pages.Batch import WriteError, chunked
+from pages.Bus import BUS_COLUMNS, BUS_DELETE_QUERY, BUS_HASH_QUERY, BUS_IMPORT_QUERY, BUS_ROW
+from pages.Coerce import Quarantine
+from pages.Dart import DART_COLUMNS, DART_DELETE_QUERY, DART_HASH_QUERY, DART_IMPORT_QUERY, DART_ROW
+from pages.Generation import bump_generation_async
+from pages.Incremental import RowDiff
+from pages.Luas import LUAS_COLUMNS, LUAS_DELETE_QUERY, LUAS_HASH_QUERY, LUAS_IMPORT_QUERY, LUAS_ROW
+from pages.Reader import CsvFeed
+
+# scope -> (CSV columns, row transform, import, hash and delete statements) of each loader
+DATASETS = {
+    "DART": (DART_COLUMNS, DART_ROW, DART_IMPORT_QUERY, DART_HASH_QUERY, DART_DELETE_QUERY),
+    "LUAS": (LUAS_COLUMNS, LUAS_ROW, LUAS_IMPORT_QUERY, LUAS_HASH_QUERY, LUAS_DELETE_QUERY),
+    "BUS": (BUS_COLUMNS, BUS_ROW, BUS_IMPORT_QUERY, BUS_HASH_QUERY, BUS_DELETE_QUERY),
+}
+
+
+async def write_rows_async(connection, query, rows, batch_size=1000, label="Batch import", on_commit=None):
+    """
+    Async counterpart of write_rows: each chunk of `batch_size` rows is one managed write transaction
+    of an `UNWIND $rows AS row` query. The next chunk is parsed on a worker thread while the current one
+    is written, so reading the CSV never blocks the event loop. Returns the ids the query reports;
+    raises WriteError when parsing or a write failed part-way.
+    `on_commit(ids)` may be a function or a coroutine function; as in write_rows, a hook failure is
+    printed and does not stop or fail the write.
+    """
+    async def write(tx, chunk):
+        records = await connection.run_in_transaction(tx, query, {"rows": chunk})
+        return [record["id"] for record in records if "id" in record.keys()]
+
+    start = time.perf_counter()
+    chunks = chunked(rows, batch_size)
+    written_ids = []
+    committed = 0
+    error = None
+    pending = asyncio.ensure_future(asyncio.to_thread(next, chunks, None))
+    try:
+        while True:
+            chunk = await pending
+            if chunk is None:
+                break
+            pending = asyncio.ensure_future(asyncio.to_thread(next, chunks, None))
+            ids = await connection.execute_write(write, chunk)
+            committed += len(chunk)
+            written_ids.extend(ids)
+            if on_commit is not None and ids:
+                try:
+                    result = on_commit(ids)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    print(f"{label}: commit hook failed: {e}")
+    except Exception as e:
+        error = e
+        print(f"{label} failed after {committed} committed rows: {e}")
+    finally:
+        # Never leave the parser running on a worker thread
+        if not pending.done():
+            await asyncio.gather(pending, return_exceptions=True)
+        chunks.close()
+
+    elapsed = time.perf_counter() - start
+    rate = committed / elapsed if elapsed > 0 else 0.0
+    print(f"{label}: {committed} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    if error is not None:
+        raise WriteError(f"{label} failed: {error}", written_ids) from error
+    return written_ids
+
+
+class AsyncTransitClient:
+    def __init__(self, uri, user, password, **config):
+        """
+        Asyncio API of the DART, LUAS and BUS loaders, for services running an event loop.
+        `config` goes to AsyncConnectionManager.get, e.g. max_concurrency to cap queries in flight.
+        Scripts keep using DartExecution, LuasExecution and BusExecution, or wrap these coroutines
+        in run_sync (pages/AsyncConnection.py).
+        """
+        self.connection = AsyncConnectionManager.get(uri, user, password, **config)
+        self.last_written_ids = {}
+
+    async def close(self):
+        """Release the shared async connection"""
+        if self.connection:
+            await self.connection.release()
+            self.connection = None
+
+    async def execute_query(self, query, parameters=None):
+        """Execute a given Cypher query."""
+        try:
+            return await self.connection.run(query, parameters)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    async def _import(self, scope, csv_file_path, batch_size, incremental, quarantine_path, on_commit, encoding):
+        """
+        The import of the sync loaders, on the async driver: the same typing, quarantine, incremental
+        diff and generation bump, with parsing kept off the event loop.
+        """
+        columns, transform, import_query, hash_query, delete_query = DATASETS[scope]
+        try:
+            feed = await asyncio.to_thread(CsvFeed, csv_file_path, columns, encoding=encoding)
+        except (FileNotFoundError, ValueError) as e:
+            print(e)
+            return
+
+        diff = None
+        quarantine = Quarantine(f"{scope} import", path=quarantine_path, key_column=transform.key)
+        rows = quarantine.filter(feed, transform)
+        if incremental:
+            existing = await self.execute_query(hash_query) or []
+            diff = RowDiff({record["key"]: record["row_hash"] for record in existing}, key=transform.key)
+            rows = diff.filter(rows)
+        failure = None
+        try:
+            written_ids = await write_rows_async(
+                self.connection, import_query, rows, batch_size=batch_size, label=f"{scope} import",
+                on_commit=on_commit
+            )
+        except WriteError as e:
+            failure = e
+            written_ids = e.written_ids
+        self.last_written_ids[scope] = written_ids
+
+        quarantine.report()
+        if diff is not None:
+            diff.seen.update(quarantine.keys)
+            # Keys after a failure were never read, so only a complete load may delete what it did not see
+            if failure is None:
+                if diff.removed:
+                    await self.execute_query(delete_query, parameters={"keys": diff.removed})
+                diff.report(scope)
+        if written_ids or (diff is not None and failure is None and diff.removed):
+            await bump_generation_async(self.connection, scope)
+        if failure is not None:
+            print(f"{scope} import incomplete, nothing was deleted: {failure}")
+            raise failure
+        print(f"{scope} imported successfully")
+        return diff
+
+    async def import_station_data(self, csv_file_path, batch_size=1000, incremental=False, quarantine_path=None,
+                                  on_commit=None, encoding=None):
+        """Async DartExecution.import_station_data"""
+        return await self._import("DART", csv_file_path, batch_size, incremental, quarantine_path, on_commit, encoding)
+
+    async def import_luas_data(self, csv_file_path, batch_size=1000, incremental=False, quarantine_path=None,
+                               on_commit=None, encoding=None):
+        """Async LuasExecution.import_luas_data"""
+        return await self._import("LUAS", csv_file_path, batch_size, incremental, quarantine_path, on_commit, encoding)
+
+    async def import_bus_data(self, csv_file_path, batch_size=1000, incremental=False, quarantine_path=None,
+                              on_commit=None, encoding=None):
+        """Async BusExecution.import_bus_data"""
+        return await self._import("BUS", csv_file_path, batch_size, incremental, quarantine_path, on_commit, encoding)
+
+    async def import_all(self, dart_csv, luas_csv, bus_csv, **options):
+        """
+        Import the three datasets concurrently; they write disjoint nodes, so their batches interleave
+        freely within the connection's concurrency limit. Returns the three diffs. If one import fails
+        the others still finish before its error is raised (see AsyncConnectionManager.gather).
+        """
+        return await self.connection.gather(
+            self.import_station_data(dart_csv, **options),
+            self.import_luas_data(luas_csv, **options),
+            self.import_bus_data(bus_csv, **options),
+        )
@@ -0,0 +1,225 @@
+import asyncio
+import functools
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from neo4j import AsyncGraphDatabase
+
+from pages.Instrumentation import QueryInstrumentation
+
+
+def run_sync(awaitable):
+    """
+    Run a coroutine of the async API to completion from synchronous code, e.g. a script.
+    Not for use inside a running event loop; await the coroutine there instead. Each call runs
+    its own loop, and shared managers open a fresh driver for it (see AsyncConnectionManager).
+    """
+    return asyncio.run(awaitable)
+
+
+class AsyncConnectionManager:
+    """
+    Asyncio counterpart of ConnectionManager: one async driver per (uri, user), with at most
+    `max_concurrency` queries in flight so fan-out cannot exhaust the pool or the server.
+    The driver and concurrency slots belong to the event loop they are used in; a manager first used
+    in a later loop (e.g. a second run_sync) opens a fresh driver and slots for it.
+    """
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, uri, user, password, pool_size=50, max_concurrency=None, acquisition_timeout=60.0,
+                 max_retry_time=30.0, profile=False, metrics_url=None):
+        self.uri = uri
+        self.user = user
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency or pool_size
+        self.acquisition_timeout = acquisition_timeout
+        self.config = {"pool_size": pool_size, "max_concurrency": max_concurrency,
+                       "acquisition_timeout": acquisition_timeout, "max_retry_time": max_retry_time,
+                       "profile": profile, "metrics_url": metrics_url}
+        self._connect = functools.partial(self._create_driver, password, acquisition_timeout, max_retry_time)
+        self.driver = self._connect()
+        self.closed = False
+        self._references = 0
+        self._loop = None
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self.instrumentation = QueryInstrumentation(profile=profile, metrics_url=metrics_url)
+
+    def _create_driver(self, password, acquisition_timeout, max_retry_time):
+        return AsyncGraphDatabase.driver(
+            self.uri,
+            auth=(self.user, password),
+            max_connection_pool_size=self.pool_size,
+            connection_acquisition_timeout=acquisition_timeout,
+            max_transaction_retry_time=max_retry_time,
+        )
+
+    @classmethod
+    def get(cls, uri, user, password, **config):
+        """
+        Return the shared manager for `uri`/`user`, creating it on first use.
+        `config` (pool_size, max_concurrency, acquisition_timeout, max_retry_time, profile, metrics_url) only
+        applies when the manager is created; settings that differ are reported and ignored.
+        """
+        key = (uri, user)
+        with cls._lock:
+            manager = cls._instances.get(key)
+            if manager is None or manager.closed:
+                manager = cls(uri, user, password, **config)
+                cls._instances[key] = manager
+            else:
+                ignored = {name: value for name, value in config.items() if manager.config.get(name) != value}
+                if ignored:
+                    print(f"Connection to {uri} is already open with {manager.config}, ignoring {ignored}")
+            manager._references += 1
+            return manager
+
+    @classmethod
+    def register(cls, uri, user, manager):
+        """Install a pre-built manager for `uri`/`user`, e.g. an in-process stand-in backend"""
+        with cls._lock:
+            cls._instances[(uri, user)] = manager
+        return manager
+
+    @classmethod
+    async def close_all(cls):
+        """Close every shared driver regardless of outstanding references"""
+        with cls._lock:
+            managers = list(cls._instances.values())
+            cls._instances.clear()
+        for manager in managers:
+            await manager._shutdown()
+
+    async def release(self):
+        """Drop one reference; the driver is closed once nobody holds it"""
+        with AsyncConnectionManager._lock:
+            self._references -= 1
+            if self._references > 0:
+                return
+            if AsyncConnectionManager._instances.get((self.uri, self.user)) is self:
+                del AsyncConnectionManager._instances[(self.uri, self.user)]
+        await self._shutdown()
+
+    def _bind(self):
+        """Tie the driver and slots to the running loop, replacing those of a loop that has ended"""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        if self._loop is not None:
+            # The old driver's connections died with their loop and cannot be closed from this one
+            self.driver = self._connect()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._in_flight = 0
+        self._loop = loop
+
+    async def _shutdown(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._loop in (None, asyncio.get_running_loop()):
+            await self.driver.close()
+
+    @asynccontextmanager
+    async def session(self, **session_config):
+        """
+        Open a session once one of the `max_concurrency` slots is free.
+        Async sessions are cheap to open and are not pooled; connections are.
+        Raises TimeoutError when no slot frees up within `acquisition_timeout`, as ConnectionManager.session.
+        """
+        self._bind()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquisition_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"No session free after {self.acquisition_timeout}s ({self.max_concurrency} in flight); "
+                f"a session opened inside another session's block can exhaust the slots"
+            ) from None
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            async with self.driver.session(**session_config) as session:
+                yield session
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def run(self, query, parameters=None):
+        """Run an auto-commit query and return all records"""
+        async with self.session() as session:
+            start = time.perf_counter()
+            result = await session.run(self.instrumentation.prepare(query), parameters)
+            records = [record async for record in result]
+            summary = await result.consume()
+            self.instrumentation.record(query, time.perf_counter() - start, len(records), summary)
+            return records
+
+    async def stream(self, query, parameters=None, fetch_size=1000):
+        """
+        Run a query and yield its records lazily, `fetch_size` per round-trip. The concurrency
+        slot is held until the generator is exhausted or closed.
+        """
+        async with self.session(fetch_size=fetch_size) as session:
+            start = time.perf_counter()
+            rows = 0
+            summary = None
+            try:
+                result = await session.run(self.instrumentation.prepare(query), parameters)
+                async for record in result:
+                    rows += 1
+                    yield record
+                summary = await result.consume()
+            finally:
+                self.instrumentation.record(query, time.perf_counter() - start, rows, summary)
+
+    async def paginate(self, query, parameters=None, key="key", page_size=1000, after=None):
+        """Keyset pagination, as ConnectionManager.paginate"""
+        while True:
+            page = await self.run(query, dict(parameters or {}, after=after, page_size=page_size))
+            for record in page:
+                yield record
+            if len(page) < page_size:
+                return
+            after = page[-1][key]
+
+    async def run_in_transaction(self, tx, query, parameters):
+        """Run `query` in the managed transaction `tx` with instrumentation"""
+        start = time.perf_counter()
+        result = await tx.run(self.instrumentation.prepare(query), parameters)
+        records = [record async for record in result]
+        summary = await result.consume()
+        self.instrumentation.record(query, time.perf_counter() - start, len(records), summary)
+        return records
+
+    async def execute_read(self, work, *args, **kwargs):
+        """Run `await work(tx, ...)` as a managed read transaction, retried on transient errors"""
+        async with self.session() as session:
+            return await session.execute_read(work, *args, **kwargs)
+
+    async def execute_write(self, work, *args, **kwargs):
+        """Run `await work(tx, ...)` as a managed write transaction, retried on transient errors"""
+        async with self.session() as session:
+            return await session.execute_write(work, *args, **kwargs)
+
+    async def gather(self, *awaitables):
+        """
+        Await independent queries concurrently and return their results in order. Each still
+        waits for a concurrency slot, so fanning out many queries is safe. A failure does not
+        abandon the others: every awaitable runs to completion, further failures are printed and
+        the first one is raised, so no write is left running unobserved.
+        """
+        results = await asyncio.gather(*awaitables, return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        for failure in failures[1:]:
+            print(f"Concurrent query failed: {failure}")
+        if failures:
+            raise failures[0]
+        return results
+
+    def metrics(self):
+        """Concurrency slots in use, the peak so far and the limit"""
+        return {"in_flight": self._in_flight, "peak_in_flight": self._peak_in_flight,
+                "max_concurrency": self.max_concurrency}
@@ -0,0 +1,168 @@
+import time
+
+from pages.Pipeline import bounded_stream
+
+
+def chunked(rows, size):
+    """
+    Yield lists of at most `size` items from an iterable of rows.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_commit_hook(on_commit, ids, label):
+    """
+    Call `on_commit(ids)` after a commit. A failing hook is printed and the write carries on: its rows
+    are already committed, so the write stays complete, and whatever the hook maintains (e.g. links)
+    can be rebuilt from the written ids.
+    """
+    if on_commit is None or not ids:
+        return
+    try:
+        on_commit(ids)
+    except Exception as e:
+        print(f"{label}: commit hook failed: {e}")
+
+
+class WriteError(Exception):
+    def __init__(self, message, written_ids):
+        """A write that stopped part-way; `written_ids` holds the ids committed before it failed"""
+        super().__init__(message)
+        self.written_ids = written_ids
+
+
+class BatchWriter:
+    def __init__(self, connection, query, batch_size=1000, commit_interval=1, label="Batch import", prefetch=0,
+                 on_commit=None):
+        """
+        Write rows in chunks, sending each chunk as a single `UNWIND $rows AS row` statement.
+        `commit_interval` is the number of chunks sent before the transaction is committed.
+        If the query returns an `id` column, committed ids are collected in `written_ids`.
+        With `prefetch` above zero, rows are parsed and chunked on a background thread that stays
+        at most `prefetch` chunks ahead of the database writes.
+        `on_commit(ids)` is called after each commit with the ids it wrote, e.g. to link them right away;
+        a hook failure is printed and does not stop the write (see run_commit_hook).
+        A failure (parsing or writing) stops the write; it is kept in `error`.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if commit_interval < 1:
+            raise ValueError("commit_interval must be at least 1")
+        self.connection = connection
+        self.query = query
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.label = label
+        self.prefetch = prefetch
+        self.on_commit = on_commit
+        self.written_ids = []
+        self.error = None
+
+    def _committed(self, ids):
+        self.written_ids.extend(ids)
+        run_commit_hook(self.on_commit, ids, self.label)
+
+    def write(self, rows):
+        """
+        Send all rows to the database and report throughput. Returns the number of rows committed;
+        check `error` to tell a complete write from one that stopped early.
+        """
+        start = time.perf_counter()
+        committed = 0
+        pending_rows = 0
+        pending_chunks = 0
+        pending_ids = []
+        chunks = chunked(rows, self.batch_size)
+        if self.prefetch:
+            chunks = bounded_stream(chunks, maxsize=self.prefetch)
+        with self.connection.session() as session:
+            tx = None
+            try:
+                for chunk in chunks:
+                    if tx is None:
+                        tx = session.begin_transaction()
+                    sent = time.perf_counter()
+                    result = tx.run(self.connection.instrumentation.prepare(self.query), rows=chunk)
+                    pending_ids.extend(record["id"] for record in result if "id" in record.keys())
+                    self.connection.instrumentation.record(
+                        self.query, time.perf_counter() - sent, len(chunk), result.consume()
+                    )
+                    pending_rows += len(chunk)
+                    pending_chunks += 1
+                    if pending_chunks >= self.commit_interval:
+                        tx.commit()
+                        tx = None
+                        committed += pending_rows
+                        self._committed(pending_ids)
+                        pending_rows = 0
+                        pending_chunks = 0
+                        pending_ids = []
+                if tx is not None:
+                    tx.commit()
+                    tx = None
+                    committed += pending_rows
+                    self._committed(pending_ids)
+            except Exception as e:
+                if tx is not None:
+                    tx.rollback()
+                self.error = e
+                print(f"{self.label} failed after {committed} committed rows: {e}")
+            finally:
+                # Stop a prefetching parser here rather than whenever the generator is collected
+                chunks.close()
+
+        elapsed = time.perf_counter() - start
+        rate = committed / elapsed if elapsed > 0 else 0.0
+        print(f"{self.label}: {committed} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+        return committed
+
+
+def write_rows(connection, query, rows, batched=True, batch_size=1000, commit_interval=1, label="Batch import",
+               prefetch=0, on_commit=None):
+    """
+    Write parameter rows with an `UNWIND $rows AS row` query and return the ids it reports.
+    With `batched` False each row is sent on its own, as a per-row fallback.
+    `on_commit(ids)` is called with the ids of every committed batch (or row); a hook failure is printed
+    and does not stop or fail the write (see run_commit_hook).
+    Raises WriteError when the rows were not all written, so callers never mistake a partial
+    load for a complete one.
+    """
+    if batched:
+        writer = BatchWriter(
+            connection,
+            query,
+            batch_size=batch_size,
+            commit_interval=commit_interval,
+            label=label,
+            prefetch=prefetch,
+            on_commit=on_commit,
+        )
+        writer.write(rows)
+        if writer.error is not None:
+            raise WriteError(f"{label} failed: {writer.error}", writer.written_ids) from writer.error
+        return writer.written_ids
+
+    written_ids = []
+    failed = 0
+    try:
+        for row in rows:
+            try:
+                ids = [record["id"] for record in connection.run(query, {"rows": [row]})]
+            except Exception as e:
+                failed += 1
+                print(f"Query execution failed: {e}")
+                continue
+            written_ids.extend(ids)
+            run_commit_hook(on_commit, ids, label)
+    except Exception as e:
+        raise WriteError(f"{label} failed after {len(written_ids)} rows: {e}", written_ids) from e
+    if failed:
+        raise WriteError(f"{label}: {failed} rows could not be written", written_ids)
+    return written_ids
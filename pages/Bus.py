@@ -1,96 +1,298 @@
-from neo4j import GraphDatabase
-import os
-import csv
+from pages.Batch import WriteError, write_rows
+from pages.Coerce import Quarantine, RowTransform
+from pages.Connection import ConnectionManager
+from pages.Generation import bump_generation
+from pages.Incremental import RowDiff
+from pages.Linker import TokenRelationshipBuilder
+from pages.Parallel import ParallelImport
+from pages.Partition import PartitionedBuild, key_ranges, run_in_transaction
+from pages.Queries import register
+from pages.Reader import CsvFeed
+
+# Query parameter name -> CSV column
+BUS_COLUMNS = {
+    "Route_Number": "Route Number",
+    "From": "From",
+    "To": "To",
+    "Route_Type": "Route Type",
+    "Frequency": "Frequency",
+    "Duration": "Duration",
+    "Key_Landmarks": "Key Landmarks",
+    "Peak_Hours": "Peak Hours",
+    "Operator": "Operator",
+    "Primary_Areas_Served": "Primary Areas Served",
+}
+
+# Typed fields: parameter -> converter name (see pages/Coerce.py)
+BUS_SCHEMA = {
+    "Frequency": "minutes",
+    "Duration": "minutes",
+}
+
+# CSV row parameters -> write-ready row (typed, hashed), shared with worker processes and exports
+BUS_ROW = RowTransform(BUS_SCHEMA, key="Route_Number")
+
+BUS_IMPORT_QUERY = register("bus.import", """
+        MATCH (category:Category {name: 'BUS'})
+        UNWIND $rows AS row
+        MERGE (route:BusRoute {`Route Number`: row.Route_Number})
+        SET route:Route
+        SET route += {
+             From: row.From,
+             To: row.To,
+            `Route Type`: row.Route_Type,
+            Frequency: row.Frequency,
+            Duration: row.Duration,
+            `Key Landmarks`: row.Key_Landmarks,
+            `Peak Hours`: row.Peak_Hours,
+            Operator: row.Operator,
+            `Primary Areas Served`: row.Primary_Areas_Served,
+            row_hash: row.row_hash
+        }
+        MERGE (category)-[:HAS_ROUTE]->(route)
+        RETURN elementId(route) AS id
+        """, {"rows": []})
+
+BUS_HASH_QUERY = register("bus.hashes", """
+        MATCH (route:BusRoute)
+        RETURN route.`Route Number` AS key, route.row_hash AS row_hash
+        """, {})
+
+# Route connections for one range of route numbers, used by partitioned rebuilds
+BUS_RANGE_DISCONNECT_QUERY = register("bus.range_disconnect", """
+        MATCH (route:BusRoute)-[r:CONNECTED_TO]->(:BusRoute)
+        WHERE route.`Route Number` >= $low AND route.`Route Number` <= $high
+        DELETE r
+        """, {"low": "", "high": ""})
+
+BUS_RANGE_CONNECT_QUERY = register("bus.range_connect", """
+        MATCH (route1:BusRoute)
+        WHERE route1.`Route Number` >= $low AND route1.`Route Number` <= $high
+        CALL {
+            WITH route1
+            MATCH (route2:BusRoute {From: route1.From}) WHERE route2 <> route1 RETURN route2
+            UNION
+            WITH route1
+            MATCH (route2:BusRoute {To: route1.To}) WHERE route2 <> route1 RETURN route2
+        }
+        WITH route1, route2
+        ORDER BY elementId(route1), elementId(route2)
+        CREATE (route1)-[:CONNECTED_TO]->(route2)
+        """, {"low": "", "high": ""})
+
+BUS_DELETE_QUERY = register("bus.delete", """
+        MATCH (route:BusRoute)
+        WHERE route.`Route Number` IN $keys
+        DETACH DELETE route
+        """, {"keys": []})
+
 
 class BusExecution:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, **config):
         """Initialize the Neo4j connection"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.connection = ConnectionManager.get(uri, user, password, **config)
+        self.driver = self.connection.driver
+        self.last_written_ids = []
 
     def close(self):
-        """Close the Neo4j connection"""
-        if self.driver:
-            self.driver.close()
+        """Release the shared Neo4j connection"""
+        if self.connection:
+            self.connection.release()
+            self.connection = None
 
     def execute_query(self, query, parameters=None):
         """Execute a given Cypher query."""
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, parameters)
-                return [record for record in result]
-            except Exception as e:
-                print(f"Query execution failed: {e}")
-
-    def import_bus_data(self, csv_file_path):
+        try:
+            return self.connection.run(query, parameters)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def stream_query(self, query, parameters=None, fetch_size=1000):
+        """Execute a given Cypher query and yield its records lazily, `fetch_size` at a time."""
+        try:
+            yield from self.connection.stream(query, parameters, fetch_size=fetch_size)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def _existing_hashes(self):
         """
-        Import station data for the DART node from a CSV file.
+        Row hashes of the routes already in the graph, keyed by route number.
         """
-        if not os.path.exists(csv_file_path):
-            print(f"CSV file not found at path: {csv_file_path}")
+        return {record["key"]: record["row_hash"] for record in self.execute_query(BUS_HASH_QUERY) or []}
+
+    def import_bus_data(self, csv_file_path, batched=True, batch_size=1000, commit_interval=1, incremental=False,
+                        prefetch=4, quarantine_path=None, on_commit=None, encoding=None,
+                        processes=0, writers=2):
+        """
+        Import route data for the BUS node from a CSV file.
+        Rows are sent in UNWIND batches unless `batched` is False, which falls back to one query per row.
+        Routes are merged on `Route Number`, so re-running is idempotent. With `incremental` set only
+        added or changed rows are written and routes missing from the CSV are deleted.
+        `prefetch` is how many chunks CSV parsing may run ahead of the database writes.
+        Fields are converted per BUS_SCHEMA; rows that fail are quarantined (and written to
+        `quarantine_path`, if given) instead of aborting the load.
+        The file may be gzip-compressed; its encoding is detected unless `encoding` is given.
+        Ids of the written routes are kept in `last_written_ids`; `on_commit(ids)` is called after
+        every committed batch, so relationships can be maintained as the import progresses.
+        With `processes` above zero, rows are parsed and typed in that many worker processes and written
+        by `writers` threads (see pages/Parallel.py); the graph is the same as with one process.
+        """
+        try:
+            feed = CsvFeed(csv_file_path, BUS_COLUMNS, encoding=encoding)
+        except (FileNotFoundError, ValueError) as e:
+            print(e)
             return
 
-        with open(csv_file_path, mode='r', encoding='latin1') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                query = """
-                        MATCH (category:Category {name: 'BUS'})
-                        CREATE (route:Route {
-                            `Route Number`: $Route_Number,
-                             From: $From,
-                             To: $To,
-                            `Route Type`: $Route_Type,
-                            Frequency: $Frequency,
-                            Duration: $Duration,
-                            `Key Landmarks`: $Key_Landmarks,
-                            `Peak Hours`: $Peak_Hours,
-                            Operator: $Operator,
-                            `Primary Areas Served`: $Primary_Areas_Served
-                        })
-                        CREATE (category)-[:HAS_ROUTE]->(route)
-                        """
-
-                # Map CSV columns to query parameters
-                self.execute_query(
-                    query,
-                    parameters={
-                        "Route_Number": row["Route Number"],
-                        "From": row["From"],
-                        "To": row["To"],
-                        "Route_Type": row["Route Type"],
-                        "Frequency": row["Frequency"],
-                        "Duration": row["Duration"],
-                        "Key_Landmarks": row["Key Landmarks"],
-                        "Peak_Hours": row["Peak Hours"],
-                        "Operator": row["Operator"],
-                        "Primary_Areas_Served": row["Primary Areas Served"],
-                    },
+        diff = None
+        quarantine = Quarantine("BUS import", path=quarantine_path, key_column="Route_Number")
+        parallel = None
+        if processes:
+            parallel = ParallelImport(self.connection, BUS_IMPORT_QUERY, "Route_Number", label="BUS import",
+                                      processes=processes, writers=writers, batch_size=batch_size,
+                                      on_commit=on_commit)
+            rows = parallel.rows(feed, BUS_ROW, quarantine)
+        else:
+            rows = quarantine.filter(feed, BUS_ROW)
+        if incremental:
+            diff = RowDiff(self._existing_hashes(), key="Route_Number")
+            rows = diff.filter(rows)
+        failure = None
+        try:
+            if parallel is not None:
+                self.last_written_ids = parallel.write(rows)
+            else:
+                self.last_written_ids = write_rows(
+                    self.connection,
+                    BUS_IMPORT_QUERY,
+                    rows,
+                    batched=batched,
+                    batch_size=batch_size,
+                    commit_interval=commit_interval,
+                    prefetch=prefetch,
+                    label="BUS import",
+                    on_commit=on_commit,
                 )
+        except WriteError as e:
+            failure = e
+            self.last_written_ids = e.written_ids
+
+        quarantine.report()
+        if diff is not None:
+            diff.seen.update(quarantine.keys)
+            # Keys after a failure were never read, so only a complete load may delete what it did not see
+            if failure is None:
+                if diff.removed:
+                    self.execute_query(BUS_DELETE_QUERY, parameters={"keys": diff.removed})
+                diff.report("BUS")
+        if self.last_written_ids or (diff is not None and failure is None and diff.removed):
+            bump_generation(self.connection, "BUS")
+        if failure is not None:
+            print(f"BUS import incomplete, no routes were deleted: {failure}")
+            raise failure
         print("BUS imported successfully")
+        return diff
 
-    def create_route_relationships(self):
+    def create_route_relationships(self, mode="client", record_tokens=False, batch_size=1000, node_ids=None,
+                                   partitioning=None):
         """
-        Create relationships between bus routes based on shared areas and landmarks.
+        Create relationships between bus routes based on shared landmarks.
+        Landmarks are tokenized once into an inverted index, so only routes that actually
+        share a landmark are paired. `mode` is "client" or "server" (see TokenRelationshipBuilder).
+        Existing SHARES_LANDMARK relationships are replaced; with `node_ids` only those routes are relinked.
+        A `partitioning` (see pages/Partition.py) makes a full rebuild resumable, one range of
+        route numbers per transaction.
         """
-        query = """
-           MATCH (route1:Route), (route2:Route)
-           WHERE route1 <> route2
-           AND ANY(landmark IN split(route1.`Key Landmarks`, ', ') 
-                   WHERE landmark IN split(route2.`Key Landmarks`, ', '))
-           CREATE (route1)-[:SHARES_LANDMARK]->(route2)
-           """
-        self.execute_query(query)
+        builder = self._landmark_builder(batch_size)
+        builder.build(mode=mode, record_tokens=record_tokens, node_ids=node_ids, partitioning=partitioning)
+        bump_generation(self.connection, "BUS")
         print("Relationships based on shared landmarks created.")
 
-    def create_route_connections(self):
+    def _landmark_builder(self, batch_size=1000):
+        return TokenRelationshipBuilder(
+            self.connection,
+            "BusRoute",
+            "Key Landmarks",
+            "SHARES_LANDMARK",
+            token_property="landmark_tokens",
+            batch_size=batch_size,
+            key_property="Route Number",
+            fulltext_index="bus_route_landmarks",
+        )
+
+    def link_routes(self, node_ids):
+        """
+        Link just the routes in `node_ids`, e.g. as the `on_commit` hook of an import: landmark partners
+        come from the full-text index and From/To partners from their range indexes, and every edge is
+        merged, so adding one route costs a handful of index lookups instead of a full rebuild.
+        """
+        linked = self._landmark_builder().link(node_ids)
+        self.create_route_connections(node_ids=node_ids)
+        return linked
+
+    def create_route_connections(self, node_ids=None, partitioning=None):
         """
         Create relationships between bus routes that share starting or ending points.
+        Existing route connections are replaced; with `node_ids` only those routes are relinked.
+        A `partitioning` (see pages/Partition.py) splits a full rebuild into checkpointed
+        transactions over ranges of route numbers instead of one statement over every route.
         """
-        query = """
-           MATCH (route1:Route), (route2:Route)
-           WHERE route1 <> route2
-           AND (route1.From = route2.From OR route1.To = route2.To)
-           CREATE (route1)-[:CONNECTED_TO]->(route2)
-           """
-        self.execute_query(query)
+        if partitioning is not None and node_ids is None:
+            PartitionedBuild(self.connection, "BusRoute:CONNECTED_TO", partitioning).run(
+                lambda: key_ranges(self.connection, "BusRoute", "`Route Number`", partitioning.partition_size),
+                self._connect_route_range,
+            )
+            bump_generation(self.connection, "BUS")
+            print("Route connections created based on shared start or end points.")
+            return
+        if node_ids is None:
+            self.execute_query(
+                """
+                MATCH (:BusRoute)-[r:CONNECTED_TO]->(:BusRoute)
+                CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+                """
+            )
+            query = """
+               MATCH (route1:BusRoute)
+               CALL {
+                   WITH route1
+                   MATCH (route2:BusRoute {From: route1.From}) WHERE route2 <> route1 RETURN route2
+                   UNION
+                   WITH route1
+                   MATCH (route2:BusRoute {To: route1.To}) WHERE route2 <> route1 RETURN route2
+               }
+               CREATE (route1)-[:CONNECTED_TO]->(route2)
+               """
+        else:
+            self.execute_query(
+                """
+                MATCH (route:BusRoute)-[r:CONNECTED_TO]-(:BusRoute)
+                WHERE elementId(route) IN $ids
+                WITH DISTINCT r
+                DELETE r
+                """,
+                parameters={"ids": node_ids},
+            )
+            query = """
+               MATCH (route1:BusRoute)
+               WHERE elementId(route1) IN $ids
+               CALL {
+                   WITH route1
+                   MATCH (route2:BusRoute {From: route1.From}) WHERE route2 <> route1 RETURN route2
+                   UNION
+                   WITH route1
+                   MATCH (route2:BusRoute {To: route1.To}) WHERE route2 <> route1 RETURN route2
+               }
+               MERGE (route1)-[:CONNECTED_TO]->(route2)
+               MERGE (route2)-[:CONNECTED_TO]->(route1)
+               """
+        self.execute_query(query, parameters={"ids": node_ids})
+        bump_generation(self.connection, "BUS")
         print("Route connections created based on shared start or end points.")
 
+    def _connect_route_range(self, tx, key_range):
+        """
+        Replace the outgoing route connections of the routes whose number lies in `key_range`.
+        """
+        parameters = {"low": key_range[0], "high": key_range[1]}
+        run_in_transaction(self.connection, tx, BUS_RANGE_DISCONNECT_QUERY, parameters)
+        run_in_transaction(self.connection, tx, BUS_RANGE_CONNECT_QUERY, parameters)
@@ -0,0 +1,139 @@
+import hashlib
+import pickle
+import re
+import shelve
+import threading
+import time
+from collections import OrderedDict
+
+from pages.Generation import current_generations, local_generation
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def cache_key(query, parameters=None):
+    """
+    Stable key for a query and its parameters; whitespace differences in the query are ignored.
+    """
+    text = WHITESPACE.sub(" ", query).strip()
+    payload = pickle.dumps((text, sorted((parameters or {}).items())), protocol=4)
+    return hashlib.sha1(payload).hexdigest()
+
+
+class QueryCache:
+    def __init__(self, connection, max_entries=1024, ttl=None, path=None, check_interval=1.0):
+        """
+        LRU cache of query results, invalidated whenever a loader bumps a graph generation.
+        `ttl` (seconds) expires entries regardless of writes. `path` adds a persistent tier in a
+        shelve file, so results survive between runs. Writes from another process are noticed
+        by re-reading the graph generations at most every `check_interval` seconds.
+        """
+        self.connection = connection
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._generations = None
+        self._local_generation = None
+        self._checked = 0.0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _current_generations(self):
+        """
+        The graph generations, re-read when this process wrote or `check_interval` has passed.
+        Clears the memory tier when they moved on.
+        """
+        now = time.monotonic()
+        local = local_generation()
+        if self._generations is not None and local == self._local_generation and now - self._checked < self.check_interval:
+            return self._generations
+        generations = current_generations(self.connection)
+        with self._lock:
+            if self._generations is not None and generations != self._generations:
+                self.invalidations += 1
+                self._entries.clear()
+            self._generations = generations
+            self._local_generation = local
+            self._checked = now
+        return generations
+
+    def _fresh(self, entry, generations):
+        value, entry_generations, stored = entry
+        if entry_generations != generations:
+            return False
+        return self.ttl is None or time.time() - stored < self.ttl
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for `key`, calling `compute()` and storing its result on a miss.
+        """
+        generations = self._current_generations()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._fresh(entry, generations):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        if self.path:
+            with self._disk_lock, shelve.open(self.path) as shelf:
+                entry = shelf.get(key)
+            if entry is not None and self._fresh(entry, generations):
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, entry)
+                return entry[0]
+
+        value = compute()
+        entry = (value, generations, time.time())
+        with self._lock:
+            self.misses += 1
+            self._store(key, entry)
+        if self.path:
+            with self._disk_lock, shelve.open(self.path) as shelf:
+                shelf[key] = entry
+        return value
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def query(self, query, parameters=None, compute=None):
+        """
+        Cached `compute()` keyed on the query text and parameters.
+        """
+        return self.get_or_compute(cache_key(query, parameters), compute)
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            with self._disk_lock, shelve.open(self.path, flag="n"):
+                pass
+
+    def stats(self):
+        """
+        Hit and miss counters, hit rate and current size, for sizing `max_entries`.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,168 @@
+import csv
+import re
+from datetime import time
+
+from pages.Incremental import row_hash
+
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+TRUE_VALUES = {"yes", "y", "true", "t", "1", "available"}
+FALSE_VALUES = {"no", "n", "false", "f", "0", "unavailable", "not available"}
+
+
+def to_int(value):
+    """
+    Parse an integer such as "12,500" or "Zone 2". Text around a single number is ignored.
+    """
+    numbers = NUMBER.findall(value.replace(",", ""))
+    if len(numbers) != 1:
+        raise ValueError(f"expected one integer, got {value!r}")
+    return int(float(numbers[0]))
+
+
+def to_float(value):
+    return float(value.replace(",", ""))
+
+
+def to_boolean(value):
+    normalised = value.strip().lower()
+    if normalised in TRUE_VALUES:
+        return True
+    if normalised in FALSE_VALUES:
+        return False
+    raise ValueError(f"expected a yes/no flag, got {value!r}")
+
+
+def to_time(value):
+    """
+    Parse "05:30", "5:30:00" or "5:30 AM" into a time of day.
+    """
+    match = re.fullmatch(r"\s*(\d{1,2})[:.](\d{2})(?::(\d{2}))?\s*([AaPp][Mm])?\s*", value)
+    if not match:
+        raise ValueError(f"expected a time of day, got {value!r}")
+    hour, minute, second, meridiem = match.groups()
+    hour = int(hour)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem.lower() == "pm" else 0)
+    return time(hour, int(minute), int(second or 0))
+
+
+def to_minutes(value):
+    """
+    Parse a duration or headway such as "45 mins", "1 hr 20 min" or "Every 10-15 minutes" into
+    minutes. Ranges keep their lower bound.
+    """
+    text = value.lower()
+    hours = re.search(r"(\d+(?:\.\d+)?)\s*(?:h|hr|hrs|hour|hours)\b", text)
+    minutes = re.search(r"(\d+(?:\.\d+)?)\s*(?:-\s*\d+\s*)?(?:m|min|mins|minute|minutes)\b", text)
+    if hours or minutes:
+        total = (float(hours.group(1)) * 60 if hours else 0.0) + (float(minutes.group(1)) if minutes else 0.0)
+        return int(round(total))
+    numbers = NUMBER.findall(text)
+    if not numbers:
+        raise ValueError(f"expected a duration, got {value!r}")
+    return int(round(float(numbers[0])))
+
+
+CONVERTERS = {
+    "int": to_int,
+    "float": to_float,
+    "boolean": to_boolean,
+    "time": to_time,
+    "minutes": to_minutes,
+}
+
+
+def coerce_row(parameters, schema, required=()):
+    """
+    Convert the fields named in `schema` ({parameter: type name}) in place. Blank values become None.
+    Raises ValueError naming the field when a value cannot be converted or a required field is blank;
+    the row is then left as it was read.
+    """
+    for field in required:
+        if parameters.get(field) in (None, ""):
+            raise ValueError(f"{field}: required value is missing")
+    converted = {}
+    for field, type_name in schema.items():
+        value = parameters.get(field)
+        if value is None or (isinstance(value, str) and value.strip() == ""):
+            converted[field] = None
+            continue
+        try:
+            converted[field] = CONVERTERS[type_name](value)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"{field}: {e}")
+    parameters.update(converted)
+    return parameters
+
+
+class RowTransform:
+    def __init__(self, schema, key):
+        """
+        Turn the parameters of one CSV row into a write-ready row: type the fields of `schema`,
+        require `key` and add the row content hash. Module-level and picklable, so worker
+        processes apply exactly the conversion the single-process import does.
+        """
+        self.schema = schema
+        self.key = key
+
+    def __call__(self, parameters):
+        coerce_row(parameters, self.schema, required=[self.key])
+        parameters["row_hash"] = row_hash(parameters)
+        return parameters
+
+
+class Quarantine:
+    def __init__(self, name, path=None, key_column=None, keep=1000):
+        """
+        Collect rows that fail conversion instead of aborting the load.
+        The first `keep` bad rows are kept (and written to `path`, if given); all are counted.
+        Values of `key_column` are remembered in `keys` so incremental imports do not treat a
+        quarantined row as removed.
+        """
+        self.name = name
+        self.path = path
+        self.key_column = key_column
+        self.keep = keep
+        self.count = 0
+        self.rows = []
+        self.keys = set()
+
+    def filter(self, rows, transform):
+        """
+        Yield `transform(row)` for every row, quarantining rows whose transform raises.
+        Line numbers count the CSV header as line 1; a CsvFeed reports the line each row ended on.
+        """
+        for line_number, row in enumerate(rows, start=2):
+            line_number = getattr(rows, "line_num", line_number)
+            try:
+                parameters = transform(row)
+            except (ValueError, KeyError) as e:
+                self.add(line_number, str(e), row)
+                continue
+            yield parameters
+
+    def add(self, line_number, reason, row):
+        """Quarantine one row that failed for `reason`"""
+        self.count += 1
+        if self.key_column and row.get(self.key_column):
+            self.keys.add(row[self.key_column])
+        if len(self.rows) < self.keep:
+            self.rows.append((line_number, reason, row))
+
+    def report(self):
+        """
+        Print the quarantine count and write the kept rows to `path`.
+        """
+        if not self.count:
+            return
+        print(f"{self.name}: {self.count} rows quarantined")
+        for line_number, reason, _ in self.rows[:5]:
+            print(f"  line {line_number}: {reason}")
+        if self.path:
+            fieldnames = ["line", "reason"] + list(self.rows[0][2].keys())
+            with open(self.path, mode="w", newline="", encoding="utf-8") as file:
+                writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction="ignore")
+                writer.writeheader()
+                for line_number, reason, row in self.rows:
+                    writer.writerow(dict(row, line=line_number, reason=reason))
+            print(f"  quarantined rows written to {self.path}")
@@ -0,0 +1,49 @@
+import configparser
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Setting -> (config file section, option, environment variable, default)
+SETTINGS = {
+    "uri": ("neo4j", "uri", "NEO4J_URI", "bolt://localhost:7687"),
+    "user": ("neo4j", "user", "NEO4J_USER", "neo4j"),
+    "password": ("neo4j", "password", "NEO4J_PASSWORD", None),
+    "pool_size": ("neo4j", "pool_size", "NEO4J_POOL_SIZE", "50"),
+    # Prometheus endpoint of the server, for its plan-cache counters, e.g. http://localhost:2004/metrics
+    "metrics_url": ("neo4j", "metrics_url", "NEO4J_METRICS_URL", None),
+    "data_dir": ("data", "dir", "TRANSIT_DATA_DIR", os.path.join(PROJECT_ROOT, "data")),
+    "dart_csv": ("data", "dart", "TRANSIT_DART_CSV", "DART_Dataset.csv"),
+    "luas_csv": ("data", "luas", "TRANSIT_LUAS_CSV", "LUAS_Dataset.csv"),
+    "bus_csv": ("data", "bus", "TRANSIT_BUS_CSV", "BUS_Dataset.csv"),
+    "batch_size": ("import", "batch_size", "TRANSIT_BATCH_SIZE", "1000"),
+}
+
+INTEGER_SETTINGS = {"pool_size", "batch_size"}
+
+DEFAULT_CONFIG_FILE = os.path.join(PROJECT_ROOT, "transit.ini")
+
+
+def load_config(path=None, overrides=None):
+    """
+    Settings from, in increasing priority: defaults, the INI file at `path` (or $TRANSIT_CONFIG,
+    or transit.ini in the project root), the environment, then non-None `overrides`.
+    Relative CSV names are resolved against `data_dir`.
+    """
+    path = path or os.environ.get("TRANSIT_CONFIG", DEFAULT_CONFIG_FILE)
+    parser = configparser.ConfigParser()
+    if os.path.exists(path):
+        parser.read(path, encoding="utf-8")
+
+    config = {}
+    for name, (section, option, variable, default) in SETTINGS.items():
+        value = parser.get(section, option, fallback=default)
+        value = os.environ.get(variable, value)
+        if overrides and overrides.get(name) is not None:
+            value = overrides[name]
+        if name in INTEGER_SETTINGS and value is not None:
+            value = int(value)
+        config[name] = value
+
+    for name in ("dart_csv", "luas_csv", "bus_csv"):
+        config[name] = os.path.join(config["data_dir"], config[name])
+    return config
@@ -0,0 +1,230 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from neo4j import GraphDatabase
+
+from pages.Instrumentation import QueryInstrumentation
+
+
+class ConnectionManager:
+    """
+    One pooled driver per (uri, user), shared by every pages/* and EDA class.
+    Sessions are handed out from a bounded pool and reused for runs of queries.
+    """
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, uri, user, password, pool_size=50, acquisition_timeout=60.0, max_retry_time=30.0,
+                 profile=False, metrics_url=None):
+        """
+        Create the pooled driver. With `profile` set, queries are sent with PROFILE so the
+        instrumentation also records db hits; `metrics_url` is the server's Prometheus endpoint, for its
+        plan-cache counters (see pages/Instrumentation.py). `acquisition_timeout` (seconds, None to wait forever)
+        also bounds the wait for a free session, see `session`.
+        """
+        self.uri = uri
+        self.user = user
+        self.pool_size = pool_size
+        self.acquisition_timeout = acquisition_timeout
+        self.config = {"pool_size": pool_size, "acquisition_timeout": acquisition_timeout,
+                       "max_retry_time": max_retry_time, "profile": profile, "metrics_url": metrics_url}
+        self.driver = self._create_driver(password, acquisition_timeout, max_retry_time)
+        self.closed = False
+        self._references = 0
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._state_lock = threading.Lock()
+        self._idle_sessions = []
+        self._in_use = 0
+        self._acquisitions = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._connect_time = 0.0
+        self.instrumentation = QueryInstrumentation(profile=profile, metrics_url=metrics_url)
+
+    def _create_driver(self, password, acquisition_timeout, max_retry_time):
+        return GraphDatabase.driver(
+            self.uri,
+            auth=(self.user, password),
+            max_connection_pool_size=self.pool_size,
+            connection_acquisition_timeout=acquisition_timeout,
+            max_transaction_retry_time=max_retry_time,
+        )
+
+    @classmethod
+    def get(cls, uri, user, password, **config):
+        """
+        Return the shared manager for `uri`/`user`, creating it on first use.
+        `config` (pool_size, acquisition_timeout, max_retry_time, profile, metrics_url) only applies when
+        the manager is created; settings that differ from those of the existing manager are reported and ignored.
+        """
+        key = (uri, user)
+        with cls._lock:
+            manager = cls._instances.get(key)
+            if manager is None or manager.closed:
+                manager = cls(uri, user, password, **config)
+                cls._instances[key] = manager
+            else:
+                ignored = {name: value for name, value in config.items() if manager.config.get(name) != value}
+                if ignored:
+                    print(f"Connection to {uri} is already open with {manager.config}, ignoring {ignored}")
+            manager._references += 1
+            return manager
+
+    @classmethod
+    def register(cls, uri, user, manager):
+        """
+        Install a pre-built manager for `uri`/`user`, e.g. an in-process stand-in backend,
+        so classes that call `get` share it instead of opening a driver.
+        """
+        with cls._lock:
+            cls._instances[(uri, user)] = manager
+        return manager
+
+    @classmethod
+    def close_all(cls):
+        """Close every shared driver regardless of outstanding references"""
+        with cls._lock:
+            managers = list(cls._instances.values())
+            cls._instances.clear()
+        for manager in managers:
+            manager._shutdown()
+
+    def release(self):
+        """Drop one reference; the driver is closed once nobody holds it"""
+        with ConnectionManager._lock:
+            self._references -= 1
+            if self._references > 0:
+                return
+            if ConnectionManager._instances.get((self.uri, self.user)) is self:
+                del ConnectionManager._instances[(self.uri, self.user)]
+        self._shutdown()
+
+    def _shutdown(self):
+        with self._state_lock:
+            if self.closed:
+                return
+            self.closed = True
+            idle, self._idle_sessions = self._idle_sessions, []
+        for session in idle:
+            session.close()
+        self.driver.close()
+
+    @contextmanager
+    def session(self, **session_config):
+        """
+        Borrow a session from the pool. The session goes back to the idle list afterwards
+        unless the block raised, in which case it is closed.
+        Passing `session_config` (e.g. fetch_size) opens a dedicated session that is closed afterwards.
+        Raises TimeoutError when no session frees up within `acquisition_timeout`, e.g. because
+        every slot is held by a caller that is itself waiting for a nested session.
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquisition_timeout):
+            raise TimeoutError(
+                f"No session free after {self.acquisition_timeout}s ({self.pool_size} in use); "
+                f"a session opened inside another session's block can exhaust the pool"
+            )
+        waited = time.perf_counter() - start
+        with self._state_lock:
+            session = self._idle_sessions.pop() if self._idle_sessions and not session_config else None
+            self._in_use += 1
+            self._acquisitions += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        if session is None:
+            session = self.driver.session(**session_config)
+
+        healthy = True
+        try:
+            yield session
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            with self._state_lock:
+                self._in_use -= 1
+                keep = healthy and not self.closed and not session_config
+                if keep:
+                    self._idle_sessions.append(session)
+            if not keep:
+                session.close()
+            self._slots.release()
+
+    def run(self, query, parameters=None):
+        """Run an auto-commit query on a pooled session and return all records"""
+        with self.session() as session:
+            start = time.perf_counter()
+            result = session.run(self.instrumentation.prepare(query), parameters)
+            records = [record for record in result]
+            summary = result.consume()
+            self.instrumentation.record(query, time.perf_counter() - start, len(records), summary)
+            return records
+
+    def stream(self, query, parameters=None, fetch_size=1000):
+        """
+        Run a query and yield its records lazily. The driver pulls `fetch_size` records per
+        round-trip, so memory stays bounded by one fetch regardless of the result size.
+        The session is held until the generator is exhausted or closed.
+        """
+        with self.session(fetch_size=fetch_size) as session:
+            start = time.perf_counter()
+            rows = 0
+            summary = None
+            try:
+                result = session.run(self.instrumentation.prepare(query), parameters)
+                for record in result:
+                    rows += 1
+                    yield record
+                summary = result.consume()
+            finally:
+                self.instrumentation.record(query, time.perf_counter() - start, rows, summary)
+
+    def paginate(self, query, parameters=None, key="key", page_size=1000, after=None):
+        """
+        Keyset pagination: yield records page by page from a query that filters on `$after`,
+        orders by the `key` column and ends in `LIMIT $page_size`. Each page starts after the last
+        key of the previous one, so deep pages cost the same as the first, provided an index on the
+        key serves both the filter and the ordering (e.g. a uniqueness constraint); otherwise every page
+        scans and sorts the whole match, and a single `stream` is cheaper.
+        """
+        while True:
+            page = self.run(query, dict(parameters or {}, after=after, page_size=page_size))
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1][key]
+
+    def execute_read(self, work, *args, **kwargs):
+        """Run `work(tx, ...)` as a managed read transaction, retried on transient errors"""
+        with self.session() as session:
+            return session.execute_read(work, *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        """Run `work(tx, ...)` as a managed write transaction, retried on transient errors"""
+        with self.session() as session:
+            return session.execute_write(work, *args, **kwargs)
+
+    def verify(self):
+        """Check connectivity and record how long the handshake took"""
+        start = time.perf_counter()
+        self.driver.verify_connectivity()
+        self._connect_time = time.perf_counter() - start
+
+    def metrics(self):
+        """
+        Pool metrics: sessions in use and idle, free slots, and acquisition wait times in milliseconds.
+        """
+        with self._state_lock:
+            acquisitions = self._acquisitions
+            return {
+                "pool_size": self.pool_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle_sessions),
+                "available": self.pool_size - self._in_use,
+                "acquisitions": acquisitions,
+                "wait_avg_ms": (self._wait_total / acquisitions * 1000) if acquisitions else 0.0,
+                "wait_max_ms": self._wait_max * 1000,
+                "connect_ms": self._connect_time * 1000,
+            }
@@ -1,86 +1,218 @@
-from neo4j import GraphDatabase
-import os
-import csv
+from pages.Batch import WriteError, write_rows
+from pages.Coerce import Quarantine, RowTransform
+from pages.Connection import ConnectionManager
+from pages.Generation import bump_generation
+from pages.Incremental import RowDiff
+from pages.Linker import TokenRelationshipBuilder
+from pages.Parallel import ParallelImport
+from pages.Queries import register
+from pages.Reader import CsvFeed
+
+# Query parameter name -> CSV column
+DART_COLUMNS = {
+    "StationName": "StationName",
+    "Operational": "Operational",
+    "Location": "Location",
+    "StationAddress": "Station Address",
+    "Eircode": "Eircode",
+    "ATM": "ATM",
+    "WeekendWorking": "Weekend Working",
+    "WiFiAccess": "Wi-Fi & Internet Access",
+    "Refreshments": "Refreshments",
+    "PhoneCharging": "Phone Charging",
+    "TicketVendingMachine": "Ticket Vending Machine",
+    "SmartCardEnabled": "Smart Card Enabled",
+    "RoutesServiced": "Routes Serviced",
+}
+
+# Typed fields: parameter -> converter name (see pages/Coerce.py)
+DART_SCHEMA = {
+    "Operational": "boolean",
+    "ATM": "boolean",
+    "WeekendWorking": "boolean",
+    "WiFiAccess": "boolean",
+    "Refreshments": "boolean",
+    "PhoneCharging": "boolean",
+    "TicketVendingMachine": "boolean",
+    "SmartCardEnabled": "boolean",
+}
+
+# CSV row parameters -> write-ready row (typed, hashed), shared with worker processes and exports
+DART_ROW = RowTransform(DART_SCHEMA, key="StationName")
+
+DART_IMPORT_QUERY = register("dart.import", """
+        MATCH (dart:Category {name: 'DART'})
+        UNWIND $rows AS row
+        MERGE (station:DartStation {name: row.StationName})
+        SET station:Station
+        SET station += {
+            operational: row.Operational,
+            location: row.Location,
+            address: row.StationAddress,
+            eircode: row.Eircode,
+            atm: row.ATM,
+            weekend_working: row.WeekendWorking,
+            wifi: row.WiFiAccess,
+            refreshments: row.Refreshments,
+            phone_charging: row.PhoneCharging,
+            ticket_machine: row.TicketVendingMachine,
+            smart_card_enabled: row.SmartCardEnabled,
+            routes_serviced: row.RoutesServiced,
+            row_hash: row.row_hash
+        }
+        MERGE (dart)-[:HAS_STATION]->(station)
+        RETURN elementId(station) AS id
+        """, {"rows": []})
+
+DART_HASH_QUERY = register("dart.hashes", """
+        MATCH (station:DartStation)
+        RETURN station.name AS key, station.row_hash AS row_hash
+        """, {})
+
+DART_DELETE_QUERY = register("dart.delete", """
+        MATCH (station:DartStation)
+        WHERE station.name IN $keys
+        DETACH DELETE station
+        """, {"keys": []})
+
 
 class DartExecution:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, **config):
         """Initialize the Neo4j connection"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.connection = ConnectionManager.get(uri, user, password, **config)
+        self.driver = self.connection.driver
+        self.last_written_ids = []
 
     def close(self):
-        """Close the Neo4j connection"""
-        if self.driver:
-            self.driver.close()
+        """Release the shared Neo4j connection"""
+        if self.connection:
+            self.connection.release()
+            self.connection = None
 
     def execute_query(self, query, parameters=None):
         """Execute a given Cypher query."""
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, parameters)
-                return [record for record in result]
-            except Exception as e:
-                print(f"Query execution failed: {e}")
-
-    def import_station_data(self, csv_file_path):
+        try:
+            return self.connection.run(query, parameters)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def stream_query(self, query, parameters=None, fetch_size=1000):
+        """Execute a given Cypher query and yield its records lazily, `fetch_size` at a time."""
+        try:
+            yield from self.connection.stream(query, parameters, fetch_size=fetch_size)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def _existing_hashes(self):
+        """
+        Row hashes of the DART stations already in the graph, keyed by station name.
+        """
+        return {record["key"]: record["row_hash"] for record in self.execute_query(DART_HASH_QUERY) or []}
+
+    def import_station_data(self, csv_file_path, batched=True, batch_size=1000, commit_interval=1, incremental=False,
+                            prefetch=4, quarantine_path=None, on_commit=None, encoding=None,
+                            processes=0, writers=2):
         """
         Import station data for the DART node from a CSV file.
+        Rows are sent in UNWIND batches unless `batched` is False, which falls back to one query per row.
+        Stations are merged on `name`, so re-running is idempotent. With `incremental` set only
+        added or changed rows are written and stations missing from the CSV are deleted.
+        `prefetch` is how many chunks CSV parsing may run ahead of the database writes.
+        Fields are converted per DART_SCHEMA; rows that fail are quarantined (and written to
+        `quarantine_path`, if given) instead of aborting the load.
+        The file may be gzip-compressed; its encoding is detected unless `encoding` is given.
+        Ids of the written stations are kept in `last_written_ids`; `on_commit(ids)` is called after
+        every committed batch, so relationships can be maintained as the import progresses.
+        With `processes` above zero, rows are parsed and typed in that many worker processes and written
+        by `writers` threads (see pages/Parallel.py); the graph is the same as with one process.
         """
-        if not os.path.exists(csv_file_path):
-            print(f"CSV file not found at path: {csv_file_path}")
+        try:
+            feed = CsvFeed(csv_file_path, DART_COLUMNS, encoding=encoding)
+        except (FileNotFoundError, ValueError) as e:
+            print(e)
             return
 
-        with open(csv_file_path, mode='r', encoding='latin1') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                query = """
-                MATCH (dart:Category {name: 'DART'})
-                CREATE (station:Station {
-                    name: $StationName,
-                    operational: $Operational,
-                    location: $Location,
-                    address: $StationAddress,
-                    eircode: $Eircode,
-                    atm: $ATM,
-                    weekend_working: $WeekendWorking,
-                    wifi: $WiFiAccess,
-                    refreshments: $Refreshments,
-                    phone_charging: $PhoneCharging,
-                    ticket_machine: $TicketVendingMachine,
-                    smart_card_enabled: $SmartCardEnabled,
-                    routes_serviced: $RoutesServiced
-                })
-                CREATE (dart)-[:HAS_STATION]->(station)
-                """
-                self.execute_query(
-                    query,
-                    parameters={
-                        "StationName": row["StationName"],
-                        "Operational": row["Operational"],
-                        "Location": row["Location"],
-                        "StationAddress": row["Station Address"],
-                        "Eircode": row["Eircode"],
-                        "ATM": row["ATM"],
-                        "WeekendWorking": row["Weekend Working"],
-                        "WiFiAccess": row["Wi-Fi & Internet Access"],
-                        "Refreshments": row["Refreshments"],
-                        "PhoneCharging": row["Phone Charging"],
-                        "TicketVendingMachine": row["Ticket Vending Machine"],
-                        "SmartCardEnabled": row["Smart Card Enabled"],
-                        "RoutesServiced": row["Routes Serviced"],
-                    },
+        diff = None
+        quarantine = Quarantine("DART import", path=quarantine_path, key_column="StationName")
+        parallel = None
+        if processes:
+            parallel = ParallelImport(self.connection, DART_IMPORT_QUERY, "StationName", label="DART import",
+                                      processes=processes, writers=writers, batch_size=batch_size,
+                                      on_commit=on_commit)
+            rows = parallel.rows(feed, DART_ROW, quarantine)
+        else:
+            rows = quarantine.filter(feed, DART_ROW)
+        if incremental:
+            diff = RowDiff(self._existing_hashes(), key="StationName")
+            rows = diff.filter(rows)
+        failure = None
+        try:
+            if parallel is not None:
+                self.last_written_ids = parallel.write(rows)
+            else:
+                self.last_written_ids = write_rows(
+                    self.connection,
+                    DART_IMPORT_QUERY,
+                    rows,
+                    batched=batched,
+                    batch_size=batch_size,
+                    commit_interval=commit_interval,
+                    prefetch=prefetch,
+                    label="DART import",
+                    on_commit=on_commit,
                 )
+        except WriteError as e:
+            failure = e
+            self.last_written_ids = e.written_ids
+
+        quarantine.report()
+        if diff is not None:
+            diff.seen.update(quarantine.keys)
+            # Keys after a failure were never read, so only a complete load may delete what it did not see
+            if failure is None:
+                if diff.removed:
+                    self.execute_query(DART_DELETE_QUERY, parameters={"keys": diff.removed})
+                diff.report("DART")
+        if self.last_written_ids or (diff is not None and failure is None and diff.removed):
+            bump_generation(self.connection, "DART")
+        if failure is not None:
+            print(f"DART import incomplete, no stations were deleted: {failure}")
+            raise failure
         print("DART imported successfully!")
+        return diff
 
-    def create_station_relationships(self):
+    def create_station_relationships(self, mode="client", record_tokens=False, batch_size=1000, node_ids=None,
+                                     partitioning=None):
         """
         Create relationships between stations based on shared routes.
+        Routes are tokenized once into an inverted index, so only stations that actually
+        share a route are paired. `mode` is "client" or "server" (see TokenRelationshipBuilder).
+        Existing relationships are replaced; with `node_ids` only those stations are relinked.
+        A `partitioning` (see pages/Partition.py) makes a full rebuild resumable, one range of
+        station names per transaction.
+        """
+        builder = self._route_builder(batch_size)
+        builder.build(mode=mode, record_tokens=record_tokens, node_ids=node_ids, partitioning=partitioning)
+        bump_generation(self.connection, "DART")
+        print("Relationships between stations created successfully!")
+
+    def _route_builder(self, batch_size=1000):
+        return TokenRelationshipBuilder(
+            self.connection,
+            "DartStation",
+            "routes_serviced",
+            "CONNECTED_TO",
+            token_property="route_tokens",
+            batch_size=batch_size,
+            key_property="name",
+            fulltext_index="dart_station_routes",
+        )
+
+    def link_stations(self, node_ids):
         """
-        query = """
-        MATCH (station1:Station), (station2:Station)
-        WHERE station1 <> station2
-        AND ANY(route IN split(station1.routes_serviced, ', ') 
-                WHERE route IN split(station2.routes_serviced, ', '))
-        CREATE (station1)-[:CONNECTED_TO]->(station2)
+        Link just the stations in `node_ids` to the stations they share a route with, e.g. as the
+        `on_commit` hook of an import. Cost follows the number of stations given, not the graph size.
         """
-        self.execute_query(query)
-        print("Relationships between stations created successfully!")
\ No newline at end of file
+        linked = self._route_builder().link(node_ids)
+        bump_generation(self.connection, "DART")
+        return linked
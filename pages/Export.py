@@ -0,0 +1,245 @@
+import csv
+import os
+from datetime import time
+
+from pages.Bus import BUS_COLUMNS, BUS_ROW, BUS_SCHEMA
+from pages.Coerce import Quarantine
+from pages.Dart import DART_COLUMNS, DART_ROW, DART_SCHEMA
+from pages.Linker import shared_token_pairs, tokenize
+from pages.Luas import LUAS_COLUMNS, LUAS_ROW, LUAS_SCHEMA, interchange_edges, line_edges
+from pages.Reader import CsvFeed
+
+# Query parameter -> node property, matching the SET clauses of the *_IMPORT_QUERY statements
+DART_PROPERTIES = {
+    "StationName": "name",
+    "Operational": "operational",
+    "Location": "location",
+    "StationAddress": "address",
+    "Eircode": "eircode",
+    "ATM": "atm",
+    "WeekendWorking": "weekend_working",
+    "WiFiAccess": "wifi",
+    "Refreshments": "refreshments",
+    "PhoneCharging": "phone_charging",
+    "TicketVendingMachine": "ticket_machine",
+    "SmartCardEnabled": "smart_card_enabled",
+    "RoutesServiced": "routes_serviced",
+    "row_hash": "row_hash",
+}
+
+LUAS_PROPERTIES = dict({param: param for param in LUAS_COLUMNS}, Station_Name="name", row_hash="row_hash")
+
+BUS_PROPERTIES = {
+    "Route_Number": "Route Number",
+    "From": "From",
+    "To": "To",
+    "Route_Type": "Route Type",
+    "Frequency": "Frequency",
+    "Duration": "Duration",
+    "Key_Landmarks": "Key Landmarks",
+    "Peak_Hours": "Peak Hours",
+    "Operator": "Operator",
+    "Primary_Areas_Served": "Primary Areas Served",
+    "row_hash": "row_hash",
+}
+
+# Converter name (see pages/Coerce.py) -> neo4j-admin header type
+HEADER_TYPES = {
+    "int": "long",
+    "float": "double",
+    "boolean": "boolean",
+    "time": "localtime",
+    "minutes": "long",
+}
+
+# Kept in step with MasterNode.create_master_parent_child_node
+CATEGORIES = [
+    {"name": "DART", "type": "Rail", "operator": "Irish Rail", "routes_count": 1,
+     "description": "Dublin Area Rapid Transit"},
+    {"name": "LUAS", "type": "Tram", "operator": "Transdev", "routes_count": 2,
+     "description": "Dublin Light Rail System"},
+    {"name": "BUS", "type": "Road", "operator": "Dublin Bus", "routes_count": 130,
+     "description": "Dublin public bus service"},
+]
+
+
+def format_value(value):
+    """Render a typed value the way neo4j-admin import parses it"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, time):
+        return value.isoformat()
+    return value
+
+
+class BulkExport:
+    def __init__(self, output_dir, delimiter=","):
+        """
+        Write header-typed node and relationship CSVs for `neo4j-admin database import full`.
+        Node ids are namespaced strings ("dart:<name>", "luas:<Station_ID>", "bus:<Route Number>").
+        """
+        self.output_dir = output_dir
+        self.delimiter = delimiter
+        self.node_files = []
+        self.relationship_files = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _write(self, file_name, header, rows):
+        path = os.path.join(self.output_dir, file_name)
+        count = 0
+        with open(path, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file, delimiter=self.delimiter)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow([format_value(value) for value in row])
+                count += 1
+        print(f"{file_name}: {count} rows")
+        return path
+
+    def _node_file(self, file_name, labels, properties, schema, records, id_prefix, key):
+        """
+        Write one node file. `records` are typed parameter dicts; `properties` maps parameters to
+        property names and `schema` gives their header types.
+        """
+        header = ["id:ID"]
+        for param, name in properties.items():
+            header.append(f"{name}:{HEADER_TYPES[schema[param]]}" if param in schema else name)
+        extra = []
+        if "Latitude" in properties:
+            header.append("coordinates:point{crs:WGS-84}")
+            extra.append(lambda record: None if record["Latitude"] is None or record["Longitude"] is None
+                         else f"{{latitude:{record['Latitude']}, longitude:{record['Longitude']}}}")
+        header.append(":LABEL")
+        rows = (
+            [f"{id_prefix}:{record[key]}"] + [record[param] for param in properties]
+            + [column(record) for column in extra] + [labels]
+            for record in records.values()
+        )
+        self.node_files.append(self._write(file_name, header, rows))
+
+    def _relationship_file(self, file_name, properties, rows):
+        header = [":START_ID", ":END_ID", ":TYPE"] + properties
+        self.relationship_files.append(self._write(file_name, header, rows))
+
+    def _read(self, csv_file_path, name, columns, transform):
+        """
+        Typed parameter dicts keyed by the row key, mapped and coerced by the loaders' RowTransform.
+        A repeated key keeps its last row, matching MERGE followed by SET.
+        """
+        quarantine = Quarantine(name, key_column=transform.key)
+        feed = CsvFeed(csv_file_path, columns)
+        records = {parameters[transform.key]: parameters for parameters in quarantine.filter(feed, transform)}
+        quarantine.report()
+        return records
+
+    def export_master(self):
+        """The Ireland country node, its transport categories and HAS_TRANSPORT edges"""
+        self.node_files.append(self._write("nodes_country.csv", ["id:ID", "name", ":LABEL"],
+                                           [["country:Ireland", "Ireland", "Country"]]))
+        self.node_files.append(self._write(
+            "nodes_category.csv",
+            ["id:ID", "name", "type", "operator", "routes_count:long", "description", ":LABEL"],
+            ([f"category:{c['name']}", c["name"], c["type"], c["operator"], c["routes_count"], c["description"],
+              "Category"] for c in CATEGORIES),
+        ))
+        self._relationship_file(
+            "rels_has_transport.csv", [],
+            (["country:Ireland", f"category:{c['name']}", "HAS_TRANSPORT"] for c in CATEGORIES),
+        )
+
+    def export_dart(self, csv_file_path):
+        """DART stations, HAS_STATION edges and shared-route CONNECTED_TO edges"""
+        records = self._read(csv_file_path, "DART export", DART_COLUMNS, DART_ROW)
+        self._node_file("nodes_dart.csv", "Station;DartStation", DART_PROPERTIES, DART_SCHEMA, records,
+                        "dart", "StationName")
+        self._relationship_file(
+            "rels_dart_has_station.csv", [],
+            (["category:DART", f"dart:{key}", "HAS_STATION"] for key in records),
+        )
+        pairs = shared_token_pairs((key, tokenize(record["RoutesServiced"])) for key, record in records.items())
+        self._relationship_file(
+            "rels_dart_connected.csv", [],
+            ([f"dart:{source}", f"dart:{target}", "CONNECTED_TO"] for source, target in pairs),
+        )
+
+    def export_luas(self, csv_file_path, order_by="station_id"):
+        """LUAS stations, HAS_STATION edges, adjacent-stop CONNECTED_TO and INTERCHANGE edges"""
+        records = self._read(csv_file_path, "LUAS export", LUAS_COLUMNS, LUAS_ROW)
+        self._node_file("nodes_luas.csv", "Station;LuasStation", LUAS_PROPERTIES, LUAS_SCHEMA, records,
+                        "luas", "Station_ID")
+        self._relationship_file(
+            "rels_luas_has_station.csv", [],
+            (["category:LUAS", f"luas:{key}", "HAS_STATION"] for key in records),
+        )
+        stations = [
+            {
+                "id": f"luas:{key}",
+                "name": record["Station_Name"],
+                "line": record["Line"],
+                "station_id": key,
+                "type": record["Type"],
+                "interchange": record["Interchange"],
+                "latitude": record["Latitude"],
+                "longitude": record["Longitude"],
+            }
+            for key, record in records.items()
+        ]
+        properties = ["travel_time:double", "distance_km:double", "line"]
+        self._relationship_file(
+            "rels_luas_connected.csv", properties,
+            ([edge["source"], edge["target"], "CONNECTED_TO", edge["travel_time"], edge["distance_km"], edge["line"]]
+             for edge in line_edges(stations, order_by)),
+        )
+        self._relationship_file(
+            "rels_luas_interchange.csv", properties,
+            ([edge["source"], edge["target"], "INTERCHANGE", edge["travel_time"], edge["distance_km"], None]
+             for edge in interchange_edges(stations)),
+        )
+
+    def export_bus(self, csv_file_path):
+        """BUS routes, HAS_ROUTE edges, SHARES_LANDMARK and shared From/To CONNECTED_TO edges"""
+        records = self._read(csv_file_path, "BUS export", BUS_COLUMNS, BUS_ROW)
+        self._node_file("nodes_bus.csv", "Route;BusRoute", BUS_PROPERTIES, BUS_SCHEMA, records,
+                        "bus", "Route_Number")
+        self._relationship_file(
+            "rels_bus_has_route.csv", [],
+            (["category:BUS", f"bus:{key}", "HAS_ROUTE"] for key in records),
+        )
+        landmarks = shared_token_pairs((key, tokenize(record["Key_Landmarks"])) for key, record in records.items())
+        self._relationship_file(
+            "rels_bus_landmarks.csv", [],
+            ([f"bus:{source}", f"bus:{target}", "SHARES_LANDMARK"] for source, target in landmarks),
+        )
+        # Routes starting at the same place or ending at the same place, as in create_route_connections
+        endpoints = shared_token_pairs(
+            (key, [f"{end}:{record[end]}" for end in ("From", "To") if record[end]])
+            for key, record in records.items()
+        )
+        self._relationship_file(
+            "rels_bus_connected.csv", [],
+            ([f"bus:{source}", f"bus:{target}", "CONNECTED_TO"] for source, target in endpoints),
+        )
+
+    def export_all(self, dart_csv, luas_csv, bus_csv):
+        """
+        Export every dataset and return the neo4j-admin command that loads the files.
+        """
+        self.export_master()
+        self.export_dart(dart_csv)
+        self.export_luas(luas_csv)
+        self.export_bus(bus_csv)
+        return self.import_command()
+
+    def import_command(self, database="neo4j"):
+        """
+        The `neo4j-admin database import full` arguments for the files written so far.
+        Run it against a stopped, empty database, then apply the schema with
+        MasterNode.create_constraints_and_indexes.
+        """
+        command = ["neo4j-admin", "database", "import", "full", database,
+                   f"--delimiter={self.delimiter}", "--ignore-empty-strings=true", "--overwrite-destination=true"]
+        command += [f"--nodes={path}" for path in self.node_files]
+        command += [f"--relationships={path}" for path in self.relationship_files]
+        return command
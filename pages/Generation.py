@@ -0,0 +1,62 @@
+import itertools
+
+from pages.Queries import register
+
+# Per-mode change counters stored in the graph. Loaders bump their mode's counter after every
+# write, so projections and caches can tell whether the data they were built from is stale.
+SCOPES = ("DART", "LUAS", "BUS")
+
+# Writes made from this process, so in-process caches notice them without a round-trip
+_local_writes = itertools.count(1)
+_local_generation = 0
+
+BUMP_QUERY = register("generation.bump", """
+        MERGE (g:GraphGeneration {scope: $scope})
+        SET g.generation = coalesce(g.generation, 0) + 1, g.updated_at = datetime()
+        RETURN g.generation AS generation
+        """, {"scope": "DART"})
+
+GENERATIONS_QUERY = register("generation.list", """
+        MATCH (g:GraphGeneration)
+        RETURN g.scope AS scope, g.generation AS generation
+        """, {})
+
+
+def bump_generation(connection, scope):
+    """
+    Record that the data of `scope` changed. Returns the new generation, or None if the update failed.
+    """
+    global _local_generation
+    _local_generation = next(_local_writes)
+    try:
+        records = connection.run(BUMP_QUERY, {"scope": scope})
+        return records[0]["generation"] if records else None
+    except Exception as e:
+        print(f"Generation update for {scope} failed: {e}")
+
+
+async def bump_generation_async(connection, scope):
+    """
+    bump_generation for an AsyncConnectionManager.
+    """
+    global _local_generation
+    _local_generation = next(_local_writes)
+    try:
+        records = await connection.run(BUMP_QUERY, {"scope": scope})
+        return records[0]["generation"] if records else None
+    except Exception as e:
+        print(f"Generation update for {scope} failed: {e}")
+
+
+def current_generations(connection):
+    """
+    {scope: generation} for every scope written so far.
+    """
+    return {record["scope"]: record["generation"] for record in connection.run(GENERATIONS_QUERY)}
+
+
+def local_generation():
+    """
+    Number of generation bumps made by this process; changes whenever a loader here writes.
+    """
+    return _local_generation
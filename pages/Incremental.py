@@ -0,0 +1,51 @@
+import hashlib
+
+
+def row_hash(parameters):
+    """
+    Content hash of a mapped CSV row, independent of column order.
+    """
+    content = "\x1f".join(f"{key}={parameters[key]}" for key in sorted(parameters) if key != "row_hash")
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class RowDiff:
+    def __init__(self, existing_hashes, key):
+        """
+        Compare incoming rows against `existing_hashes` ({key value: row_hash}) already in the graph.
+        `key` is the parameter name that identifies a row.
+        """
+        self.existing_hashes = existing_hashes
+        self.key = key
+        self.added = []
+        self.changed = []
+        self.unchanged = 0
+        self.seen = set()
+
+    def filter(self, rows):
+        """
+        Yield only rows that are new or whose content hash changed.
+        """
+        for row in rows:
+            key = row[self.key]
+            self.seen.add(key)
+            previous = self.existing_hashes.get(key)
+            if previous is None:
+                self.added.append(key)
+            elif previous != row["row_hash"]:
+                self.changed.append(key)
+            else:
+                self.unchanged += 1
+                continue
+            yield row
+
+    @property
+    def removed(self):
+        """Keys present in the graph but missing from the source"""
+        return [key for key in self.existing_hashes if key not in self.seen]
+
+    def report(self, name):
+        print(
+            f"{name} incremental import: {len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged"
+        )
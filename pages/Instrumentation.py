@@ -0,0 +1,260 @@
+import csv
+import json
+import re
+import threading
+import urllib.request
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf")]
+
+STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+NUMBER_LITERAL = re.compile(r"(?<![\w$`.])-?\d+(?:\.\d+)?\b")
+WHITESPACE = re.compile(r"\s+")
+# Statements the server refuses to PROFILE
+PLAN_PREFIX = re.compile(r"^\s*(?:EXPLAIN|PROFILE)\s+", re.I)
+UNPROFILABLE = re.compile(r"^\s*(?:EXPLAIN|PROFILE|CREATE\s+(?:CONSTRAINT|INDEX|POINT|RANGE|TEXT)|DROP\s|SHOW\s)", re.I)
+# Cypher query-cache counters in the server's Prometheus metrics, e.g.
+# neo4j_database_neo4j_cypher_cache_executable_query_cache_hits_total 1234.0
+CACHE_METRIC = re.compile(r"^(\w*cypher_(?:cache|replan)\w*)(?:\{[^}]*\})?\s+(\S+)$")
+
+
+def normalize_query(query):
+    """
+    Collapse whitespace and replace string and number literals with `?`, so queries that only
+    differ by inlined values are grouped together.
+    """
+    query = STRING_LITERAL.sub("?", query)
+    query = NUMBER_LITERAL.sub("?", query)
+    return WHITESPACE.sub(" ", query).strip()
+
+
+def profile_query(query):
+    """The query prefixed with PROFILE, or None when the server cannot profile it"""
+    if UNPROFILABLE.match(query) or "IN TRANSACTIONS" in query.upper():
+        return None
+    return f"PROFILE {query}"
+
+
+def server_plan_cache(metrics_url, timeout=5.0):
+    """
+    The server's own Cypher cache counters (hits, misses, compilations, discards, replans), read from
+    its Prometheus endpoint, e.g. http://localhost:2004/metrics with server.metrics.prometheus.enabled.
+    `hit_rate` is computed from the executable query cache hits and misses when both are reported.
+    Returns None when the endpoint cannot be read; not every edition exposes it.
+    """
+    try:
+        with urllib.request.urlopen(metrics_url, timeout=timeout) as response:
+            text = response.read().decode("utf-8")
+    except (OSError, ValueError) as e:
+        print(f"Server plan cache metrics unavailable: {e}")
+        return None
+    counters = {}
+    for line in text.splitlines():
+        match = CACHE_METRIC.match(line.strip())
+        if match:
+            try:
+                counters[match.group(1)] = counters.get(match.group(1), 0.0) + float(match.group(2))
+            except ValueError:
+                continue
+    hits = sum(value for name, value in counters.items() if "executable_query_cache_hits" in name)
+    misses = sum(value for name, value in counters.items() if "executable_query_cache_misses" in name)
+    return {"counters": counters, "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None}
+
+
+def db_hits(plan):
+    """Total db hits of a profiled plan and its children"""
+    if not plan:
+        return 0
+    return plan.get("dbHits", 0) + sum(db_hits(child) for child in plan.get("children", []))
+
+
+class QueryStats:
+    def __init__(self, query):
+        """Aggregated timings for one normalized query"""
+        self.query = query
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.available_ms = 0
+        self.consumed_ms = 0
+        self.db_hits = 0
+        self.profiled = 0
+        self.histogram = [0] * len(BUCKETS_MS)
+
+    def add(self, wall_ms, rows, available_ms, consumed_ms, hits):
+        self.count += 1
+        self.total_ms += wall_ms
+        self.max_ms = max(self.max_ms, wall_ms)
+        self.rows += rows
+        self.available_ms += available_ms or 0
+        self.consumed_ms += consumed_ms or 0
+        if hits is not None:
+            self.db_hits += hits
+            self.profiled += 1
+        for i, bound in enumerate(BUCKETS_MS):
+            if wall_ms <= bound:
+                self.histogram[i] += 1
+                break
+
+    def percentile(self, fraction):
+        """Upper bound of the histogram bucket holding the given fraction of calls"""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= target and count:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            "query": self.query,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "server_available_ms": self.available_ms,
+            "server_consumed_ms": self.consumed_ms,
+            "db_hits": self.db_hits if self.profiled else None,
+            "histogram": dict(zip([str(bound) for bound in BUCKETS_MS], self.histogram)),
+        }
+
+
+class QueryInstrumentation:
+    def __init__(self, profile=False, metrics_url=None):
+        """
+        Per-query wall time, rows, server timings and (with `profile`) PROFILE db hits,
+        grouped by normalized query text. With `metrics_url` (the server's Prometheus endpoint)
+        plan_cache also reports the server's own query-cache counters.
+        """
+        self.profile = profile
+        self.metrics_url = metrics_url
+        self.enabled = True
+        self._stats = {}
+        # Exact query text -> [executions, server ms to first record on the first run, on later runs]
+        self._texts = {}
+        self._lock = threading.Lock()
+
+    def prepare(self, query):
+        """The query text to send: PROFILE-prefixed when profiling is on and the query allows it"""
+        if self.enabled and self.profile:
+            return profile_query(query) or query
+        return query
+
+    def record(self, query, wall_seconds, rows, summary=None):
+        """
+        Add one execution. `summary` is the driver's ResultSummary, if the result was consumed.
+        """
+        if not self.enabled:
+            return
+        available = consumed = hits = None
+        if summary is not None:
+            available = summary.result_available_after
+            consumed = summary.result_consumed_after
+            if summary.profile:
+                hits = db_hits(summary.profile)
+        key = normalize_query(query)
+        text = PLAN_PREFIX.sub("", query)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(key)
+            stats.add(wall_seconds * 1000, rows, available, consumed, hits)
+            seen = self._texts.get(text)
+            if seen is None:
+                self._texts[text] = [1, available or 0, 0]
+            else:
+                seen[0] += 1
+                seen[2] += available or 0
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._texts.clear()
+
+    def plan_cache(self, limit=5):
+        """
+        Plan-cache use. `estimated_hit_rate` is a client-side estimate: the server caches plans by
+        query text, so the first run of a text (including an EXPLAIN warm-up) is counted as planned and
+        every later run as a hit, even if the server evicted or replanned it. `server` holds the server's
+        own counters (see server_plan_cache) when a `metrics_url` is set, otherwise None.
+        Also lists the normalized queries sent as the most distinct texts: values inlined into the
+        query string, which defeat the cache.
+        """
+        with self._lock:
+            texts = {text: list(seen) for text, seen in self._texts.items()}
+        executions = sum(seen[0] for seen in texts.values())
+        repeats = executions - len(texts)
+        variants = {}
+        for text in texts:
+            key = normalize_query(text)
+            variants[key] = variants.get(key, 0) + 1
+        inlined = sorted(
+            ({"query": key, "texts": count} for key, count in variants.items() if count > 1),
+            key=lambda entry: entry["texts"],
+            reverse=True,
+        )
+        return {
+            "executions": executions,
+            "distinct_texts": len(texts),
+            "estimated_hits": repeats,
+            "estimated_hit_rate": round(repeats / executions, 3) if executions else None,
+            "first_run_available_ms": round(sum(seen[1] for seen in texts.values()) / len(texts), 2) if texts else None,
+            "repeat_available_ms": round(sum(seen[2] for seen in texts.values()) / repeats, 2) if repeats else None,
+            "inlined_values": inlined[:limit],
+            "server": server_plan_cache(self.metrics_url) if self.metrics_url else None,
+        }
+
+    def snapshot(self):
+        """Statistics per normalized query, slowest total first"""
+        with self._lock:
+            stats = [stats.as_dict() for stats in self._stats.values()]
+        return sorted(stats, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def to_json(self, path):
+        with open(path, mode="w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+    def to_csv(self, path):
+        """One row per query with its latency histogram flattened into bucket columns"""
+        fieldnames = ["query", "count", "total_ms", "mean_ms", "p50_ms", "p95_ms", "max_ms", "rows",
+                      "server_available_ms", "server_consumed_ms", "db_hits"]
+        buckets = [f"le_{bound}ms" for bound in BUCKETS_MS]
+        with open(path, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=fieldnames + buckets)
+            writer.writeheader()
+            for entry in self.snapshot():
+                histogram = entry.pop("histogram")
+                writer.writerow(dict(entry, **dict(zip(buckets, histogram.values()))))
+
+    def report(self, limit=15, width=70):
+        """
+        Print the `limit` queries with the highest total time.
+        """
+        entries = self.snapshot()
+        print("\nQuery profile (by total time):")
+        print(f"{'Calls':>7}{'Total ms':>11}{'Mean':>9}{'p95':>9}{'Max':>9}{'Rows':>9}{'DB hits':>10}  Query")
+        for entry in entries[:limit]:
+            text = entry["query"] if len(entry["query"]) <= width else entry["query"][:width - 3] + "..."
+            hits = "-" if entry["db_hits"] is None else entry["db_hits"]
+            print(
+                f"{entry['count']:>7}{entry['total_ms']:>11.1f}{entry['mean_ms']:>9.1f}{entry['p95_ms']:>9.1f}"
+                f"{entry['max_ms']:>9.1f}{entry['rows']:>9}{hits:>10}  {text}"
+            )
+        if len(entries) > limit:
+            print(f"... {len(entries) - limit} more queries")
+        cache = self.plan_cache()
+        if cache["executions"]:
+            print(
+                f"Plan cache (estimated): {cache['estimated_hit_rate']:.0%} of {cache['executions']} executions "
+                f"repeated a query text, {cache['distinct_texts']} distinct query texts"
+            )
+        server = cache["server"]
+        if server and server["hit_rate"] is not None:
+            print(f"Plan cache (server): {server['hit_rate']:.0%} executable query cache hit rate")
+            for entry in cache["inlined_values"]:
+                print(f"  {entry['texts']} texts differ only by inlined values: {entry['query'][:width]}")
@@ -0,0 +1,277 @@
+from collections import defaultdict
+
+from pages.Batch import BatchWriter
+from pages.Partition import replace_edges
+from pages.Queries import quote
+
+
+def tokenize(value, separator=","):
+    """
+    Split a delimited string into stripped, de-duplicated tokens, keeping their order.
+    """
+    if not value:
+        return []
+    tokens = (token.strip() for token in value.split(separator))
+    return list(dict.fromkeys(token for token in tokens if token))
+
+
+def shared_token_pairs(items):
+    """
+    Build an inverted index (token -> node ids) from `(node_id, tokens)` items and
+    return {(source, target): [shared tokens]} for every ordered pair that shares a token.
+    """
+    index = defaultdict(list)
+    for node_id, tokens in items:
+        for token in tokens:
+            index[token].append(node_id)
+
+    pairs = defaultdict(list)
+    for token, node_ids in index.items():
+        if len(node_ids) < 2:
+            continue
+        for source in node_ids:
+            for target in node_ids:
+                if source != target:
+                    pairs[(source, target)].append(token)
+    return pairs
+
+
+def phrase_query(token):
+    """
+    Lucene phrase query matching `token` in a full-text index, with quotes and backslashes escaped.
+    """
+    return '"' + token.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class TokenRelationshipBuilder:
+    def __init__(self, connection, label, property_name, rel_type, token_property=None,
+                 separator=",", batch_size=1000, key_property="name", fulltext_index=None):
+        """
+        Link nodes of `label` whose delimited `property_name` values share at least one token.
+        `token_property` is where the server-side mode stores the tokenized list.
+        `key_property` is the label's unique key, used to split partitioned builds into key ranges.
+        `fulltext_index` is a full-text index on `property_name`; with it, relinking a few nodes
+        looks up their partners through the index instead of reading every node (see `link`).
+        """
+        self.connection = connection
+        self.label = quote(label)
+        self.property_name = quote(property_name)
+        self.rel_name = rel_type
+        self.rel_type = quote(rel_type)
+        self.token_property = quote(token_property or f"{property_name}_tokens".replace(" ", "_"))
+        self.separator = separator
+        self.batch_size = batch_size
+        self.key_property = quote(key_property)
+        self.fulltext_index = fulltext_index
+
+    def build(self, mode="client", record_tokens=False, node_ids=None, partitioning=None):
+        """
+        Create one relationship per ordered pair of nodes sharing a token.
+        `mode` is "client" (index built in Python) or "server" (list property plus UNWIND).
+        If `record_tokens` is set, the shared tokens are stored as `shared_tokens` on each relationship.
+        Existing relationships of this type are replaced. When `node_ids` is given, only relationships
+        touching those nodes are removed and rebuilt, through `link` if the builder has a full-text index.
+        With `partitioning` (see pages/Partition.py) a full client-side rebuild replaces the relationships
+        one key range of source nodes at a time, each in its own checkpointed transaction.
+        """
+        if mode not in ("client", "server"):
+            raise ValueError(f"Unknown relationship build mode: {mode!r}")
+        if partitioning is not None and node_ids is None:
+            if mode == "server":
+                raise ValueError("Partitioned builds compute pairs client-side; use mode='client'")
+            return self._build_partitioned(record_tokens, partitioning)
+        if node_ids is not None and self.fulltext_index:
+            return self.link(node_ids, record_tokens)
+        self._delete_existing(node_ids)
+        if mode == "client":
+            return self._build_client(record_tokens, node_ids)
+        return self._build_server(record_tokens, node_ids)
+
+    def _delete_existing(self, node_ids):
+        if node_ids is None:
+            self.connection.run(
+                f"""
+                MATCH (a:{self.label})-[r:{self.rel_type}]->(b:{self.label})
+                WHERE a.{self.property_name} IS NOT NULL AND b.{self.property_name} IS NOT NULL
+                CALL {{ WITH r DELETE r }} IN TRANSACTIONS OF 10000 ROWS
+                """
+            )
+        else:
+            self.connection.run(
+                f"""
+                MATCH (a:{self.label})-[r:{self.rel_type}]-(b:{self.label})
+                WHERE elementId(a) IN $ids AND b.{self.property_name} IS NOT NULL
+                WITH DISTINCT r
+                DELETE r
+                """,
+                {"ids": list(node_ids)},
+            )
+
+    def link(self, node_ids, record_tokens=False):
+        """
+        Incrementally relink `node_ids`, e.g. the nodes written by the last import batch.
+        Their tokens are looked up in the full-text index to find partners, each candidate is checked
+        for an exact token match, and both directions of every pair are written with MERGE, so the cost
+        follows the size of the delta rather than of the graph and reruns never duplicate edges.
+        Relationships the nodes had before are removed first, in case their tokens changed.
+        """
+        if not self.fulltext_index:
+            raise ValueError("Incremental linking needs a full-text index on the token property")
+        node_ids = list(node_ids)
+        if not node_ids:
+            return 0
+        self._delete_existing(node_ids)
+
+        holders = defaultdict(set)
+        for record in self.connection.run(
+            f"""
+            MATCH (n:{self.label})
+            WHERE elementId(n) IN $ids AND n.{self.property_name} IS NOT NULL
+            RETURN elementId(n) AS id, n.{self.property_name} AS value
+            """,
+            {"ids": node_ids},
+        ):
+            for token in tokenize(record["value"], self.separator):
+                holders[token].add(record["id"])
+        if not holders:
+            return 0
+
+        partners = self.connection.run(
+            f"""
+            UNWIND $tokens AS entry
+            CALL db.index.fulltext.queryNodes($index, entry.phrase) YIELD node
+            WHERE node:{self.label}
+              AND entry.token IN [token IN split(node.{self.property_name}, $separator) | trim(token)]
+            RETURN entry.token AS token, elementId(node) AS id
+            """,
+            {
+                "index": self.fulltext_index,
+                "separator": self.separator,
+                "tokens": [{"token": token, "phrase": phrase_query(token)} for token in holders],
+            },
+        )
+        members = defaultdict(set)
+        for record in partners:
+            members[record["token"]].add(record["id"])
+
+        pairs = defaultdict(list)
+        for token, linked in holders.items():
+            for source in linked:
+                for target in members[token] | linked:
+                    if source != target:
+                        pairs[(source, target)].append(token)
+                        pairs[(target, source)].append(token)
+
+        set_clause = "SET r.shared_tokens = row.shared" if record_tokens else ""
+        writer = BatchWriter(
+            self.connection,
+            f"""
+            UNWIND $rows AS row
+            MATCH (a) WHERE elementId(a) = row.source
+            MATCH (b) WHERE elementId(b) = row.target
+            MERGE (a)-[r:{self.rel_type}]->(b)
+            {set_clause}
+            """,
+            batch_size=self.batch_size,
+            label=f"{self.rel_name} incremental relationships",
+        )
+        return writer.write(
+            {"source": source, "target": target, "shared": list(dict.fromkeys(shared))}
+            for (source, target), shared in sorted(pairs.items())
+        )
+
+    def _pairs(self):
+        records = self.connection.stream(
+            f"""
+            MATCH (n:{self.label})
+            WHERE n.{self.property_name} IS NOT NULL
+            RETURN elementId(n) AS id, n.{self.property_name} AS value
+            """
+        )
+        return shared_token_pairs(
+            (record["id"], tokenize(record["value"], self.separator)) for record in records
+        )
+
+    def _create_query(self, record_tokens):
+        set_clause = "SET r.shared_tokens = row.shared" if record_tokens else ""
+        return f"""
+            UNWIND $rows AS row
+            MATCH (a) WHERE elementId(a) = row.source
+            MATCH (b) WHERE elementId(b) = row.target
+            CREATE (a)-[r:{self.rel_type}]->(b)
+            {set_clause}
+            """
+
+    def _build_partitioned(self, record_tokens, partitioning):
+        edges = (
+            {"source": source, "target": target, "shared": shared}
+            for (source, target), shared in self._pairs().items()
+        )
+        return replace_edges(
+            self.connection,
+            partitioning,
+            self.label,
+            self.key_property,
+            self.rel_type,
+            edges,
+            self._create_query(record_tokens),
+            target_filter=f"AND b.{self.property_name} IS NOT NULL",
+        )
+
+    def _build_client(self, record_tokens, node_ids):
+        pairs = self._pairs()
+        if node_ids is not None:
+            touched = set(node_ids)
+            pairs = {
+                pair: shared for pair, shared in pairs.items()
+                if pair[0] in touched or pair[1] in touched
+            }
+
+        writer = BatchWriter(
+            self.connection,
+            self._create_query(record_tokens),
+            batch_size=self.batch_size,
+            label=f"{self.rel_name} relationships",
+        )
+        return writer.write(
+            {"source": source, "target": target, "shared": shared}
+            for (source, target), shared in pairs.items()
+        )
+
+    def _build_server(self, record_tokens, node_ids):
+        self.connection.run(
+            f"""
+            MATCH (n:{self.label})
+            WHERE n.{self.property_name} IS NOT NULL
+            WITH n, [token IN split(n.{self.property_name}, $separator) WHERE trim(token) <> '' | trim(token)] AS tokens
+            SET n.{self.token_property} = reduce(unique = [], token IN tokens |
+                CASE WHEN token IN unique THEN unique ELSE unique + token END)
+            """,
+            {"separator": self.separator},
+        )
+
+        set_clause = "SET r.shared_tokens = shared" if record_tokens else ""
+        records = self.connection.run(
+            f"""
+            MATCH (n:{self.label})
+            WHERE n.{self.token_property} IS NOT NULL
+            UNWIND n.{self.token_property} AS token
+            WITH token, collect(n) AS members
+            WHERE size(members) > 1
+            UNWIND members AS a
+            UNWIND members AS b
+            WITH a, b, token
+            WHERE a <> b AND ($ids IS NULL OR elementId(a) IN $ids OR elementId(b) IN $ids)
+            WITH a, b, collect(token) AS shared
+            CALL {{
+                WITH a, b, shared
+                CREATE (a)-[r:{self.rel_type}]->(b)
+                {set_clause}
+            }} IN TRANSACTIONS OF $batch_size ROWS
+            RETURN count(*) AS created
+            """,
+            {"batch_size": self.batch_size, "ids": None if node_ids is None else list(node_ids)},
+        )
+        created = records[0]["created"] if records else 0
+        print(f"{self.rel_name} relationships: {created} created server-side")
+        return created
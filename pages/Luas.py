@@ -1,108 +1,461 @@
-from neo4j import GraphDatabase
-import os
-import csv
+import re
+from collections import defaultdict
+
+from pages.Batch import BatchWriter, WriteError, write_rows
+from pages.Coerce import Quarantine, RowTransform
+from pages.Connection import ConnectionManager
+from pages.Generation import bump_generation
+from pages.Geo import haversine_km, to_float
+from pages.Incremental import RowDiff
+from pages.Parallel import ParallelImport
+from pages.Partition import replace_edges
+from pages.Queries import register
+from pages.Reader import CsvFeed
+from pages.Spatial import StationIndex
+
+# Query parameter name -> CSV column
+LUAS_COLUMNS = {
+    "Station_Name": "Station Name",
+    "Station_ID": "Station_ID",
+    "Line": "Line",
+    "Location": "Location",
+    "Key_Features_Attractions": "Key Features/Attractions",
+    "Type": "Type (Terminus/Regular)",
+    "Interchange": "Interchange",
+    "Zone": "Zone",
+    "Daily_Footfall": "Daily Footfall",
+    "Facilities": "Facilities",
+    "Accessibility": "Accessibility",
+    "Latitude": "Latitude",
+    "Longitude": "Longitude",
+    "Parking_Availability": "Parking Availability",
+    "Nearby_Landmarks": "Nearby Landmarks",
+    "First_Tram_Time": "First Tram Time",
+    "Last_Tram_Time": "Last Tram Time",
+}
+
+# Typed fields: parameter -> converter name (see pages/Coerce.py)
+LUAS_SCHEMA = {
+    "Zone": "int",
+    "Daily_Footfall": "int",
+    "Latitude": "float",
+    "Longitude": "float",
+    "First_Tram_Time": "time",
+    "Last_Tram_Time": "time",
+}
+
+# CSV row parameters -> write-ready row (typed, hashed), shared with worker processes and exports
+LUAS_ROW = RowTransform(LUAS_SCHEMA, key="Station_ID")
+
+LUAS_IMPORT_QUERY = register("luas.import", """
+        MATCH (luas:Category {name: 'LUAS'})
+        UNWIND $rows AS row
+        MERGE (station:LuasStation {Station_ID: row.Station_ID})
+        SET station:Station
+        SET station += {
+            name: row.Station_Name,
+            Line: row.Line,
+            Location: row.Location,
+            Key_Features_Attractions: row.Key_Features_Attractions,
+            Type: row.Type,
+            Interchange: row.Interchange,
+            Zone: row.Zone,
+            Daily_Footfall: row.Daily_Footfall,
+            Facilities: row.Facilities,
+            Accessibility: row.Accessibility,
+            Latitude: row.Latitude,
+            Longitude: row.Longitude,
+            coordinates: CASE WHEN row.Latitude IS NULL OR row.Longitude IS NULL THEN null
+                              ELSE point({latitude: row.Latitude, longitude: row.Longitude}) END,
+            Parking_Availability: row.Parking_Availability,
+            Nearby_Landmarks: row.Nearby_Landmarks,
+            First_Tram_Time: row.First_Tram_Time,
+            Last_Tram_Time: row.Last_Tram_Time,
+            row_hash: row.row_hash
+        }
+        MERGE (luas)-[:HAS_STATION]->(station)
+        RETURN elementId(station) AS id
+        """, {"rows": []})
+
+LUAS_HASH_QUERY = register("luas.hashes", """
+        MATCH (station:LuasStation)
+        RETURN station.Station_ID AS key, station.row_hash AS row_hash
+        """, {})
+
+LUAS_DELETE_QUERY = register("luas.delete", """
+        MATCH (station:LuasStation)
+        WHERE station.Station_ID IN $keys
+        DETACH DELETE station
+        """, {"keys": []})
+
+# Lines of stations about to be deleted, so the gaps they leave can be relinked
+LUAS_LINES_QUERY = register("luas.lines", """
+        MATCH (station:LuasStation)
+        WHERE station.Station_ID IN $keys AND station.Line IS NOT NULL
+        RETURN DISTINCT station.Line AS line
+        """, {"keys": []})
+
+# Lines the given stations are currently linked on, which differ from their Line after a move
+LUAS_LINKED_LINES_QUERY = register("luas.linked_lines", """
+        MATCH (station:LuasStation)-[r:CONNECTED_TO]-(:LuasStation)
+        WHERE elementId(station) IN $ids AND r.line IS NOT NULL
+        RETURN DISTINCT r.line AS line
+        """, {"ids": []})
+
+# Stations interchanged with the given ones, whose interchange edges are replaced along with theirs
+LUAS_INTERCHANGE_NEIGHBOURS_QUERY = register("luas.interchange_neighbours", """
+        MATCH (station:LuasStation)-[:INTERCHANGE]-(other:LuasStation)
+        WHERE elementId(station) IN $ids
+        RETURN DISTINCT elementId(other) AS id
+        """, {"ids": []})
+
+# Travel-time model for line and interchange edges (minutes, km/h)
+TRAM_SPEED_KMH = 20.0
+DWELL_MINUTES = 0.5
+DEFAULT_TRAVEL_TIME = 5.0
+WALK_SPEED_KMH = 4.8
+TRANSFER_MINUTES = 3.0
+INTERCHANGE_RADIUS_KM = 0.5
+
+LUAS_TOPOLOGY_QUERY = register("luas.topology", """
+        MATCH (station:LuasStation)
+        RETURN elementId(station) AS id, station.name AS name, station.Line AS line,
+               station.Station_ID AS station_id, station.Type AS type,
+               station.Interchange AS interchange,
+               station.Latitude AS latitude, station.Longitude AS longitude
+        """, {})
+
+
+def natural_key(value):
+    """
+    Sort key that orders embedded numbers numerically, so "LU10" follows "LU9".
+    """
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", value or "")]
+
+
+def _distance(a, b):
+    if None in (a["latitude"], a["longitude"], b["latitude"], b["longitude"]):
+        return None
+    return haversine_km(a["latitude"], a["longitude"], b["latitude"], b["longitude"])
+
+
+def order_line_stations(stations, order_by="station_id"):
+    """
+    Order the stations of one line from terminus to terminus.
+    "station_id" sorts on Station_ID; "coordinates" chains nearest neighbours starting from a
+    terminus (or the station furthest from the others when no terminus is marked).
+    """
+    if order_by == "station_id":
+        return sorted(stations, key=lambda station: natural_key(station["station_id"]))
+    if order_by != "coordinates":
+        raise ValueError(f"Unknown station ordering: {order_by!r}")
+
+    located = [station for station in stations if station["latitude"] is not None and station["longitude"] is not None]
+    if len(located) < 2:
+        return sorted(stations, key=lambda station: natural_key(station["station_id"]))
+
+    termini = [station for station in located if (station["type"] or "").lower().startswith("terminus")]
+    if termini:
+        current = min(termini, key=lambda station: natural_key(station["station_id"]))
+    else:
+        current = max(located, key=lambda station: sum(_distance(station, other) for other in located))
+
+    ordered = [current]
+    remaining = [station for station in located if station is not current]
+    while remaining:
+        current = min(remaining, key=lambda station: _distance(current, station))
+        remaining.remove(current)
+        ordered.append(current)
+    return ordered + [station for station in stations if station not in located]
+
+
+def travel_minutes(distance_km, speed_kmh, extra_minutes):
+    """Minutes to cover `distance_km` at `speed_kmh` plus a fixed overhead."""
+    if distance_km is None:
+        return None
+    return round(distance_km / speed_kmh * 60 + extra_minutes, 1)
+
+
+def line_edges(stations, order_by="station_id"):
+    """
+    Adjacent-stop edges, in both directions, for every line. Returns rows for the relationship writer.
+    """
+    by_line = defaultdict(list)
+    for station in stations:
+        if station["line"]:
+            by_line[station["line"]].append(station)
+
+    edges = []
+    for line, members in by_line.items():
+        ordered = order_line_stations(members, order_by)
+        for a, b in zip(ordered, ordered[1:]):
+            distance = _distance(a, b)
+            minutes = travel_minutes(distance, TRAM_SPEED_KMH, DWELL_MINUTES)
+            row = {
+                "line": line,
+                "distance_km": None if distance is None else round(distance, 3),
+                "travel_time": DEFAULT_TRAVEL_TIME if minutes is None else minutes,
+            }
+            edges.append(dict(row, source=a["id"], target=b["id"]))
+            edges.append(dict(row, source=b["id"], target=a["id"]))
+    return edges
+
+
+def interchange_edges(stations, radius_km=INTERCHANGE_RADIUS_KM):
+    """
+    Link each interchange station to its counterpart on other lines: the station with the same
+    name, or failing that the nearest station on another line within `radius_km`, found with a
+    StationIndex (pages/Spatial.py).
+    """
+    by_name = defaultdict(list)
+    for station in stations:
+        by_name[(station["name"] or "").strip().lower()].append(station)
+    index = None
+
+    edges = {}
+    for station in stations:
+        if (station["interchange"] or "").strip().lower() != "yes":
+            continue
+        counterparts = [
+            other for other in by_name[(station["name"] or "").strip().lower()]
+            if other["id"] != station["id"] and other["line"] != station["line"]
+        ]
+        if not counterparts and station["latitude"] is not None and station["longitude"] is not None:
+            if index is None:
+                index = StationIndex(stations)
+            nearby = index.neighbours(station["latitude"], station["longitude"], radius_km)
+            nearest = next((other for _, other in nearby if other["line"] != station["line"]), None)
+            counterparts = [nearest] if nearest is not None else []
+
+        for other in counterparts:
+            distance = _distance(station, other)
+            minutes = travel_minutes(distance, WALK_SPEED_KMH, TRANSFER_MINUTES)
+            row = {
+                "distance_km": None if distance is None else round(distance, 3),
+                "travel_time": TRANSFER_MINUTES if minutes is None else minutes,
+            }
+            edges[(station["id"], other["id"])] = dict(row, source=station["id"], target=other["id"])
+            edges[(other["id"], station["id"])] = dict(row, source=other["id"], target=station["id"])
+    return list(edges.values())
+
 
 class LuasExecution:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, **config):
         """Initialize the Neo4j connection"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.connection = ConnectionManager.get(uri, user, password, **config)
+        self.driver = self.connection.driver
+        self.last_written_ids = []
+        self.removed_lines = []
 
     def close(self):
-        """Close the Neo4j connection"""
-        if self.driver:
-            self.driver.close()
+        """Release the shared Neo4j connection"""
+        if self.connection:
+            self.connection.release()
+            self.connection = None
 
     def execute_query(self, query, parameters=None):
         """Execute a given Cypher query."""
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, parameters)
-                return [record for record in result]
-            except Exception as e:
-                print(f"Query execution failed: {e}")
-
-    def import_luas_data(self, csv_file_path):
+        try:
+            return self.connection.run(query, parameters)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def stream_query(self, query, parameters=None, fetch_size=1000):
+        """Execute a given Cypher query and yield its records lazily, `fetch_size` at a time."""
+        try:
+            yield from self.connection.stream(query, parameters, fetch_size=fetch_size)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def _existing_hashes(self):
+        """
+        Row hashes of the LUAS stations already in the graph, keyed by Station_ID.
+        """
+        return {record["key"]: record["row_hash"] for record in self.execute_query(LUAS_HASH_QUERY) or []}
+
+    def import_luas_data(self, csv_file_path, batched=True, batch_size=1000, commit_interval=1, incremental=False,
+                         prefetch=4, quarantine_path=None, on_commit=None, encoding=None,
+                         processes=0, writers=2):
         """
-        Import station data for the DART node from a CSV file.
+        Import station data for the LUAS node from a CSV file.
+        Rows are sent in UNWIND batches unless `batched` is False, which falls back to one query per row.
+        Stations are merged on `Station_ID`, so re-running is idempotent. With `incremental` set only
+        added or changed rows are written and stations missing from the CSV are deleted.
+        `prefetch` is how many chunks CSV parsing may run ahead of the database writes.
+        Fields are converted per LUAS_SCHEMA; rows that fail are quarantined (and written to
+        `quarantine_path`, if given) instead of aborting the load.
+        The file may be gzip-compressed; its encoding is detected unless `encoding` is given.
+        Ids of the written stations are kept in `last_written_ids`; `on_commit(ids)` is called after
+        every committed batch, so relationships can be maintained as the import progresses.
+        Lines of stations deleted by an incremental import are kept in `removed_lines` for relinking.
+        With `processes` above zero, rows are parsed and typed in that many worker processes and written
+        by `writers` threads (see pages/Parallel.py); the graph is the same as with one process.
         """
-        if not os.path.exists(csv_file_path):
-            print(f"CSV file not found at path: {csv_file_path}")
+        try:
+            feed = CsvFeed(csv_file_path, LUAS_COLUMNS, encoding=encoding)
+        except (FileNotFoundError, ValueError) as e:
+            print(e)
             return
 
-        with open(csv_file_path, mode='r', encoding='latin1') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                query = """
-                MATCH (luas:Category {name: 'LUAS'})
-                 CREATE (station:Station 
-                 {
-                    name: $Station_Name,
-                    Line: $Line,
-                    Station_ID: $Station_ID,
-                    Location: $Location,
-                    Key_Features_Attractions: $Key_Features_Attractions,
-                    Type: $Type,
-                    Interchange: $Interchange,
-                    Zone: $Zone,
-                    Daily_Footfall: $Daily_Footfall,
-                    Facilities: $Facilities,
-                    Accessibility: $Accessibility,
-                    Latitude: $Latitude,
-                    Longitude: $Longitude,
-                    Parking_Availability: $Parking_Availability,
-                    Nearby_Landmarks: $Nearby_Landmarks,
-                    First_Tram_Time: $First_Tram_Time,
-                    Last_Tram_Time: $Last_Tram_Time
-                })
-                CREATE (luas)-[:HAS_STATION]->(station)
-                """
-                self.execute_query(
-                    query,
-                    parameters={
-                        "Station_Name": row["Station Name"],
-                        "Station_ID": row["Station_ID"],
-                        "Line": row["Line"],
-                        "Location": row["Location"],
-                        "Key_Features_Attractions": row["Key Features/Attractions"],
-                        "Type": row["Type (Terminus/Regular)"],
-                        "Interchange": row["Interchange"],
-                        "Zone": row["Zone"],
-                        "Daily_Footfall": row["Daily Footfall"],
-                        "Facilities": row["Facilities"],
-                        "Accessibility": row["Accessibility"],
-                        "Latitude": row["Latitude"],
-                        "Longitude": row["Longitude"],
-                        "Parking_Availability": row["Parking Availability"],
-                        "Nearby_Landmarks": row["Nearby Landmarks"],
-                        "First_Tram_Time": row["First Tram Time"],
-                        "Last_Tram_Time": row["Last Tram Time"],
-                    },
+        diff = None
+        self.removed_lines = []
+        quarantine = Quarantine("LUAS import", path=quarantine_path, key_column="Station_ID")
+        parallel = None
+        if processes:
+            parallel = ParallelImport(self.connection, LUAS_IMPORT_QUERY, "Station_ID", label="LUAS import",
+                                      processes=processes, writers=writers, batch_size=batch_size,
+                                      on_commit=on_commit)
+            rows = parallel.rows(feed, LUAS_ROW, quarantine)
+        else:
+            rows = quarantine.filter(feed, LUAS_ROW)
+        if incremental:
+            diff = RowDiff(self._existing_hashes(), key="Station_ID")
+            rows = diff.filter(rows)
+        failure = None
+        try:
+            if parallel is not None:
+                self.last_written_ids = parallel.write(rows)
+            else:
+                self.last_written_ids = write_rows(
+                    self.connection,
+                    LUAS_IMPORT_QUERY,
+                    rows,
+                    batched=batched,
+                    batch_size=batch_size,
+                    commit_interval=commit_interval,
+                    prefetch=prefetch,
+                    label="LUAS import",
+                    on_commit=on_commit,
                 )
+        except WriteError as e:
+            failure = e
+            self.last_written_ids = e.written_ids
+
+        quarantine.report()
+        if diff is not None:
+            diff.seen.update(quarantine.keys)
+            # Keys after a failure were never read, so only a complete load may delete what it did not see
+            if failure is None:
+                if diff.removed:
+                    records = self.execute_query(LUAS_LINES_QUERY, parameters={"keys": diff.removed}) or []
+                    self.removed_lines = [record["line"] for record in records]
+                    self.execute_query(LUAS_DELETE_QUERY, parameters={"keys": diff.removed})
+                diff.report("LUAS")
+        if self.last_written_ids or (diff is not None and failure is None and diff.removed):
+            bump_generation(self.connection, "LUAS")
+        if failure is not None:
+            print(f"LUAS import incomplete, no stations were deleted: {failure}")
+            raise failure
         print("LUAS imported successfully!")
+        return diff
 
-    def create_luas_station_relationships(self):
+    def _load_topology(self):
+        """
+        Fetch the LUAS stations with the fields needed to order lines and find interchanges.
         """
-        Create relationships between LUAS stations based on shared line.
+        stations = []
+        for record in self.execute_query(LUAS_TOPOLOGY_QUERY) or []:
+            station = record.data()
+            station["latitude"] = to_float(station["latitude"])
+            station["longitude"] = to_float(station["longitude"])
+            stations.append(station)
+        return stations
+
+    def _write_edges(self, rel_type, edges, partitioning=None):
         """
-        query = """
-        MATCH (station1:Station), (station2:Station)
-        WHERE station1 <> station2
-        AND station1.Line = station2.Line
-        CREATE (station1)-[:CONNECTED_TO {travel_time: 5}]->(station2)
+        Write precomputed edges. With `partitioning` the existing `rel_type` relationships are replaced
+        one Station_ID range at a time instead (see pages/Partition.py).
         """
-        self.execute_query(query)
-        print("Relationships between LUAS stations created based on shared line.")
+        query = f"""
+            UNWIND $rows AS row
+            MATCH (a) WHERE elementId(a) = row.source
+            MATCH (b) WHERE elementId(b) = row.target
+            CREATE (a)-[r:{rel_type}]->(b)
+            SET r.travel_time = row.travel_time, r.distance_km = row.distance_km, r.line = row.line
+            """
+        if partitioning is not None:
+            return replace_edges(self.connection, partitioning, "LuasStation", "Station_ID", rel_type, edges, query)
+        writer = BatchWriter(self.connection, query, label=f"LUAS {rel_type} relationships")
+        return writer.write(edges)
+
+    def _delete_relationships(self, rel_type, node_ids):
+        """
+        Remove LUAS relationships of `rel_type`, either all of them or only those touching `node_ids`.
+        """
+        if node_ids is None:
+            self.execute_query(
+                f"""
+                MATCH (:LuasStation)-[r:{rel_type}]->(:LuasStation)
+                CALL {{ WITH r DELETE r }} IN TRANSACTIONS OF 10000 ROWS
+                """
+            )
+        else:
+            self.execute_query(
+                f"""
+                MATCH (station:LuasStation)-[r:{rel_type}]-(:LuasStation)
+                WHERE elementId(station) IN $ids
+                WITH DISTINCT r
+                DELETE r
+                """,
+                parameters={"ids": node_ids},
+            )
 
-    def create_interchange_relationships(self):
+    def create_luas_station_relationships(self, node_ids=None, order_by="station_id", partitioning=None, lines=None):
         """
-        Create relationships between stations that are interchanges.
+        Create relationships between consecutive LUAS stations on each line.
+        Stations are ordered along the line by Station_ID (or by coordinates, see `order_by`) and only
+        adjacent stops are linked, with travel_time derived from the haversine distance between them.
+        Existing line relationships are replaced. With `node_ids` and/or `lines` only the affected lines
+        are rebuilt: those named in `lines` (e.g. `removed_lines` after an incremental import), those
+        containing the stations and those the stations were linked on before moving to another line.
+        A `partitioning` makes a full rebuild resumable (see pages/Partition.py).
+        """
+        stations = self._load_topology()
+        if node_ids is not None or lines is not None:
+            touched = set(node_ids or ())
+            affected = set(lines or ())
+            affected.update(station["line"] for station in stations if station["id"] in touched)
+            if touched:
+                records = self.execute_query(LUAS_LINKED_LINES_QUERY, parameters={"ids": list(touched)}) or []
+                affected.update(record["line"] for record in records)
+            stations = [station for station in stations if station["line"] in affected]
+            node_ids = list(touched | {station["id"] for station in stations})
+            if not node_ids:
+                print("No LUAS lines affected; line relationships unchanged.")
+                return
+            partitioning = None
+        if partitioning is None:
+            self._delete_relationships("CONNECTED_TO", node_ids)
+        self._write_edges("CONNECTED_TO", line_edges(stations, order_by), partitioning)
+        bump_generation(self.connection, "LUAS")
+        print("Relationships between LUAS stations created based on shared line.")
+
+    def create_interchange_relationships(self, node_ids=None, partitioning=None, lines=None):
         """
-        query = """
-        MATCH (station1:Station), (station2:Station)
-        WHERE station1 <> station2
-        AND station1.Interchange = 'Yes'
-        AND station2.Interchange = 'Yes'
-        CREATE (station1)-[:INTERCHANGE {travel_time: 10}]->(station2)
+        Create relationships between interchange stations and their counterparts on other lines.
+        With `node_ids` and/or `lines` only the interchange edges of the affected stations are replaced:
+        the stations themselves, every station on their lines or on `lines` (whose nearest counterpart
+        may have changed) and the stations they were interchanged with. When none of them has or gets
+        an interchange nothing is written. A `partitioning` makes a full rebuild resumable.
         """
-        self.execute_query(query)
-        print("Interchange relationships created between LUAS stations.")
\ No newline at end of file
+        stations = self._load_topology()
+        edges = interchange_edges(stations)
+        if node_ids is not None or lines is not None:
+            touched = set(node_ids or ())
+            affected_lines = set(lines or ())
+            affected_lines.update(station["line"] for station in stations if station["id"] in touched)
+            affected = touched | {station["id"] for station in stations if station["line"] in affected_lines}
+            records = self.execute_query(LUAS_INTERCHANGE_NEIGHBOURS_QUERY, parameters={"ids": list(affected)}) or []
+            linked = {record["id"] for record in records}
+            replaced = affected | linked
+            edges = [edge for edge in edges if edge["source"] in replaced or edge["target"] in replaced]
+            if not edges and not linked:
+                print("No LUAS interchanges affected; interchange relationships unchanged.")
+                return
+            node_ids = list(replaced)
+            partitioning = None
+        if partitioning is None:
+            self._delete_relationships("INTERCHANGE", node_ids)
+        self._write_edges("INTERCHANGE", edges, partitioning)
+        bump_generation(self.connection, "LUAS")
+        print("Interchange relationships created between LUAS stations.")
@@ -1,31 +1,79 @@
-from neo4j import GraphDatabase
+from pages.Connection import ConnectionManager
+from pages.Queries import register
+from pages.Schema import ensure_schema, migrate_mode_labels
+
+COUNTRY_QUERY = register("master.country", "MERGE (country:Country {name: $name})", {"name": "Ireland"})
+
+CATEGORY_QUERY = register(
+    "master.category",
+    """
+    MERGE (c:Category {name: $name})
+    SET c.type = $type,
+        c.operator = $operator,
+        c.routes_count = $routes_count,
+        c.description = $description
+    """,
+    {"name": "DART", "type": "Rail", "operator": "Irish Rail", "routes_count": 1, "description": ""},
+)
+
+HAS_TRANSPORT_QUERY = register(
+    "master.has_transport",
+    """
+    MATCH (country:Country {name: $country})
+    MATCH (category:Category) WHERE category.name IN $categories
+    MERGE (country)-[:HAS_TRANSPORT]->(category)
+    """,
+    {"country": "Ireland", "categories": ["DART"]},
+)
+
 
 class MasterNode:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, **config):
         """Initialize the Neo4j connection"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.connection = ConnectionManager.get(uri, user, password, **config)
+        self.driver = self.connection.driver
 
     def close(self):
-        """Close the Neo4j connection"""
-        if self.driver:
-            self.driver.close()
+        """Release the shared Neo4j connection"""
+        if self.connection:
+            self.connection.release()
+            self.connection = None
 
     def execute_query(self, query, parameters=None):
         """Execute a given Cypher query."""
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, parameters)
-                return [record for record in result]
-            except Exception as e:
-                print(f"Query execution failed: {e}")
+        try:
+            return self.connection.run(query, parameters)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def stream_query(self, query, parameters=None, fetch_size=1000):
+        """Execute a given Cypher query and yield its records lazily, `fetch_size` at a time."""
+        try:
+            yield from self.connection.stream(query, parameters, fetch_size=fetch_size)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def create_constraints_and_indexes(self):
+        """
+        Create the uniqueness constraints and indexes used by the MERGE-based imports,
+        after adding mode labels to any nodes imported before they existed.
+        """
+        try:
+            migrated = migrate_mode_labels(self.connection)
+            if any(migrated.values()):
+                print(f"Mode labels added to existing nodes: {migrated}")
+            ensure_schema(self.connection)
+            print("Constraints and indexes are in place.")
+        except Exception as e:
+            print(f"Schema creation failed: {e}")
 
     def create_master_parent_child_node(self):
         """
         Create Ireland as a parent node, add transport categories,
-        and establish relationships between them.
+        and establish relationships between them. Nodes are merged, so re-running is safe.
         """
         # Step 1: Create the Parent Node (Ireland)
-        self.execute_query("CREATE (Ireland:Country {name: 'Ireland'})")
+        self.execute_query(COUNTRY_QUERY, parameters={"name": "Ireland"})
 
         # Step 2: Create Transport Categories with Properties
         transport_categories = [
@@ -53,27 +101,10 @@ class MasterNode:
         ]
 
         for category in transport_categories:
-            self.execute_query(
-                f"""
-                CREATE (c:Category {{
-                    name: '{category['name']}',
-                    type: '{category['type']}',
-                    operator: '{category['operator']}',
-                    routes_count: {category['routes_count']},
-                    description: '{category['description']}'
-                }})
-                """
-            )
+            self.execute_query(CATEGORY_QUERY, parameters=category)
 
         # Step 3: Connect Transport Categories to Ireland
         self.execute_query(
-            """
-            MATCH (Ireland:Country {name: 'Ireland'}),
-                  (dart:Category {name: 'DART'}),
-                  (luas:Category {name: 'LUAS'}),
-                  (bus:Category {name: 'BUS'})
-            CREATE (Ireland)-[:HAS_TRANSPORT]->(dart),
-                   (Ireland)-[:HAS_TRANSPORT]->(luas),
-                   (Ireland)-[:HAS_TRANSPORT]->(bus)
-            """
+            HAS_TRANSPORT_QUERY,
+            parameters={"country": "Ireland", "categories": [category["name"] for category in transport_categories]},
         )
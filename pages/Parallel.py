@@ -0,0 +1,234 @@
+import csv
+import io
+import mmap
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pages.Batch import WriteError, run_commit_hook
+from pages.Partition import run_in_transaction
+from pages.Reader import record
+
+# Bytes of CSV per parse task; many small ranges keep every process busy and bound what is buffered
+RANGE_BYTES = 4 * 2 ** 20
+# Encodings in which quotes and newlines are single bytes, so a file can be split on raw bytes
+SPLITTABLE_ENCODINGS = {"utf-8", "utf-8-sig", "latin1"}
+SCAN_BLOCK = 1 << 20
+
+_DONE = object()
+
+
+def _count(data, byte, start, end):
+    """Occurrences of `byte` in data[start:end], counted a block at a time"""
+    total = 0
+    for offset in range(start, end, SCAN_BLOCK):
+        total += data[offset:min(offset + SCAN_BLOCK, end)].count(byte)
+    return total
+
+
+def record_ranges(path, range_bytes=RANGE_BYTES):
+    """
+    Split the data rows of an uncompressed CSV into (start, end, first line) byte ranges of about
+    `range_bytes` each, leaving out the header. A newline only ends a record when an even number of
+    quotes precedes it, so a quoted field spanning lines is never cut in two.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    starts = []
+    with open(path, mode="rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = quotes = newlines = target = 0
+        while True:
+            if target > position:
+                quotes += _count(data, b'"', position, target)
+                newlines += _count(data, b"\n", position, target)
+                position = target
+            # Move to the start of the next record
+            while True:
+                newline = data.find(b"\n", position)
+                if newline == -1:
+                    position = size
+                    break
+                quotes += _count(data, b'"', position, newline)
+                newlines += 1
+                position = newline + 1
+                if quotes % 2 == 0:
+                    break
+            if position >= size:
+                break
+            starts.append((position, newlines + 1))
+            target = position + range_bytes
+    ends = [start for start, _ in starts[1:]] + [size]
+    return [(start, end, line) for (start, line), end in zip(starts, ends)]
+
+
+def parse_range(path, encoding, delimiter, positions, transform, start, end, first_line):
+    """
+    Worker process: parse the records in bytes [start, end) of `path` and apply `transform` to each.
+    Returns (write-ready rows, rejected rows as (line, reason, parameters)). Line numbers are those
+    a CsvFeed would report for the same rows.
+    """
+    with open(path, mode="rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode(encoding)
+    reader = csv.reader(io.StringIO(text, newline=""), delimiter=delimiter)
+    rows = []
+    rejected = []
+    for row in reader:
+        if not row:
+            continue
+        parameters = record(row, positions)
+        try:
+            rows.append(transform(parameters))
+        except (ValueError, KeyError) as e:
+            rejected.append((first_line + reader.line_num - 1, str(e), parameters))
+    return rows, rejected
+
+
+class ParallelImport:
+    def __init__(self, connection, query, key, label="Parallel import", processes=None, writers=2, batch_size=1000,
+                 range_bytes=RANGE_BYTES, queue_size=4, on_commit=None):
+        """
+        Import a CSV with parsing and typing spread over `processes` worker processes (default: one per
+        core) and `writers` threads sending `UNWIND $rows AS row` batches of `batch_size` rows.
+        Rows are routed to writers by their `key`, so every row of one key is written by the same thread
+        in file order and the graph ends up as a single-process import leaves it.
+        Each writer's queue holds at most `queue_size` batches, so parsing cannot outrun the database.
+        `on_commit(ids)` is called after each committed batch, one call at a time, on a thread of its own
+        so writers never wait for a hook's round trips.
+        """
+        if writers < 1:
+            raise ValueError("writers must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.connection = connection
+        self.query = query
+        self.key = key
+        self.label = label
+        self.processes = processes or os.cpu_count() or 1
+        self.writers = writers
+        self.batch_size = batch_size
+        self.range_bytes = range_bytes
+        self.queue_size = queue_size
+        self.on_commit = on_commit
+        self.written_ids = []
+        self.committed = 0
+        self.errors = []
+        self._lock = threading.Lock()
+        self._hooks = None
+
+    def rows(self, feed, transform, quarantine):
+        """
+        Transformed rows of `feed` in file order, quarantining rows `transform` rejects.
+        `transform` must be picklable (see RowTransform). Gzip-compressed files and multi-byte
+        encodings cannot be split on byte offsets and are parsed in this process instead.
+        """
+        if feed.compressed or feed.encoding.lower() not in SPLITTABLE_ENCODINGS:
+            print(f"{self.label}: {feed.path} cannot be split by bytes, parsing it in one process")
+            return quarantine.filter(feed, transform)
+        return self._parsed(feed, transform, quarantine)
+
+    def _parsed(self, feed, transform, quarantine):
+        ranges = iter(record_ranges(feed.path, self.range_bytes))
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            pending = deque()
+
+            def submit():
+                task = next(ranges, None)
+                if task is not None:
+                    pending.append(pool.submit(parse_range, feed.path, feed.encoding, feed.delimiter,
+                                               feed.positions, transform, *task))
+
+            # Two ranges per process in flight: enough to keep them busy, few enough to bound memory
+            for _ in range(2 * self.processes):
+                submit()
+            while pending:
+                rows, rejected = pending.popleft().result()
+                submit()
+                for line_number, reason, row in rejected:
+                    quarantine.add(line_number, reason, row)
+                yield from rows
+
+    def _write_batch(self, tx, rows):
+        records = run_in_transaction(self.connection, tx, self.query, {"rows": rows})
+        return [record["id"] for record in records if "id" in record.keys()]
+
+    def _writer(self, batches):
+        failed = False
+        while True:
+            batch = batches.get()
+            if batch is _DONE:
+                return
+            if failed:
+                # Keep draining so the parser is never blocked on a dead writer
+                continue
+            try:
+                ids = self.connection.execute_write(self._write_batch, batch)
+            except Exception as e:
+                failed = True
+                with self._lock:
+                    self.errors.append(e)
+                print(f"{self.label}: writer failed, its remaining batches are skipped: {e}")
+                continue
+            with self._lock:
+                self.committed += len(batch)
+                self.written_ids.extend(ids)
+            if self._hooks is not None and ids:
+                self._hooks.put(ids)
+
+    def _hook_runner(self, hooks):
+        while True:
+            ids = hooks.get()
+            if ids is _DONE:
+                return
+            run_commit_hook(self.on_commit, ids, self.label)
+
+    def write(self, rows):
+        """
+        Send `rows` to the database through the writer threads and report throughput.
+        Returns the ids reported by the import query; raises WriteError if parsing or any writer failed.
+        """
+        start = time.perf_counter()
+        shards = [queue.Queue(maxsize=self.queue_size) for _ in range(self.writers)]
+        threads = [threading.Thread(target=self._writer, args=(shard,), daemon=True) for shard in shards]
+        hook_thread = None
+        if self.on_commit is not None:
+            self._hooks = queue.Queue()
+            hook_thread = threading.Thread(target=self._hook_runner, args=(self._hooks,), daemon=True)
+            hook_thread.start()
+        for thread in threads:
+            thread.start()
+        buffers = [[] for _ in shards]
+        try:
+            for row in rows:
+                index = hash(row[self.key]) % self.writers
+                buffers[index].append(row)
+                if len(buffers[index]) >= self.batch_size:
+                    shards[index].put(buffers[index])
+                    buffers[index] = []
+            for shard, buffer in zip(shards, buffers):
+                if buffer:
+                    shard.put(buffer)
+        except Exception as e:
+            self.errors.append(e)
+            print(f"{self.label} failed while parsing: {e}")
+        finally:
+            for shard in shards:
+                shard.put(_DONE)
+            for thread in threads:
+                thread.join()
+            if hook_thread is not None:
+                self._hooks.put(_DONE)
+                hook_thread.join()
+                self._hooks = None
+
+        elapsed = time.perf_counter() - start
+        rate = self.committed / elapsed if elapsed > 0 else 0.0
+        print(f"{self.label}: {self.committed} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec, "
+              f"{self.processes} processes, {self.writers} writers)")
+        if self.errors:
+            raise WriteError(f"{self.label} failed: {self.errors[0]}", self.written_ids) from self.errors[0]
+        return self.written_ids
@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pages.Queries import register
+
+# Partition plans and completed partitions of a relationship build, kept in the graph so an
+# interrupted build can resume from another machine. One :BuildPartition node per completed
+# partition, so parallel partitions never contend for a shared checkpoint node.
+# EDA statistics and snapshots leave both labels out (BOOKKEEPING_LABELS in pages/Queries.py).
+JOB_QUERY = register("partition.job", """
+        MATCH (job:BuildJob {job: $job})
+        OPTIONAL MATCH (done:BuildPartition {job: $job})
+        RETURN job.plan AS plan, collect(done.partition) AS completed
+        """, {"job": ""})
+
+START_JOB_QUERY = register("partition.start", """
+        MATCH (done:BuildPartition {job: $job}) DETACH DELETE done
+        WITH count(*) AS cleared
+        MERGE (job:BuildJob {job: $job})
+        SET job.plan = $plan, job.started_at = datetime()
+        """, {"job": "", "plan": ""})
+
+COMPLETE_PARTITION_QUERY = register("partition.complete", """
+        CREATE (:BuildPartition {job: $job, partition: $partition, completed_at: datetime()})
+        """, {"job": "", "partition": 0})
+
+FINISH_JOB_QUERY = register("partition.finish", """
+        MATCH (job:BuildJob {job: $job})
+        OPTIONAL MATCH (done:BuildPartition {job: $job})
+        DETACH DELETE job, done
+        """, {"job": ""})
+
+
+class GraphCheckpoint:
+    def __init__(self, connection):
+        """Checkpoints stored as :BuildJob / :BuildPartition nodes next to the data"""
+        self.connection = connection
+
+    def load(self, job):
+        """(plan, completed partition indexes) of an unfinished `job`, or (None, set())"""
+        records = self.connection.run(JOB_QUERY, {"job": job})
+        if not records:
+            return None, set()
+        return json.loads(records[0]["plan"]), set(records[0]["completed"])
+
+    def start(self, job, plan):
+        self.connection.run(START_JOB_QUERY, {"job": job, "plan": json.dumps(plan)})
+
+    def complete(self, job, partition):
+        self.connection.run(COMPLETE_PARTITION_QUERY, {"job": job, "partition": partition})
+
+    def finish(self, job):
+        self.connection.run(FINISH_JOB_QUERY, {"job": job})
+
+
+class FileCheckpoint:
+    def __init__(self, path):
+        """Checkpoints stored in a local JSON file, rewritten atomically after every partition"""
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def _write(self, jobs):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, mode="w", encoding="utf-8") as file:
+            json.dump(jobs, file)
+        os.replace(temporary, self.path)
+
+    def load(self, job):
+        with self._lock:
+            state = self._read().get(job)
+        if state is None:
+            return None, set()
+        return state["plan"], set(state["completed"])
+
+    def start(self, job, plan):
+        with self._lock:
+            jobs = self._read()
+            jobs[job] = {"plan": plan, "completed": []}
+            self._write(jobs)
+
+    def complete(self, job, partition):
+        with self._lock:
+            jobs = self._read()
+            jobs[job]["completed"].append(partition)
+            self._write(jobs)
+
+    def finish(self, job):
+        with self._lock:
+            jobs = self._read()
+            jobs.pop(job, None)
+            self._write(jobs)
+
+
+class Partitioning:
+    def __init__(self, partition_size=1000, checkpoint_path=None, max_workers=1, resume=True):
+        """
+        How a relationship builder splits a full rebuild: `partition_size` source nodes per
+        transaction, up to `max_workers` partitions at once. Checkpoints go to `checkpoint_path`
+        (a JSON file) or, when it is None, into the graph. With `resume` False any unfinished
+        build of the same relationship is discarded and started over.
+        """
+        if partition_size < 1:
+            raise ValueError("partition_size must be at least 1")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.partition_size = partition_size
+        self.checkpoint_path = checkpoint_path
+        self.max_workers = max_workers
+        self.resume = resume
+
+    def checkpoint(self, connection):
+        if self.checkpoint_path:
+            return FileCheckpoint(self.checkpoint_path)
+        return GraphCheckpoint(connection)
+
+
+def key_ranges(connection, label, key, partition_size):
+    """
+    Split the nodes of `label` into [low, high] ranges of `key` holding `partition_size` nodes each.
+    `label` and `key` must already be quoted; the ordering is served by the key's uniqueness constraint.
+    """
+    ranges = []
+    first = last = None
+    count = 0
+    for record in connection.stream(
+        f"MATCH (n:{label}) WHERE n.{key} IS NOT NULL RETURN n.{key} AS key ORDER BY key"
+    ):
+        if count == 0:
+            first = record["key"]
+        last = record["key"]
+        count += 1
+        if count == partition_size:
+            ranges.append([first, last])
+            count = 0
+    if count:
+        ranges.append([first, last])
+    return ranges
+
+
+def run_in_transaction(connection, tx, query, parameters):
+    """Run `query` in a managed transaction with the connection's instrumentation"""
+    start = time.perf_counter()
+    result = tx.run(connection.instrumentation.prepare(query), parameters)
+    records = list(result)
+    connection.instrumentation.record(query, time.perf_counter() - start, len(records), result.consume())
+    return records
+
+
+class PartitionedBuild:
+    def __init__(self, connection, job, partitioning):
+        """
+        Run a relationship build named `job` one partition per write transaction, checkpointing each
+        committed partition so a rerun after an interruption only does the partitions still missing.
+        """
+        self.connection = connection
+        self.job = job
+        self.partitioning = partitioning
+        self.checkpoint = partitioning.checkpoint(connection)
+
+    def run(self, plan, work):
+        """
+        `plan()` returns the list of partitions (JSON-serialisable); `work(tx, partition)` replaces the
+        relationships of one partition inside the managed transaction `tx`. Work must be idempotent, since
+        a partition that committed just before a crash is redone on resume.
+        Transient failures such as deadlocks between parallel partitions are retried by the driver.
+        Returns True once every partition has committed.
+        """
+        partitions, completed = self.checkpoint.load(self.job) if self.partitioning.resume else (None, set())
+        if partitions is None:
+            partitions = plan()
+            self.checkpoint.start(self.job, partitions)
+        elif completed:
+            print(f"{self.job}: resuming, {len(completed)} of {len(partitions)} partitions already built")
+
+        pending = [index for index in range(len(partitions)) if index not in completed]
+        start = time.perf_counter()
+        failed = []
+
+        def build(index):
+            self.connection.execute_write(work, partitions[index])
+            self.checkpoint.complete(self.job, index)
+
+        with ThreadPoolExecutor(max_workers=self.partitioning.max_workers) as pool:
+            futures = {pool.submit(build, index): index for index in pending}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.append(futures[future])
+                    print(f"{self.job}: partition {futures[future]} failed: {e}")
+
+        elapsed = time.perf_counter() - start
+        built = len(pending) - len(failed)
+        print(f"{self.job}: {built} of {len(pending)} partitions built in {elapsed:.2f}s")
+        if failed:
+            print(f"{self.job}: {len(failed)} partitions left for the next run")
+            return False
+        self.checkpoint.finish(self.job)
+        return True
+
+
+def replace_edges(connection, partitioning, label, key, rel_type, edges, write_query, target_filter=""):
+    """
+    Partitioned replacement of precomputed `edges` (rows with `source` and `target` element ids):
+    each partition deletes the outgoing `rel_type` relationships of its source nodes and writes theirs
+    with `write_query` (an `UNWIND $rows AS row` statement). `label`, `key` and `rel_type` must already
+    be quoted; `target_filter` narrows which existing relationships count as built by this job.
+    Rows are sorted by (source, target) so parallel partitions lock shared endpoints in the same order.
+    """
+    by_source = defaultdict(list)
+    for edge in edges:
+        by_source[edge["source"]].append(edge)
+
+    def work(tx, key_range):
+        low, high = key_range
+        records = run_in_transaction(
+            connection, tx,
+            f"MATCH (a:{label}) WHERE a.{key} >= $low AND a.{key} <= $high RETURN elementId(a) AS id",
+            {"low": low, "high": high},
+        )
+        ids = sorted(record["id"] for record in records)
+        run_in_transaction(
+            connection, tx,
+            f"""
+            MATCH (a:{label})-[r:{rel_type}]->(b:{label})
+            WHERE elementId(a) IN $ids {target_filter}
+            DELETE r
+            """,
+            {"ids": ids},
+        )
+        rows = sorted(
+            (edge for node_id in ids for edge in by_source.get(node_id, ())),
+            key=lambda edge: (edge["source"], edge["target"]),
+        )
+        if rows:
+            run_in_transaction(connection, tx, write_query, {"rows": rows})
+
+    job = f"{label.strip('`')}:{rel_type.strip('`')}"
+    return PartitionedBuild(connection, job, partitioning).run(
+        lambda: key_ranges(connection, label, key, partitioning.partition_size), work
+    )
@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+_DONE = object()
+
+
+def bounded_stream(iterable, maxsize=4):
+    """
+    Consume `iterable` on a background thread and yield its items through a bounded queue.
+    The producer blocks once `maxsize` items are waiting, so a fast parser cannot run
+    arbitrarily far ahead of a slow database writer.
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    failure = []
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        buffer.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            failure.append(e)
+        finally:
+            while not stop.is_set():
+                try:
+                    buffer.put(_DONE, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+    if failure:
+        raise failure[0]
+
+
+class Stage:
+    def __init__(self, name, func, depends_on=()):
+        """A named unit of pipeline work and the stages it waits for"""
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+class Pipeline:
+    def __init__(self, max_workers=3):
+        """
+        Run stages on a bounded thread pool as soon as their dependencies have succeeded.
+        """
+        self.max_workers = max_workers
+        self.stages = {}
+        self.started = None
+        self.finished = None
+
+    def add_stage(self, name, func, depends_on=()):
+        """
+        Declare a stage. `func` takes no arguments; `depends_on` names stages that must finish first.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dependency in depends_on:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dependency}")
+        self.stages[name] = Stage(name, func, depends_on)
+        return self
+
+    def _run_stage(self, stage):
+        stage.started = time.perf_counter()
+        try:
+            stage.result = stage.func()
+            stage.status = "done"
+        except Exception as e:
+            stage.error = e
+            stage.status = "failed"
+            print(f"Stage {stage.name} failed: {e}")
+        finally:
+            stage.finished = time.perf_counter()
+        return stage
+
+    def _ready(self, stage):
+        return stage.status == "pending" and all(
+            self.stages[dependency].status == "done" for dependency in stage.depends_on
+        )
+
+    def _skip_blocked(self):
+        for stage in self.stages.values():
+            if stage.status == "pending" and any(
+                self.stages[dependency].status in ("failed", "skipped") for dependency in stage.depends_on
+            ):
+                stage.status = "skipped"
+                print(f"Stage {stage.name} skipped: a dependency did not complete")
+
+    def run(self):
+        """
+        Execute every stage and return {stage name: result}.
+        Stages whose dependencies failed are skipped.
+        """
+        self.started = time.perf_counter()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                self._skip_blocked()
+                for stage in self.stages.values():
+                    if self._ready(stage):
+                        stage.status = "running"
+                        running[executor.submit(self._run_stage, stage)] = stage
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del running[future]
+        self.finished = time.perf_counter()
+        return {name: stage.result for name, stage in self.stages.items()}
+
+    def critical_path(self):
+        """
+        The chain of stages ending last, following at each step the dependency that finished latest.
+        """
+        completed = [stage for stage in self.stages.values() if stage.finished is not None]
+        if not completed:
+            return []
+        stage = max(completed, key=lambda s: s.finished)
+        path = [stage.name]
+        while stage.depends_on:
+            stage = max((self.stages[name] for name in stage.depends_on), key=lambda s: s.finished or 0.0)
+            path.append(stage.name)
+        return list(reversed(path))
+
+    def summary(self):
+        """
+        Print per-stage start offset, duration and status, followed by the critical path.
+        """
+        print("\nPipeline stage timings:")
+        print(f"{'Stage':<20}{'Start (s)':>10}{'Duration (s)':>14}  Status")
+        for stage in sorted(self.stages.values(), key=lambda s: s.started or float("inf")):
+            offset = (stage.started - self.started) if stage.started is not None else 0.0
+            print(f"{stage.name:<20}{offset:>10.2f}{stage.duration:>14.2f}  {stage.status}")
+        total = (self.finished - self.started) if self.finished is not None else 0.0
+        print(f"Total wall time: {total:.2f}s")
+        print("Critical path: " + " -> ".join(self.critical_path()))
@@ -0,0 +1,171 @@
+import threading
+
+from pages.Queries import quote
+from pages.Queries import register
+
+# Projection name -> GDS node and relationship projection, plus the generation scopes it is built from.
+# LUAS line and interchange edges are both projected so paths can change line.
+PROJECTIONS = {
+    "luasGraph": {
+        "nodes": "LuasStation",
+        "relationships": {
+            "CONNECTED_TO": {"type": "CONNECTED_TO", "properties": "travel_time"},
+            "INTERCHANGE": {"type": "INTERCHANGE", "properties": "travel_time"},
+        },
+        "scopes": ["LUAS"],
+    },
+    "dartGraph": {
+        "nodes": "DartStation",
+        "relationships": {"CONNECTED_TO": {"type": "CONNECTED_TO", "orientation": "UNDIRECTED"}},
+        "scopes": ["DART"],
+    },
+    "busGraph": {
+        "nodes": "BusRoute",
+        "relationships": {
+            "CONNECTED_TO": {"type": "CONNECTED_TO"},
+            "SHARES_LANDMARK": {"type": "SHARES_LANDMARK"},
+        },
+        "scopes": ["BUS"],
+    },
+}
+
+PROJECT_QUERY = register("projection.project", """
+        CALL gds.graph.project($name, $nodes, $relationships)
+        YIELD graphName, nodeCount, relationshipCount, projectMillis
+        RETURN graphName, nodeCount, relationshipCount, projectMillis
+        """)
+
+# A projection is stale when a loader bumped one of its scopes after the projection was created
+STATUS_QUERY = register("projection.status", """
+        CALL gds.graph.list($name) YIELD graphName, creationTime
+        OPTIONAL MATCH (g:GraphGeneration) WHERE g.scope IN $scopes
+        WITH graphName, creationTime, max(g.updated_at) AS changed
+        RETURN changed IS NOT NULL AND changed > creationTime AS stale
+        """)
+
+DROP_QUERY = "CALL gds.graph.drop($name, false) YIELD graphName RETURN graphName"
+
+MEMORY_QUERY = register("projection.memory", """
+        CALL gds.graph.list()
+        YIELD graphName, nodeCount, relationshipCount, memoryUsage, sizeInBytes, creationTime
+        RETURN graphName, nodeCount, relationshipCount, memoryUsage, sizeInBytes, toString(creationTime) AS created
+        ORDER BY sizeInBytes DESC
+        """)
+
+PAIR_PATHS_QUERY = """
+        UNWIND $pairs AS pair
+        MATCH (source:{label} {{{key}: pair.source}})
+        MATCH (target:{label} {{{key}: pair.target}})
+        CALL gds.shortestPath.dijkstra.stream($graph, {{
+            sourceNode: source,
+            targetNode: target{weight}
+        }})
+        YIELD totalCost, nodeIds
+        RETURN pair.source AS source, pair.target AS target, totalCost,
+               [nodeId IN nodeIds | gds.util.asNode(nodeId).{key}] AS path
+        """
+
+SINGLE_SOURCE_QUERY = """
+        MATCH (source:{label} {{{key}: $source}})
+        CALL gds.allShortestPaths.dijkstra.stream($graph, {{
+            sourceNode: source{weight}
+        }})
+        YIELD targetNode, totalCost, nodeIds
+        RETURN gds.util.asNode(targetNode).{key} AS target, totalCost,
+               [nodeId IN nodeIds | gds.util.asNode(nodeId).{key}] AS path
+        ORDER BY totalCost
+        """
+
+
+class ProjectionManager:
+    def __init__(self, connection, projections=None):
+        """
+        Build GDS projections on demand and reuse them until a loader changes their data.
+        `projections` defaults to PROJECTIONS.
+        """
+        self.connection = connection
+        self.projections = projections or PROJECTIONS
+        self._lock = threading.Lock()
+
+    def _spec(self, name):
+        if name not in self.projections:
+            raise ValueError(f"Unknown projection: {name!r}")
+        return self.projections[name]
+
+    def status(self, name):
+        """
+        "missing", "stale" or "current".
+        """
+        spec = self._spec(name)
+        records = self.connection.run(STATUS_QUERY, {"name": name, "scopes": spec["scopes"]})
+        if not records:
+            return "missing"
+        return "stale" if records[0]["stale"] else "current"
+
+    def ensure(self, name):
+        """
+        Return the projection name, projecting it first if it is missing or stale.
+        """
+        spec = self._spec(name)
+        with self._lock:
+            status = self.status(name)
+            if status == "current":
+                return name
+            if status == "stale":
+                self.drop(name)
+            records = self.connection.run(
+                PROJECT_QUERY,
+                {"name": name, "nodes": spec["nodes"], "relationships": spec["relationships"]},
+            )
+            if records:
+                info = records[0]
+                print(
+                    f"Projected {name}: {info['nodeCount']} nodes, {info['relationshipCount']} relationships "
+                    f"in {info['projectMillis']} ms"
+                )
+            return name
+
+    def drop(self, name):
+        """
+        Drop a projection if it exists. Returns True if one was dropped.
+        """
+        dropped = bool(self.connection.run(DROP_QUERY, {"name": name}))
+        if dropped:
+            print(f"Graph '{name}' deleted successfully.")
+        return dropped
+
+    def invalidate(self, name=None):
+        """
+        Drop one projection, or every managed projection, so the next `ensure` rebuilds it.
+        """
+        for projection in [name] if name else list(self.projections):
+            self.drop(projection)
+
+    def memory(self):
+        """
+        Node and relationship counts and memory use of every projection in the GDS catalog.
+        """
+        return [record.data() for record in self.connection.run(MEMORY_QUERY)]
+
+    def _path_query(self, template, label, key, weight):
+        weight_config = ",\n            relationshipWeightProperty: $weight" if weight else ""
+        return template.format(label=quote(label), key=quote(key), weight=weight_config)
+
+    def shortest_paths(self, name, pairs, label, key="name", weight="travel_time"):
+        """
+        Dijkstra paths for many (source, target) pairs in one round-trip.
+        Sources and targets are matched on `label`.`key`; pairs without a path are left out.
+        Pass `weight=None` for hop counts on unweighted projections.
+        """
+        self.ensure(name)
+        query = self._path_query(PAIR_PATHS_QUERY, label, key, weight)
+        rows = [{"source": source, "target": target} for source, target in pairs]
+        return [record.data() for record in self.connection.run(query, {"pairs": rows, "graph": name, "weight": weight})]
+
+    def single_source_paths(self, name, source, label, key="name", weight="travel_time"):
+        """
+        Dijkstra paths from one source to every reachable node, cheapest first.
+        """
+        self.ensure(name)
+        query = self._path_query(SINGLE_SOURCE_QUERY, label, key, weight)
+        return [record.data() for record in self.connection.run(query, {"source": source, "graph": name, "weight": weight})]
@@ -0,0 +1,127 @@
+import re
+import threading
+
+# Labels, property keys and relationship types that may be formatted into a statement
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_ ]*$")
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+# Labels of the nodes the loaders keep for their own bookkeeping (pages/Generation.py, pages/Partition.py)
+# rather than transit data; statements that walk every node leave them out
+BOOKKEEPING_LABELS = ["GraphGeneration", "BuildJob", "BuildPartition"]
+
+
+def quote(identifier):
+    """
+    Validate a label, property or relationship type name and wrap it in backticks.
+    """
+    if not IDENTIFIER.match(identifier):
+        raise ValueError(f"Invalid Cypher identifier: {identifier!r}")
+    return f"`{identifier}`"
+
+
+def escape(identifier):
+    """
+    Wrap any label or relationship type name in backticks, doubling the backticks inside it. For names
+    read back from the database, which need not be plain identifiers; names from callers go through `quote`.
+    """
+    return "`" + identifier.replace("`", "``") + "`"
+
+
+def data_nodes(variable="n"):
+    """
+    A predicate that is false for bookkeeping nodes, for the WHERE clause of a statement over all nodes.
+    """
+    return " AND ".join(f"NOT {variable}:{quote(label)}" for label in BOOKKEEPING_LABELS)
+
+
+class QueryRegistry:
+    """
+    Named Cypher statements shared by the pages/* and EDA classes. Values always travel as
+    parameters, so each statement is one query string and the server plans it once.
+    Labels and relationship types cannot be parameters; statements that need them use
+    `{name}` placeholders, filled by `format` with validated identifiers.
+    """
+
+    def __init__(self):
+        self._statements = {}
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, text, warm_parameters=None, variants=()):
+        """
+        Add a statement and return its text. `warm_parameters` are sample values (of the right types)
+        used to plan it ahead of time, `{}` for statements without parameters; statements registered
+        without them (e.g. ones needing an optional plugin) are not warmed.
+        `variants` lists the placeholder values to warm for templates.
+        """
+        with self._lock:
+            if name in self._statements and self._statements[name][0] != text:
+                raise ValueError(f"Query {name!r} is already registered with different text")
+            self._statements[name] = (text, warm_parameters, [dict(variant) for variant in variants])
+        return text
+
+    def __getitem__(self, name):
+        return self._statements[name][0]
+
+    def __contains__(self, name):
+        return name in self._statements
+
+    def names(self):
+        return sorted(self._statements)
+
+    def format(self, name, **identifiers):
+        """
+        The text of template `name` with its placeholders replaced by quoted `identifiers`.
+        Each combination is built once, so repeat calls hand the server the identical string.
+        """
+        key = (name, tuple(sorted(identifiers.items())))
+        text = self._variants.get(key)
+        if text is None:
+            template = self[name]
+            missing = set(PLACEHOLDER.findall(template)) - set(identifiers)
+            if missing:
+                raise KeyError(f"Query {name!r} needs identifiers: {sorted(missing)}")
+            quoted = {placeholder: quote(value) for placeholder, value in identifiers.items()}
+            text = PLACEHOLDER.sub(lambda match: quoted[match.group(1)], template)
+            self._variants[key] = text
+        return text
+
+    def warm(self, connection, names=None):
+        """
+        Plan every statement (or just `names`) with EXPLAIN, which fills the server's plan cache
+        without executing anything. Returns (statements planned, statements that failed).
+        """
+        planned = failed = 0
+        for name in names or self.names():
+            text, parameters, variants = self._statements[name]
+            if parameters is None:
+                continue
+            texts = [self.format(name, **variant) for variant in variants] if variants else [text]
+            for query in texts:
+                if PLACEHOLDER.search(query):
+                    continue
+                try:
+                    connection.run(f"EXPLAIN {query}", parameters)
+                    planned += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Could not plan {name}: {e}")
+        return planned, failed
+
+
+# The registry every module registers its statements with
+QUERIES = QueryRegistry()
+
+
+def register(name, text, warm_parameters=None, variants=()):
+    """Register a statement with the shared registry and return its text"""
+    return QUERIES.register(name, text, warm_parameters, variants)
+
+
+def warm_plans(connection, names=None):
+    """
+    Plan the shared statements on the server behind `connection` and print how many were planned.
+    Only statements of modules imported so far are registered.
+    """
+    planned, failed = QUERIES.warm(connection, names)
+    print(f"Query plans warmed: {planned} planned, {failed} failed")
+    return planned, failed
@@ -0,0 +1,148 @@
+import codecs
+import csv
+import gzip
+import os
+
+GZIP_MAGIC = b"\x1f\x8b"
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+# Bytes read per step while checking a file is UTF-8. The whole file is checked: anything that is not
+# valid UTF-8 falls back to latin1, which decodes every byte and matches how the feeds were read before.
+BLOCK_BYTES = 1 << 20
+FALLBACK_ENCODING = "latin1"
+
+
+def is_gzip(path):
+    with open(path, mode="rb") as file:
+        return file.read(2) == GZIP_MAGIC
+
+
+def _open_binary(path):
+    return gzip.open(path, mode="rb") if is_gzip(path) else open(path, mode="rb")
+
+
+def detect_encoding(path):
+    """
+    Guess the text encoding of a (possibly gzipped) file: from a byte-order mark, else UTF-8 if every
+    byte of the file decodes as UTF-8, else latin1. A stray byte deep in the file therefore cannot
+    abort a load part-way through.
+    """
+    with _open_binary(path) as file:
+        block = file.read(BLOCK_BYTES)
+        for bom, encoding in BOMS:
+            if block.startswith(bom):
+                return encoding
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            while block:
+                decoder.decode(block)
+                block = file.read(BLOCK_BYTES)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def record(row, positions):
+    """Parameter dict of one parsed CSV row, given CsvFeed.positions"""
+    width = len(row)
+    return {param: row[position] if position is not None and position < width else None
+            for param, position in positions.items()}
+
+
+class ColumnChunk:
+    """
+    Up to `chunk_size` parsed rows stored column by column: one list per parameter plus the CSV line
+    each row ended on. Rows become dicts only when iterated, one at a time.
+    """
+
+    __slots__ = ("columns", "lines")
+
+    def __init__(self, names):
+        self.columns = {name: [] for name in names}
+        self.lines = []
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        names = list(self.columns)
+        for i, line in enumerate(self.lines):
+            yield line, {name: self.columns[name][i] for name in names}
+
+
+class CsvFeed:
+    def __init__(self, path, columns, required=None, encoding=None, chunk_size=10000, delimiter=","):
+        """
+        Stream a CSV (plain or gzip-compressed) as parameter dicts. `columns` maps parameter names to
+        CSV headers; headers are resolved once per file, ignoring case and surrounding whitespace when
+        there is no exact match. `required` lists the parameters whose columns must be present
+        (default: all of them); a missing one raises ValueError before any row is read. Absent
+        optional columns read as None. `encoding` is detected when not given.
+        Only one chunk of `chunk_size` rows is held at a time, so memory does not grow with the file.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CSV file not found at path: {path}")
+        self.path = path
+        self.columns = columns
+        self.required = list(columns) if required is None else list(required)
+        self.encoding = encoding or detect_encoding(path)
+        self.chunk_size = chunk_size
+        self.delimiter = delimiter
+        self.compressed = is_gzip(path)
+        self.line_num = 0
+        with self._open() as file:
+            header = next(csv.reader(file, delimiter=delimiter), [])
+        self.positions = self._map_header(header)
+
+    def _open(self):
+        if self.compressed:
+            return gzip.open(self.path, mode="rt", encoding=self.encoding, newline="")
+        return open(self.path, mode="r", encoding=self.encoding, newline="")
+
+    def _map_header(self, header):
+        """Parameter -> column position, or None for an absent optional column"""
+        exact = {name: i for i, name in enumerate(header)}
+        loose = {name.strip().lower(): i for i, name in enumerate(header)}
+        positions = {}
+        for param, column in self.columns.items():
+            position = exact.get(column)
+            if position is None:
+                position = loose.get(column.strip().lower())
+            positions[param] = position
+        missing = [self.columns[param] for param in self.required if positions.get(param) is None]
+        if missing:
+            raise ValueError(f"{self.path}: missing required columns: {', '.join(missing)}")
+        return positions
+
+    def chunks(self):
+        """Yield ColumnChunks of up to `chunk_size` rows"""
+        positions = list(self.positions.items())
+        with self._open() as file:
+            reader = csv.reader(file, delimiter=self.delimiter)
+            next(reader, None)
+            chunk = ColumnChunk(self.positions)
+            for row in reader:
+                if not row:
+                    continue
+                width = len(row)
+                for param, position in positions:
+                    chunk.columns[param].append(row[position] if position is not None and position < width else None)
+                chunk.lines.append(reader.line_num)
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = ColumnChunk(self.positions)
+            if len(chunk):
+                yield chunk
+
+    def __iter__(self):
+        """Yield one fresh parameter dict per row; `line_num` is the CSV line the current row ended on"""
+        for chunk in self.chunks():
+            for line, record in chunk:
+                self.line_num = line
+                yield record
@@ -0,0 +1,77 @@
+# Constraints and indexes backing MERGE-based, re-runnable imports.
+# Each mode has its own label (:DartStation, :LuasStation, :BusRoute) next to the shared
+# :Station / :Route labels, so builders and projections only touch their own partition.
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT country_name IF NOT EXISTS FOR (c:Country) REQUIRE c.name IS UNIQUE",
+    "CREATE CONSTRAINT category_name IF NOT EXISTS FOR (c:Category) REQUIRE c.name IS UNIQUE",
+    "CREATE CONSTRAINT dart_station_name IF NOT EXISTS FOR (s:DartStation) REQUIRE s.name IS UNIQUE",
+    "CREATE CONSTRAINT luas_station_id IF NOT EXISTS FOR (s:LuasStation) REQUIRE s.Station_ID IS UNIQUE",
+    "CREATE CONSTRAINT bus_route_number IF NOT EXISTS FOR (r:BusRoute) REQUIRE r.`Route Number` IS UNIQUE",
+    "CREATE CONSTRAINT graph_generation_scope IF NOT EXISTS FOR (g:GraphGeneration) REQUIRE g.scope IS UNIQUE",
+    "CREATE CONSTRAINT build_job IF NOT EXISTS FOR (j:BuildJob) REQUIRE j.job IS UNIQUE",
+    "CREATE INDEX build_partition_job IF NOT EXISTS FOR (p:BuildPartition) ON (p.job)",
+    "CREATE INDEX station_name IF NOT EXISTS FOR (s:Station) ON (s.name)",
+    "CREATE INDEX luas_station_name IF NOT EXISTS FOR (s:LuasStation) ON (s.name)",
+    "CREATE INDEX luas_station_line IF NOT EXISTS FOR (s:LuasStation) ON (s.Line)",
+    "CREATE INDEX luas_station_interchange IF NOT EXISTS FOR (s:LuasStation) ON (s.Interchange)",
+    "CREATE INDEX bus_route_from IF NOT EXISTS FOR (r:BusRoute) ON (r.From)",
+    "CREATE INDEX bus_route_to IF NOT EXISTS FOR (r:BusRoute) ON (r.To)",
+    # Range indexes on the fields typed at import (see the *_SCHEMA dicts in pages/*).
+    # DART amenity flags are booleans and too low-cardinality to benefit from an index.
+    "CREATE INDEX luas_station_zone IF NOT EXISTS FOR (s:LuasStation) ON (s.Zone)",
+    "CREATE INDEX luas_station_footfall IF NOT EXISTS FOR (s:LuasStation) ON (s.Daily_Footfall)",
+    "CREATE INDEX luas_station_first_tram IF NOT EXISTS FOR (s:LuasStation) ON (s.First_Tram_Time)",
+    "CREATE INDEX luas_station_last_tram IF NOT EXISTS FOR (s:LuasStation) ON (s.Last_Tram_Time)",
+    "CREATE INDEX bus_route_frequency IF NOT EXISTS FOR (r:BusRoute) ON (r.Frequency)",
+    "CREATE INDEX bus_route_duration IF NOT EXISTS FOR (r:BusRoute) ON (r.Duration)",
+    # Partner lookups of the incremental linkers (TokenRelationshipBuilder.link)
+    "CREATE FULLTEXT INDEX dart_station_routes IF NOT EXISTS FOR (s:DartStation) ON EACH [s.routes_serviced]",
+    "CREATE FULLTEXT INDEX bus_route_landmarks IF NOT EXISTS FOR (r:BusRoute) ON EACH [r.`Key Landmarks`]",
+    # Backs the distance filters in pages/Spatial.py
+    "CREATE POINT INDEX luas_station_coordinates IF NOT EXISTS FOR (s:LuasStation) ON (s.coordinates)",
+]
+
+# Schema objects replaced by the mode-scoped ones above
+OBSOLETE_SCHEMA_STATEMENTS = [
+    "DROP CONSTRAINT station_id IF EXISTS",
+    "DROP CONSTRAINT route_number IF EXISTS",
+    "DROP INDEX route_from IF EXISTS",
+    "DROP INDEX route_to IF EXISTS",
+]
+
+# Category -> relationship -> mode label, used to label graphs imported before mode labels existed
+MODE_LABELS = [
+    ("DART", "HAS_STATION", "DartStation"),
+    ("LUAS", "HAS_STATION", "LuasStation"),
+    ("BUS", "HAS_ROUTE", "BusRoute"),
+]
+
+
+def ensure_schema(connection):
+    """
+    Create every constraint and index in SCHEMA_STATEMENTS. Safe to run repeatedly.
+    """
+    for statement in OBSOLETE_SCHEMA_STATEMENTS:
+        connection.run(statement)
+    for statement in SCHEMA_STATEMENTS:
+        connection.run(statement)
+
+
+def migrate_mode_labels(connection, batch_size=10000):
+    """
+    Add the mode label to nodes that only carry :Station / :Route, based on their category.
+    Returns {mode label: nodes relabelled}.
+    """
+    migrated = {}
+    for category, rel_type, label in MODE_LABELS:
+        records = connection.run(
+            f"""
+            MATCH (:Category {{name: $category}})-[:{rel_type}]->(n)
+            WHERE NOT n:{label}
+            CALL {{ WITH n SET n:{label} }} IN TRANSACTIONS OF $batch_size ROWS
+            RETURN count(*) AS migrated
+            """,
+            {"category": category, "batch_size": batch_size},
+        )
+        migrated[label] = records[0]["migrated"] if records else 0
+    return migrated
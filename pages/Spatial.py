@@ -0,0 +1,267 @@
+import heapq
+import math
+
+from pages.Coerce import coerce_row
+from pages.Connection import ConnectionManager
+from pages.Geo import EARTH_RADIUS_KM
+from pages.Queries import register
+from pages.Reader import CsvFeed
+
+# Station fields returned by both the graph and the local index
+STATION_FIELDS = ("name", "station_id", "line", "latitude", "longitude")
+
+NEAREST_QUERY = register("spatial.nearest", """
+        WITH point({latitude: $latitude, longitude: $longitude}) AS origin
+        MATCH (station:LuasStation)
+        WHERE point.distance(station.coordinates, origin) <= $radius_m
+        WITH station, point.distance(station.coordinates, origin) AS metres
+        ORDER BY metres
+        LIMIT $k
+        RETURN station.name AS name, station.Station_ID AS station_id, station.Line AS line,
+               station.Latitude AS latitude, station.Longitude AS longitude,
+               round(metres / 1000.0, 3) AS distance_km
+        """, {"latitude": 0.0, "longitude": 0.0, "radius_m": 0.0, "k": 1})
+
+WITHIN_QUERY = register("spatial.within", """
+        WITH point({latitude: $latitude, longitude: $longitude}) AS origin
+        MATCH (station:LuasStation)
+        WHERE point.distance(station.coordinates, origin) <= $radius_m
+        WITH station, point.distance(station.coordinates, origin) AS metres
+        ORDER BY metres
+        RETURN station.name AS name, station.Station_ID AS station_id, station.Line AS line,
+               station.Latitude AS latitude, station.Longitude AS longitude,
+               round(metres / 1000.0, 3) AS distance_km
+        """, {"latitude": 0.0, "longitude": 0.0, "radius_m": 0.0})
+
+# Sets the point property on stations imported before it existed
+BACKFILL_QUERY = register("spatial.backfill", """
+        MATCH (station:LuasStation)
+        WHERE station.coordinates IS NULL AND station.Latitude IS NOT NULL AND station.Longitude IS NOT NULL
+        CALL {
+            WITH station
+            SET station.coordinates = point({latitude: toFloat(station.Latitude),
+                                             longitude: toFloat(station.Longitude)})
+        } IN TRANSACTIONS OF 10000 ROWS
+        RETURN count(*) AS updated
+        """)
+
+
+def to_unit_vector(latitude, longitude):
+    """
+    Position on the unit sphere. Chord length between two vectors grows monotonically with
+    great-circle distance, so nearest neighbours in 3D are nearest neighbours on the earth.
+    """
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(distance_km):
+    return 2 * math.sin(min(math.pi / 2, distance_km / (2 * EARTH_RADIUS_KM)))
+
+
+def _squared(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+class StationIndex:
+    def __init__(self, stations):
+        """
+        In-memory KD-tree over station coordinates, for nearest-station queries without a database.
+        `stations` are dicts with at least `latitude` and `longitude`; stations without both are skipped.
+        """
+        self.stations = [
+            station for station in stations
+            if station.get("latitude") is not None and station.get("longitude") is not None
+        ]
+        self._points = [to_unit_vector(s["latitude"], s["longitude"]) for s in self.stations]
+        self._root = self._build(list(range(len(self.stations))), 0)
+
+    @classmethod
+    def from_csv(cls, csv_file_path):
+        """
+        Build the index from the LUAS CSV, using the same column mapping and coordinate typing as the
+        importer. Only stations whose coordinates cannot be read are left out; a bad value in any other
+        field does not make a station any harder to locate.
+        """
+        from pages.Luas import LUAS_COLUMNS, LUAS_SCHEMA
+
+        coordinates = {field: LUAS_SCHEMA[field] for field in ("Latitude", "Longitude")}
+        stations = []
+        for parameters in CsvFeed(csv_file_path, LUAS_COLUMNS, required=["Station_ID"]):
+            try:
+                coerce_row(parameters, coordinates)
+            except ValueError:
+                continue
+            stations.append({
+                "name": parameters["Station_Name"],
+                "station_id": parameters["Station_ID"],
+                "line": parameters["Line"],
+                "latitude": parameters["Latitude"],
+                "longitude": parameters["Longitude"],
+            })
+        return cls(stations)
+
+    def __len__(self):
+        return len(self.stations)
+
+    def _build(self, indices, depth):
+        """Node layout: (point index, axis, left subtree, right subtree)"""
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self._points[i][axis])
+        middle = len(indices) // 2
+        return (
+            indices[middle],
+            axis,
+            self._build(indices[:middle], depth + 1),
+            self._build(indices[middle + 1:], depth + 1),
+        )
+
+    def _result(self, index, squared_chord):
+        station = {field: self.stations[index].get(field) for field in STATION_FIELDS}
+        station["distance_km"] = round(chord_to_km(math.sqrt(squared_chord)), 3)
+        return station
+
+    def nearest_stations(self, latitude, longitude, k=5):
+        """
+        The `k` stations closest to a coordinate, nearest first.
+        """
+        if k < 1 or not self.stations:
+            return []
+        target = to_unit_vector(latitude, longitude)
+        best = []  # max-heap of (-squared chord, index)
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, axis, left, right = node
+            squared = _squared(self._points[index], target)
+            if len(best) < k:
+                heapq.heappush(best, (-squared, index))
+            elif squared < -best[0][0]:
+                heapq.heapreplace(best, (-squared, index))
+            offset = target[axis] - self._points[index][axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            if len(best) < k or offset * offset < -best[0][0]:
+                stack.append(far)
+            stack.append(near)
+        return [self._result(index, -negated) for negated, index in sorted(best, reverse=True)]
+
+    def stations_within(self, latitude, longitude, radius_km):
+        """
+        Every station within `radius_km` of a coordinate, nearest first.
+        """
+        return [self._result(index, squared) for squared, index in self._within(latitude, longitude, radius_km)]
+
+    def neighbours(self, latitude, longitude, radius_km):
+        """
+        (distance in km, station) for every indexed station within `radius_km`, nearest first.
+        The stations are the dicts the index was built from, with all their fields.
+        """
+        return [
+            (chord_to_km(math.sqrt(squared)), self.stations[index])
+            for squared, index in self._within(latitude, longitude, radius_km)
+        ]
+
+    def _within(self, latitude, longitude, radius_km):
+        target = to_unit_vector(latitude, longitude)
+        limit = km_to_chord(radius_km) ** 2
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, axis, left, right = node
+            squared = _squared(self._points[index], target)
+            if squared <= limit:
+                found.append((squared, index))
+            offset = target[axis] - self._points[index][axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            stack.append(near)
+            if offset * offset <= limit:
+                stack.append(far)
+        return sorted(found)
+
+
+class SpatialExecution:
+    def __init__(self, uri, user, password, **config):
+        """Initialize the Neo4j connection"""
+        self.connection = ConnectionManager.get(uri, user, password, **config)
+        self.driver = self.connection.driver
+
+    def close(self):
+        """Release the shared Neo4j connection"""
+        if self.connection:
+            self.connection.release()
+            self.connection = None
+
+    def execute_query(self, query, parameters=None):
+        """Execute a given Cypher query."""
+        try:
+            return self.connection.run(query, parameters)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def stream_query(self, query, parameters=None, fetch_size=1000):
+        """Execute a given Cypher query and yield its records lazily, `fetch_size` at a time."""
+        try:
+            yield from self.connection.stream(query, parameters, fetch_size=fetch_size)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def backfill_points(self):
+        """
+        Set the `coordinates` point on LUAS stations that only carry Latitude/Longitude.
+        """
+        records = self.execute_query(BACKFILL_QUERY) or []
+        updated = records[0]["updated"] if records else 0
+        print(f"Station coordinates set on {updated} LUAS stations.")
+        return updated
+
+    def nearest_stations(self, latitude, longitude, k=5, start_radius_km=1.0, max_radius_km=50.0):
+        """
+        The `k` LUAS stations closest to a coordinate, nearest first.
+        The search radius starts at `start_radius_km` and doubles until `k` stations are found, so
+        every round is a bounded lookup on the point index rather than a sort of all stations.
+        """
+        radius_km = start_radius_km
+        while True:
+            records = self.execute_query(
+                NEAREST_QUERY,
+                parameters={"latitude": latitude, "longitude": longitude, "radius_m": radius_km * 1000, "k": k},
+            ) or []
+            if len(records) >= k or radius_km >= max_radius_km:
+                return [record.data() for record in records]
+            radius_km = min(radius_km * 2, max_radius_km)
+
+    def stations_within(self, latitude, longitude, radius_km):
+        """
+        Every LUAS station within `radius_km` of a coordinate, nearest first.
+        """
+        records = self.execute_query(
+            WITHIN_QUERY,
+            parameters={"latitude": latitude, "longitude": longitude, "radius_m": radius_km * 1000},
+        ) or []
+        return [record.data() for record in records]
+
+    def local_index(self):
+        """
+        Snapshot the station coordinates into a StationIndex for repeated offline lookups.
+        """
+        records = self.execute_query(
+            """
+            MATCH (station:LuasStation)
+            WHERE station.coordinates IS NOT NULL
+            RETURN station.name AS name, station.Station_ID AS station_id, station.Line AS line,
+                   station.coordinates.latitude AS latitude, station.coordinates.longitude AS longitude
+            """
+        ) or []
+        return StationIndex(record.data() for record in records)
@@ -1,81 +1,139 @@
-from neo4j import GraphDatabase
 import os
 
 from CRISP_DM.EDA import Neo4jEDA
 from pages.Bus import BusExecution
+from pages.Config import load_config
+from pages.Connection import ConnectionManager
 from pages.Dart import DartExecution
 from pages.Luas import LuasExecution
 from pages.Master import MasterNode
+from pages.Pipeline import Pipeline
+from pages.Queries import warm_plans
 
 
 class Neo4jExecution:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, **config):
         """Initialize the Neo4j connection"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.connection = ConnectionManager.get(uri, user, password, **config)
+        self.driver = self.connection.driver
 
     def close(self):
-        """Close the Neo4j connection"""
-        if self.driver:
-            self.driver.close()
+        """Release the shared Neo4j connection"""
+        if self.connection:
+            self.connection.release()
+            self.connection = None
 
     def iconnect(self):
         """Test if the connection to the Neo4j server is established."""
         try:
-            with self.driver.session() as session:
-                session.run("RETURN 1")
+            self.connection.verify()
             print("Connection to Neo4j established successfully!")
         except Exception as e:
             print("Failed to connect to Neo4j:", e)
 
     def execute_query(self, query, parameters=None):
         """Execute a given Cypher query."""
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, parameters)
-                return [record for record in result]
-            except Exception as e:
-                print(f"Query execution failed: {e}")
+        try:
+            return self.connection.run(query, parameters)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
+
+    def stream_query(self, query, parameters=None, fetch_size=1000):
+        """Execute a given Cypher query and yield its records lazily, `fetch_size` at a time."""
+        try:
+            yield from self.connection.stream(query, parameters, fetch_size=fetch_size)
+        except Exception as e:
+            print(f"Query execution failed: {e}")
 
 
 # Main Execution
 if __name__ == "__main__":
-    # Define Neo4j connection details
-    URI = "bolt://localhost:7687"
-    USER = "neo4j"
-    PASSWORD = "9820065151"
+    # Connection details and data paths come from NEO4J_* / TRANSIT_* environment variables
+    # or transit.ini in the project root (see pages/Config.py)
+    CONFIG = load_config()
+    if CONFIG["password"] is None:
+        raise SystemExit("Set NEO4J_PASSWORD or add [neo4j] password to transit.ini")
+    URI, USER, PASSWORD = CONFIG["uri"], CONFIG["user"], CONFIG["password"]
 
     # Path to the CSV file
-    PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    DART_CSV_FILE_PATH = os.path.join(PROJECT_ROOT, "data","DART_Dataset.csv")
-    LUAS_CSV_FILE_PATH = os.path.join(PROJECT_ROOT, "data", "LUAS_Dataset.csv")
-    BUS_CSV_FILE_PATH = os.path.join(PROJECT_ROOT, "data", "BUS_Dataset.csv")
+    DART_CSV_FILE_PATH = CONFIG["dart_csv"]
+    LUAS_CSV_FILE_PATH = CONFIG["luas_csv"]
+    BUS_CSV_FILE_PATH = CONFIG["bus_csv"]
+
+    # Only write rows that changed since the last run and relink just those nodes
+    INCREMENTAL = True
+
+    # Send queries with PROFILE so the end-of-run report includes db hits
+    PROFILE_QUERIES = False
 
     # Create an instance of the Neo4jExecution class
-    neo4j_exec = Neo4jExecution(URI, USER, PASSWORD)
+    neo4j_exec = Neo4jExecution(URI, USER, PASSWORD, profile=PROFILE_QUERIES, metrics_url=CONFIG["metrics_url"])
 
     try:
         # Test the connection
         neo4j_exec.iconnect()
-        # Create master-parent-child nodes
+        # Plan the registered statements up front so the first import batch does not pay for planning
+        warm_plans(neo4j_exec.connection)
         imaster = MasterNode(URI, USER, PASSWORD)
-        imaster.create_master_parent_child_node()
-
-        # Import station data from CSV
         iDart=DartExecution(URI, USER, PASSWORD)
-        iDart.import_station_data(DART_CSV_FILE_PATH)
-        iDart.create_station_relationships()
-
         iluas=LuasExecution(URI, USER, PASSWORD)
-        iluas.import_luas_data(LUAS_CSV_FILE_PATH)
-        iluas.create_luas_station_relationships()
-        iluas.create_interchange_relationships()
-
         ibus=BusExecution(URI, USER, PASSWORD)
-        ibus.import_bus_data(BUS_CSV_FILE_PATH)
-        ibus.create_route_relationships()
-        ibus.create_route_connections()
 
-        ieda = Neo4jEDA(URI, USER, PASSWORD)
+        def relink_ids(loader):
+            return loader.last_written_ids if INCREMENTAL else None
+
+        def link_hook(link):
+            return link if INCREMENTAL else None
+
+        # The three datasets are independent until their relationship phase, so their
+        # import and link stages run concurrently once the master nodes exist.
+        # In incremental mode DART and BUS link each batch as it commits, through index lookups,
+        # so only LUAS (whose line order depends on every stop) keeps a separate link stage.
+        pipeline = Pipeline(max_workers=3)
+        pipeline.add_stage("schema", imaster.create_constraints_and_indexes)
+        pipeline.add_stage("master", imaster.create_master_parent_child_node, depends_on=["schema"])
+
+        pipeline.add_stage(
+            "dart_import",
+            lambda: iDart.import_station_data(DART_CSV_FILE_PATH, incremental=INCREMENTAL,
+                                              on_commit=link_hook(iDart.link_stations)),
+            depends_on=["master"],
+        )
+        if not INCREMENTAL:
+            pipeline.add_stage("dart_link", iDart.create_station_relationships, depends_on=["dart_import"])
+
+        pipeline.add_stage(
+            "luas_import",
+            lambda: iluas.import_luas_data(LUAS_CSV_FILE_PATH, incremental=INCREMENTAL),
+            depends_on=["master"],
+        )
+        pipeline.add_stage(
+            "luas_link",
+            lambda: iluas.create_luas_station_relationships(node_ids=relink_ids(iluas),
+                                                            lines=iluas.removed_lines if INCREMENTAL else None),
+            depends_on=["luas_import"],
+        )
+        pipeline.add_stage(
+            "luas_interchange",
+            lambda: iluas.create_interchange_relationships(node_ids=relink_ids(iluas),
+                                                           lines=iluas.removed_lines if INCREMENTAL else None),
+            depends_on=["luas_link"],
+        )
+
+        pipeline.add_stage(
+            "bus_import",
+            lambda: ibus.import_bus_data(BUS_CSV_FILE_PATH, incremental=INCREMENTAL,
+                                         on_commit=link_hook(ibus.link_routes)),
+            depends_on=["master"],
+        )
+        if not INCREMENTAL:
+            pipeline.add_stage("bus_landmarks", ibus.create_route_relationships, depends_on=["bus_import"])
+            pipeline.add_stage("bus_connections", ibus.create_route_connections, depends_on=["bus_import"])
+
+        pipeline.run()
+        pipeline.summary()
+
+        ieda = Neo4jEDA(URI, USER, PASSWORD, cache={"path": os.path.join(CONFIG["data_dir"], "eda_cache")})
         ieda.test_connection()
 
 
@@ -108,8 +166,21 @@ if __name__ == "__main__":
         #ieda.delete_existing_graph("luasGraph")
         ieda.sample_subgraph()
         degree_data = ieda.degree_distribution(limit=20)
-        ieda.visualize_node_degree_distribution(degree_data)
+        ieda.visualize_node_degree_distribution(degree_data, os.path.join(CONFIG["data_dir"], "degree_distribution.png"))
+        histogram = ieda.degree_histogram()
+        ieda.plot_degree_histogram(histogram, os.path.join(CONFIG["data_dir"], "degree_histogram.svg"), rel_types=True)
         ieda.apply_graph_algorithms()
+        print("\nProjection memory:", ieda.projection_memory())
+
+        # Local analytics on a CSR snapshot; re-exported only after an import changed the graph
+        snapshot = ieda.snapshot(os.path.join(CONFIG["data_dir"], "snapshot"))
+        print("\nSnapshot degree statistics:", snapshot.degree_statistics())
+        print("Weakly connected components:", snapshot.components()[0])
+        print("\nEDA cache:", ieda.cache_stats())
     finally:
-        # Close the connection
+        # Report pool usage and per-query timings, then close every shared connection
+        print("\nConnection pool metrics:", neo4j_exec.connection.metrics())
+        neo4j_exec.connection.instrumentation.report()
+        neo4j_exec.connection.instrumentation.to_json(os.path.join(CONFIG["data_dir"], "query_profile.json"))
         neo4j_exec.close()
+        ConnectionManager.close_all()